@@ -0,0 +1,13 @@
+"""
+成绩分析模块（基于 NumPy 的列式统计）
+"""
+from .columns import GradeColumns
+from .engine import GradeAnalytics, get_analytics
+from .snapshot import SnapshotScheduler, build_snapshot, open_snapshot
+from .ranking import RankingService, get_ranking_service
+from .risk import RiskEngine, get_risk_engine
+
+__all__ = ['GradeColumns', 'GradeAnalytics', 'get_analytics',
+           'SnapshotScheduler', 'build_snapshot', 'open_snapshot',
+           'RankingService', 'get_ranking_service',
+           'RiskEngine', 'get_risk_engine']
@@ -0,0 +1,34 @@
+"""
+生成成绩列式快照（导入数据后运行）
+用法: python -m analytics --db teaching_system.db [--out 快照目录] [--risk]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from analytics.snapshot import build_snapshot, default_snapshot_dir
+from analytics.risk import RiskEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成成绩列式快照（导入数据后运行）')
+    parser.add_argument('--db', default='teaching_system.db', help='数据库文件')
+    parser.add_argument('--out', help='快照目录（默认为 <数据库文件>.columns）')
+    parser.add_argument('--risk', action='store_true', help='同时重新扫描全部学生的学业预警')
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    started = time.perf_counter()
+    directory = args.out or default_snapshot_dir(args.db)
+    version = build_snapshot(db, directory)
+    print(f"已生成快照 {os.path.join(directory, version)}，耗时 {time.perf_counter() - started:.2f}秒")
+    if args.risk:
+        RiskEngine(db).scan()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+成绩列式数据
+一次性读取成绩、学生、课程三张表，转换为按列存放的 NumPy 数组：
+每条成绩只保存学生下标、课程下标、学期编码和各项分数，
+学生的年级/专业/班级、课程的名称/教师/学分按下标从对应的维度数组中取得
+"""
+import time
+
+import numpy as np
+
+
+# 可用于筛选和分组的维度：名称 -> (所属表, 列名)
+DIMENSIONS = {
+    'student_id': ('student', 'student_id'),
+    'grade': ('student', 'grade'),
+    'major': ('student', 'major'),
+    'class_name': ('student', 'class_name'),
+    'course_id': ('course', 'course_id'),
+    'course_name': ('course', 'course_name'),
+    'teacher_id': ('course', 'teacher_id'),
+    'course_semester': ('course', 'semester'),
+    'semester': ('grade', 'semester'),
+}
+
+SCORE_FIELDS = ('usual_score', 'exam_score', 'final_score')
+
+# 编码数组的维度（student_id / course_id 的编码即下标，不单独保存）
+CODED_DIMENSIONS = ('grade', 'major', 'class_name', 'course_name', 'teacher_id',
+                    'course_semester', 'semester')
+
+# 分数、学分使用 float32，下标和编码使用 int32，减小内存占用和快照文件体积
+SCORE_DTYPE = np.float32
+INDEX_DTYPE = np.int32
+
+
+def _factorize(values):
+    """字符串列 -> (编码数组, 取值列表)，None/空串编码为 -1"""
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(v, len(lookup)) if v not in (None, '') else -1 for v in values),
+        dtype=INDEX_DTYPE,
+        count=len(values),
+    )
+    return codes, list(lookup)
+
+
+def _rowid_index(rowids):
+    """rowid -> 数组下标的查找表（rowid 不存在时为 -1）"""
+    size = int(rowids.max()) + 1 if len(rowids) else 1
+    index = np.full(size, -1, dtype=INDEX_DTYPE)
+    index[rowids] = np.arange(len(rowids), dtype=INDEX_DTYPE)
+    return index
+
+
+class GradeColumns:
+    """列式存放的全部成绩数据（只读）
+
+    - 成绩列：student_idx, course_idx, semester（编码）, usual_score, exam_score, final_score, credits
+    - 学生维度：student_ids, student_names, 以及 grade/major/class_name 的编码与取值
+    - 课程维度：course_ids, course_names, teacher_ids, teacher_names, course_credits, 课程学期编码
+    """
+
+    def __init__(self):
+        self.student_ids = []
+        self.student_names = []
+        self.course_ids = []
+        self.course_names = []
+        self.teacher_ids = []
+        self.teacher_names = []
+        self.teacher_name_of = {}
+        # 维度名 -> 编码数组（按学生/课程/成绩行）及取值列表
+        self.codes = {}
+        self.labels = {}
+        self.course_credits = np.zeros(0, dtype=SCORE_DTYPE)
+        self.student_idx = np.zeros(0, dtype=INDEX_DTYPE)
+        self.course_idx = np.zeros(0, dtype=INDEX_DTYPE)
+        self.scores = {field: np.zeros(0, dtype=SCORE_DTYPE) for field in SCORE_FIELDS}
+        self.credits = np.zeros(0, dtype=SCORE_DTYPE)
+        # 从数据库读取的时间（time.time()），多个进程比较数据新旧时使用
+        self.loaded_at = 0.0
+        self._lookups = {}
+
+    def __len__(self):
+        return len(self.student_idx)
+
+    @classmethod
+    def load(cls, conn):
+        """从数据库连接读取（只需一次读事务，各表数据一致）"""
+        data = cls()
+        data.loaded_at = time.time()
+        cur = conn.cursor()
+        cur.execute('BEGIN')
+        try:
+            students = cur.execute(
+                'SELECT rowid, student_id, name, grade, major, class_name FROM students ORDER BY rowid'
+            ).fetchall()
+            courses = cur.execute('''
+                SELECT c.rowid, c.course_id, c.course_name, c.teacher_id, t.name, c.credits, c.semester
+                FROM courses c
+                LEFT JOIN teachers t ON c.teacher_id = t.teacher_id
+                ORDER BY c.rowid
+            ''').fetchall()
+            grades = cur.execute('''
+                SELECT s.rowid, c.rowid, g.semester, g.usual_score, g.exam_score, g.final_score
+                FROM grades g
+                JOIN students s ON g.student_id = s.student_id
+                JOIN courses c ON g.course_id = c.course_id
+            ''').fetchall()
+        finally:
+            conn.rollback()
+
+        s_cols = list(zip(*students)) or [()] * 6
+        data.student_ids = list(s_cols[1])
+        data.student_names = list(s_cols[2])
+        for name, column in zip(('grade', 'major', 'class_name'), s_cols[3:]):
+            data.codes[name], data.labels[name] = _factorize([
+                str(v) if v is not None else None for v in column
+            ])
+
+        c_cols = list(zip(*courses)) or [()] * 7
+        data.course_ids = list(c_cols[1])
+        data.course_names = list(c_cols[2])
+        data.teacher_ids = list(c_cols[3])
+        data.teacher_names = list(c_cols[4])
+        data.teacher_name_of = dict(zip(data.teacher_ids, data.teacher_names))
+        data.course_credits = np.array(c_cols[5], dtype=SCORE_DTYPE)
+        for name, column in (('course_name', c_cols[2]), ('teacher_id', c_cols[3]),
+                             ('course_semester', c_cols[6])):
+            data.codes[name], data.labels[name] = _factorize(column)
+
+        g_cols = list(zip(*grades)) or [()] * 6
+        student_index = _rowid_index(np.array(s_cols[0], dtype=np.int64))
+        course_index = _rowid_index(np.array(c_cols[0], dtype=np.int64))
+        data.student_idx = student_index[np.array(g_cols[0], dtype=np.int64)]
+        data.course_idx = course_index[np.array(g_cols[1], dtype=np.int64)]
+        data.codes['semester'], data.labels['semester'] = _factorize(g_cols[2])
+        for field, column in zip(SCORE_FIELDS, g_cols[3:]):
+            # NULL 转为 NaN，统计时排除
+            data.scores[field] = np.array(column, dtype=np.float64).astype(SCORE_DTYPE)
+        data.credits = data.course_credits[data.course_idx]
+        data.add_identity_codes()
+        return data
+
+    def add_identity_codes(self):
+        """student_id / course_id 维度：编码即下标"""
+        self.codes['student_id'] = np.arange(len(self.student_ids), dtype=INDEX_DTYPE)
+        self.labels['student_id'] = self.student_ids
+        self.codes['course_id'] = np.arange(len(self.course_ids), dtype=INDEX_DTYPE)
+        self.labels['course_id'] = self.course_ids
+
+    def score_values(self, field, selection):
+        """取出部分成绩的分数（float64）
+
+        float32 只有约 7 位有效数字，四舍五入到 4 位小数后两位小数的成绩可以精确还原，
+        平均分等结果按两位小数截断显示时不会因误差少 0.01
+        """
+        return np.round(self.scores[field][selection].astype(np.float64), 4)
+
+    def row_codes(self, dimension):
+        """维度在每条成绩上的编码数组"""
+        table = DIMENSIONS[dimension][0]
+        codes = self.codes[dimension]
+        if table == 'student':
+            return codes[self.student_idx]
+        if table == 'course':
+            return codes[self.course_idx]
+        return codes
+
+    def code_of(self, dimension, value):
+        """维度取值对应的编码，不存在时返回 None"""
+        lookup = self._lookups.get(dimension)
+        if lookup is None:
+            lookup = {label: code for code, label in enumerate(self.labels[dimension])}
+            self._lookups[dimension] = lookup
+        return lookup.get(str(value) if dimension == 'grade' else value)
@@ -0,0 +1,379 @@
+"""
+成绩分析引擎
+把全部成绩加载为列式数组后缓存在内存中，班级/专业/课程/教师等各种分组统计、
+排名、分位数和成绩分布都在数组上完成；数据库有写入时自动重新加载
+"""
+import os
+import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
+
+import numpy as np
+
+from .columns import DIMENSIONS, SCORE_FIELDS, GradeColumns
+from .snapshot import current_version, default_snapshot_dir, open_snapshot
+from . import stats
+
+
+METRICS = ('count', 'avg_score', 'fail_rate', 'excellent_rate', 'good_rate',
+           'min_score', 'max_score', 'credit_sum', 'weighted_avg')
+
+
+def _clean(value):
+    """NumPy 标量 -> Python 值，NaN -> None（便于序列化和界面显示）"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        value = float(value)
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class GradeAnalytics:
+    """成绩分析（线程安全）
+
+    筛选条件均为关键字参数，取值为 None、空串或“全部”时表示不筛选：
+    grade, major, class_name, semester（成绩学期）, course_semester（课程学期）,
+    course_id, course_name, teacher_id, student_id
+    """
+
+    def __init__(self, db, min_reload_interval=5.0, snapshot_dir=None):
+        self.db = db
+        # 两次重新加载的最小间隔（秒），集中录入成绩时不会频繁重建
+        self.min_reload_interval = min_reload_interval
+        # 设置后从列式快照（内存映射）读取，见 analytics/snapshot.py
+        self.snapshot_dir = snapshot_dir
+        self._data = None
+        self._loaded_at = 0.0
+        self._data_version = None
+        self._version_conn = None
+        self._lock = threading.Lock()
+        # 与列式数据绑定的计算结果缓存（数据重新加载后失效），见 semester_averages
+        self._memo_source = None
+        self._memo = {}
+
+    # ==================== 数据加载 ====================
+
+    def _readonly_uri(self):
+        return 'file:' + pathname2url(os.path.abspath(self.db.db_path)) + '?mode=ro'
+
+    def _current_version(self):
+        """PRAGMA data_version：其他连接提交写入后会变化（包括本进程的写连接）"""
+        if self._version_conn is None:
+            self._version_conn = sqlite3.connect(self._readonly_uri(), uri=True,
+                                                 check_same_thread=False)
+        return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    @property
+    def data(self):
+        """当前的列式数据，数据库（或快照）有变化时重新加载"""
+        with self._lock:
+            now = time.monotonic()
+            if self._data is None or now - self._loaded_at >= self.min_reload_interval:
+                if not self._reload_snapshot():
+                    self._reload_database()
+                self._loaded_at = now
+            return self._data
+
+    def _reload_snapshot(self):
+        """快照有新版本时重新映射；未使用快照或快照不可用时返回 False"""
+        if not self.snapshot_dir:
+            return False
+        version = current_version(self.snapshot_dir)
+        if not version:
+            return False
+        if self._data is None or version != self._data_version:
+            try:
+                self._data = open_snapshot(self.snapshot_dir, version)
+            except (OSError, ValueError) as e:
+                print(f"打开列式快照失败: {e}")
+                return False
+            self._data_version = version
+        return True
+
+    def _reload_database(self):
+        pool = self.db.read_pool
+        if pool.snapshot_path:
+            # 读连接读取的是只读快照，数据只在快照刷新时变化；
+            # 主数据库的 data_version 先于快照变化，不能作为缓存键
+            version = ('snapshot', pool.generation)
+        else:
+            try:
+                version = self._current_version()
+            except sqlite3.Error:
+                version = None
+        if self._data is None or version is None or version != self._data_version:
+            with self.db.get_read_connection() as conn:
+                self._data = GradeColumns.load(conn)
+            if pool.snapshot_path:
+                # 数据的新旧以快照复制的时间为准
+                self._data.loaded_at = pool.refreshed_at
+            self._data_version = version
+
+    def load_latest(self):
+        """直接从数据库文件读取最新的列式数据（不经过快照，也不受 min_reload_interval 限制）
+
+        课程学分等影响全部学生的修改之后整体重建时使用；返回的数据不替换共享的缓存
+        """
+        conn = sqlite3.connect(self._readonly_uri(), uri=True)
+        try:
+            return GradeColumns.load(conn)
+        finally:
+            conn.close()
+
+    def use_snapshot(self, snapshot_dir=None):
+        """改为读取列式快照（由 SnapshotScheduler 或 python -m analytics 生成）"""
+        with self._lock:
+            self.snapshot_dir = snapshot_dir or default_snapshot_dir(self.db.db_path)
+            self._data = None
+
+    def invalidate(self):
+        """下次访问时强制重新加载"""
+        with self._lock:
+            self._data = None
+
+    # ==================== 筛选与分组 ====================
+
+    def _mask(self, data, filters):
+        mask = np.ones(len(data), dtype=bool)
+        for name, value in filters.items():
+            if value is None or value == '' or value == '全部':
+                continue
+            if name not in DIMENSIONS:
+                raise ValueError(f'未知的筛选条件: {name}')
+            code = data.code_of(name, value)
+            if code is None:
+                return np.zeros(len(data), dtype=bool)
+            mask &= data.row_codes(name) == code
+        return mask
+
+    def _grouped(self, data, by, mask):
+        """按维度分组，返回 (分组编码, 分组数, 各组的维度编码)；忽略维度取值为空的成绩"""
+        code_arrays = [data.row_codes(name)[mask] for name in by]
+        keep = np.ones(int(mask.sum()), dtype=bool)
+        for codes in code_arrays:
+            keep &= codes >= 0
+        code_arrays = [codes[keep] for codes in code_arrays]
+        if not code_arrays:
+            groups = np.zeros(int(keep.sum()), dtype=np.int64)
+            return groups, 1, np.zeros((1, 0), dtype=np.int64), keep
+        groups, keys = stats.group_keys(code_arrays)
+        return groups, len(keys), keys, keep
+
+    def _key_dicts(self, data, by, keys):
+        """各组的维度取值；按教师或学生分组时附带姓名（teacher_name / name）"""
+        result = []
+        for row in keys.tolist():
+            key = {name: data.labels[name][code] for name, code in zip(by, row)}
+            if 'teacher_id' in key:
+                key['teacher_name'] = data.teacher_name_of.get(key['teacher_id'])
+            if 'student_id' in key:
+                key['name'] = data.student_names[data.code_of('student_id', key['student_id'])]
+            result.append(key)
+        return result
+
+    # ==================== 统计 ====================
+
+    def group_stats(self, by=(), field='final_score', **filters):
+        """按 by 中的维度分组统计
+
+        返回字典列表，每项包含分组维度取值，以及 count（成绩条数）、student_count（学生数）、
+        avg_score、fail_rate、excellent_rate、good_rate、min_score、max_score、
+        credit_sum、weighted_avg（学分加权平均）；by 为空时返回一项（整体统计）
+        """
+        return self._group_stats(self.data, tuple(by), field, filters)
+
+    def _group_stats(self, data, by, field, filters):
+        if field not in SCORE_FIELDS:
+            raise ValueError(f'未知的成绩字段: {field}')
+        mask = self._mask(data, filters)
+        groups, n_groups, keys, keep = self._grouped(data, by, mask)
+
+        selection = np.flatnonzero(mask)[keep]
+        scores = data.score_values(field, selection)
+        credits = data.credits[selection].astype(np.float64)
+        summary = stats.group_summary(groups, n_groups, scores, credits)
+        has_score = ~np.isnan(scores)
+        summary['student_count'] = stats.distinct_count(
+            groups[has_score], n_groups, data.student_idx[selection][has_score]
+        )
+
+        result = []
+        for i, key in enumerate(self._key_dicts(data, by, keys)):
+            if not summary['count'][i]:
+                continue
+            for name in METRICS + ('student_count',):
+                key[name] = _clean(summary[name][i])
+            result.append(key)
+        return result
+
+    def percentiles(self, by=(), quantiles=(0.25, 0.5, 0.75), field='final_score', **filters):
+        """按维度分组的成绩分位数，每项的 'percentiles' 与 quantiles 一一对应"""
+        by = tuple(by)
+        data = self.data
+        mask = self._mask(data, filters)
+        groups, n_groups, keys, keep = self._grouped(data, by, mask)
+        selection = np.flatnonzero(mask)[keep]
+        values = stats.group_percentiles(groups, n_groups, data.score_values(field, selection),
+                                         quantiles)
+
+        result = []
+        for i, key in enumerate(self._key_dicts(data, by, keys)):
+            if np.isnan(values[i]).all():
+                continue
+            key['percentiles'] = [_clean(v) for v in values[i]]
+            result.append(key)
+        return result
+
+    def box_summary(self, by=(), field='final_score', max_fliers=50, **filters):
+        """按维度分组的箱线图摘要，每项含 whislo、q1、med、q3、whishi 和 fliers
+
+        须线与 matplotlib 箱线图相同（距四分位数 1.5 倍四分位距以内的最小值、最大值）；
+        fliers 为须线以外的离群值，每组最多 max_fliers 个（见 stats.group_fliers），
+        图表绘制开销与成绩条数无关（可直接传给 Axes.bxp）
+        """
+        by = tuple(by)
+        data = self.data
+        mask = self._mask(data, filters)
+        groups, n_groups, keys, keep = self._grouped(data, by, mask)
+        selection = np.flatnonzero(mask)[keep]
+        scores = data.score_values(field, selection)
+        quartiles = stats.group_percentiles(groups, n_groups, scores, (0.25, 0.5, 0.75))
+        whislo, whishi = stats.group_whiskers(groups, n_groups, scores,
+                                              quartiles[:, 0], quartiles[:, 2])
+        fliers = stats.group_fliers(groups, n_groups, scores, whislo, whishi, max_fliers)
+
+        result = []
+        for i, key in enumerate(self._key_dicts(data, by, keys)):
+            if np.isnan(quartiles[i]).all():
+                continue
+            q1, med, q3 = quartiles[i]
+            key.update(whislo=_clean(whislo[i]), q1=_clean(q1), med=_clean(med),
+                       q3=_clean(q3), whishi=_clean(whishi[i]), fliers=fliers[i].tolist())
+            result.append(key)
+        return result
+
+    def distribution(self, by=(), bins=None, field='final_score', **filters):
+        """按维度分组的成绩分布，每项的 'counts' 为各分数段人数，'bins' 为分段边界"""
+        by = tuple(by)
+        bins = stats.DEFAULT_BINS if bins is None else np.asarray(bins)
+        data = self.data
+        mask = self._mask(data, filters)
+        groups, n_groups, keys, keep = self._grouped(data, by, mask)
+        selection = np.flatnonzero(mask)[keep]
+        counts = stats.group_histogram(groups, n_groups, data.score_values(field, selection), bins)
+
+        result = []
+        for i, key in enumerate(self._key_dicts(data, by, keys)):
+            if not counts[i].any():
+                continue
+            key['bins'] = [_clean(b) for b in bins]
+            key['counts'] = counts[i].tolist()
+            result.append(key)
+        return result
+
+    def ranking(self, field='final_score', **filters):
+        """学生学分加权平均成绩排名（降序），每项含 rank, student_id, name, class_name, avg_score, credit_sum"""
+        data = self.data
+        rows = self._group_stats(data, ('student_id',), field, filters)
+        rows = [row for row in rows if row['credit_sum']]
+        rows.sort(key=lambda row: -row['weighted_avg'])
+        class_labels = data.labels['class_name']
+        result = []
+        for rank, row in enumerate(rows, start=1):
+            class_code = data.codes['class_name'][data.code_of('student_id', row['student_id'])]
+            result.append({
+                'rank': rank,
+                'student_id': row['student_id'],
+                'name': row['name'],
+                'class_name': class_labels[class_code] if class_code >= 0 else None,
+                'avg_score': row['weighted_avg'],
+                'credit_sum': row['credit_sum'],
+            })
+        return result
+
+    def semester_trend(self, metric='avg_score', series_by=None, semester_field='course_semester',
+                       field='final_score', **filters):
+        """各学期的指标变化
+
+        返回 (学期列表, {系列名: {学期: 值}})；series_by 为空时只有一个系列“平均”，
+        否则按该维度（如 major、class_name）分为多个系列
+        """
+        by = (semester_field,) if not series_by else (semester_field, series_by)
+        rows = self.group_stats(by=by, field=field, **filters)
+        series = {}
+        semesters = set()
+        for row in rows:
+            semester = row[semester_field]
+            semesters.add(semester)
+            label = '平均' if not series_by else str(row[series_by])
+            series.setdefault(label, {})[semester] = row[metric]
+        return sorted(semesters), series
+
+    def semester_averages(self, scope):
+        """全部专业（scope='major'）或班级（scope='class'）各学期的平均分（总评成绩，不加权）
+
+        返回 {专业: [{'semester', 'avg_score'}, ...]} 或 {(专业, 班级): [...]}，学期升序。
+        同专业/班级的学生共用同一份结果，一次分组计算出全部专业/班级，数据重新加载前不再计算
+        """
+        return self._semester_averages(self.data, scope)
+
+    def _semester_averages(self, data, scope):
+        if scope not in ('major', 'class'):
+            raise ValueError(f'未知的平均分范围: {scope}')
+        with self._lock:
+            if self._memo_source is not data:
+                self._memo_source = data
+                self._memo = {}
+            cached = self._memo.get(('semester_averages', scope))
+        if cached is not None:
+            return cached
+
+        by = ('semester', 'major') if scope == 'major' else ('semester', 'major', 'class_name')
+        result = {}
+        for row in sorted(self._group_stats(data, by, 'final_score', {}),
+                          key=lambda row: row['semester']):
+            key = row['major'] if scope == 'major' else (row['major'], row['class_name'])
+            result.setdefault(key, []).append(
+                {'semester': row['semester'], 'avg_score': row['avg_score']}
+            )
+        with self._lock:
+            if self._memo_source is data:
+                self._memo[('semester_averages', scope)] = result
+        return result
+
+    def student_semester_trend(self, student_id, major, class_name):
+        """学生本人及其专业、班级各学期的平均分（总评成绩），三条曲线取自同一份列式数据
+
+        返回 {'student': [...], 'major': [...], 'class': [...]}，每项为 {'semester', 'avg_score'}，学期升序
+        """
+        data = self.data
+        rows = sorted(self._group_stats(data, ('semester',), 'final_score',
+                                        {'student_id': student_id}),
+                      key=lambda row: row['semester'])
+        return {
+            'student': [{'semester': row['semester'], 'avg_score': row['avg_score']}
+                        for row in rows],
+            'major': list(self._semester_averages(data, 'major').get(major, [])),
+            'class': list(self._semester_averages(data, 'class').get((major, class_name), [])),
+        }
+
+
+# db_path -> GradeAnalytics，同一数据库共用一份缓存
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_analytics(db=None):
+    """取得数据库对应的分析引擎（默认使用 DatabaseManager 单例）"""
+    if db is None:
+        from database.db_manager import DatabaseManager
+        db = DatabaseManager()
+    with _engines_lock:
+        engine = _engines.get(db.db_path)
+        if engine is None:
+            engine = GradeAnalytics(db)
+            _engines[db.db_path] = engine
+        return engine
@@ -0,0 +1,395 @@
+"""
+成绩排名服务
+预先计算每个学生各学期及累计的学分加权平均分和绩点，按“年级+专业”“年级+专业+班级”
+两种范围建立有序排名表；查询某个学生的名次用二分查找（O(log n)），取前 N 名直接切片。
+成绩变化时只重新计算相关学生并更新其所在的排名表，不必整体重排
+"""
+import bisect
+import threading
+import time
+
+import numpy as np
+
+from .engine import get_analytics
+
+
+# 百分制 -> 4.0 绩点：各档下限及对应绩点（低于 60 分为 0）
+GPA_THRESHOLDS = np.array([60, 64, 68, 72, 75, 78, 82, 85, 90], dtype=np.float64)
+GPA_POINTS = np.array([0.0, 1.0, 1.5, 2.0, 2.3, 2.7, 3.0, 3.3, 3.7, 4.0])
+
+METRICS = ('weighted_avg', 'gpa')
+SCOPES = ('major', 'class')
+# 累计（全部学期）在排名表键中的表示
+ALL_TERMS = None
+
+# 比任何学号都大的字符串，用于二分查找同分学生的右边界
+_MAX_ID = '\U0010ffff'
+
+
+def score_to_gpa(scores):
+    """百分制成绩（数组）-> 绩点"""
+    return GPA_POINTS[np.searchsorted(GPA_THRESHOLDS, scores, side='right')]
+
+
+class RankTable:
+    """一个范围内的有序排名表：按指标降序、学号升序"""
+
+    def __init__(self):
+        self.keys = []    # [(-指标值, 学号), ...]，保持有序
+        self.values = {}  # 学号 -> 指标值
+
+    def __len__(self):
+        return len(self.keys)
+
+    def build(self, items):
+        """items: [(学号, 指标值), ...]"""
+        self.values = dict(items)
+        self.keys = sorted((-value, sid) for sid, value in self.values.items())
+
+    def set(self, student_id, value):
+        self.remove(student_id)
+        self.values[student_id] = value
+        bisect.insort(self.keys, (-value, student_id))
+
+    def remove(self, student_id):
+        value = self.values.pop(student_id, None)
+        if value is not None:
+            index = bisect.bisect_left(self.keys, (-value, student_id))
+            del self.keys[index]
+
+    def rank(self, student_id):
+        """(名次, 排在其后的人数)；同分同名次，不在表中返回 None"""
+        value = self.values.get(student_id)
+        if value is None:
+            return None
+        higher = bisect.bisect_left(self.keys, (-value,))
+        not_lower = bisect.bisect_right(self.keys, (-value, _MAX_ID))
+        return higher + 1, len(self.keys) - not_lower
+
+    def top(self, n=None):
+        """前 n 名 [(名次, 学号, 指标值), ...]"""
+        keys = self.keys if n is None else self.keys[:n]
+        result = []
+        rank = 0
+        previous = None
+        for position, (negative, sid) in enumerate(keys, start=1):
+            if negative != previous:
+                rank = position
+                previous = negative
+            result.append((rank, sid, -negative))
+        return result
+
+
+class RankingService:
+    """排名服务（线程安全）
+
+    成绩通过 DatabaseManager 写入时自动增量更新；其他进程写入的成绩在
+    rebuild_interval 秒后访问时整体重建
+    """
+
+    def __init__(self, db, rebuild_interval=300):
+        self.db = db
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._source = None   # 构建排名表所用的列式数据
+        self._stale = False   # 范围未知的修改之后需按数据库最新数据重建
+        # 学号 -> 最近一次增量更新的时间（time.time()），按较旧的列式数据重建后需重新应用
+        self._updated = {}
+        # 学号 -> {'name', 'grade', 'major', 'class_name', 'terms': {学期: [学分, 加权分, 学分绩点]}}
+        self._students = {}
+        # (范围, 范围取值, 学期, 指标) -> RankTable
+        self._tables = {}
+        db.add_grade_listener(self.on_grades_changed)
+
+    # ==================== 构建 ====================
+
+    def _ensure_built(self):
+        """首次访问时构建；之后每 rebuild_interval 秒检查一次列式数据是否已重新加载"""
+        if self._stale:
+            # 共享的列式数据有重新加载间隔（也可能来自快照），直接读取最新数据
+            self._stale = False
+            self.rebuild(get_analytics(self.db).load_latest())
+            self._built_at = time.monotonic()
+            return
+        if self._built_at is not None and time.monotonic() - self._built_at < self.rebuild_interval:
+            return
+        data = get_analytics(self.db).data
+        if data is not self._source:
+            self.rebuild(data)
+        self._built_at = time.monotonic()
+
+    def rebuild(self, data=None):
+        """由成绩列式数据整体计算全部学生的学期汇总并重建排名表"""
+        with self._lock:
+            data = data if data is not None else get_analytics(self.db).data
+            self._source = data
+            scores = data.score_values('final_score', slice(None))
+            valid = ~np.isnan(scores)
+            students = data.student_idx[valid]
+            semesters = data.codes['semester'][valid]
+            credits = data.credits[valid].astype(np.float64)
+            scores = scores[valid]
+            keep = semesters >= 0
+            students, semesters, credits, scores = (
+                students[keep], semesters[keep], credits[keep], scores[keep]
+            )
+
+            # (学生, 学期) 分组求和
+            n_terms = max(1, len(data.labels['semester']))
+            pair = students.astype(np.int64) * n_terms + semesters
+            pairs, inverse = np.unique(pair, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            credit_sum = np.bincount(inverse, weights=credits, minlength=len(pairs))
+            weighted_sum = np.bincount(inverse, weights=scores * credits, minlength=len(pairs))
+            gpa_sum = np.bincount(inverse, weights=score_to_gpa(scores) * credits,
+                                  minlength=len(pairs))
+
+            self._students = {}
+            semester_labels = data.labels['semester']
+            codes = data.codes
+            labels = data.labels
+            for p, c, w, g in zip(pairs.tolist(), credit_sum.tolist(),
+                                  weighted_sum.tolist(), gpa_sum.tolist()):
+                student, term = divmod(p, n_terms)
+                sid = data.student_ids[student]
+                info = self._students.get(sid)
+                if info is None:
+                    info = {
+                        'name': data.student_names[student],
+                        'grade': self._label(labels, codes, 'grade', student),
+                        'major': self._label(labels, codes, 'major', student),
+                        'class_name': self._label(labels, codes, 'class_name', student),
+                        'terms': {},
+                    }
+                    self._students[sid] = info
+                info['terms'][semester_labels[term]] = [c, w, g]
+
+            grouped = {}
+            for sid, info in self._students.items():
+                for key, value in self._table_entries(sid, info):
+                    grouped.setdefault(key, []).append((sid, value))
+            self._tables = {}
+            for key, items in grouped.items():
+                table = RankTable()
+                table.build(items)
+                self._tables[key] = table
+
+            # 列式数据读取之后才写入的成绩不在其中，按数据库重新计算这些学生
+            recent = [sid for sid, at in self._updated.items() if at >= data.loaded_at]
+            self._updated = {sid: self._updated[sid] for sid in recent}
+            for sid in recent:
+                self._update_student(sid)
+
+    @staticmethod
+    def _label(labels, codes, dimension, student):
+        code = codes[dimension][student]
+        return labels[dimension][code] if code >= 0 else None
+
+    @staticmethod
+    def _summaries(info):
+        """学期及累计汇总：{学期或 ALL_TERMS: (学分, 加权平均, 绩点)}"""
+        result = {}
+        total = [0.0, 0.0, 0.0]
+        for semester, (c, w, g) in info['terms'].items():
+            if c > 0:
+                result[semester] = (c, w / c, g / c)
+            total[0] += c
+            total[1] += w
+            total[2] += g
+        if total[0] > 0:
+            result[ALL_TERMS] = (total[0], total[1] / total[0], total[2] / total[0])
+        return result
+
+    @staticmethod
+    def _scope_values(info):
+        if not info['grade'] or not info['major']:
+            return {}
+        scopes = {'major': (info['grade'], info['major'])}
+        if info['class_name']:
+            scopes['class'] = (info['grade'], info['major'], info['class_name'])
+        return scopes
+
+    def _table_entries(self, sid, info):
+        """学生应出现在哪些排名表中及对应的指标值"""
+        summaries = self._summaries(info)
+        for scope, scope_value in self._scope_values(info).items():
+            for semester, (credit_sum, weighted_avg, gpa) in summaries.items():
+                yield (scope, scope_value, semester, 'weighted_avg'), weighted_avg
+                yield (scope, scope_value, semester, 'gpa'), gpa
+
+    # ==================== 增量更新 ====================
+
+    def on_grades_changed(self, student_ids=None):
+        """成绩或学生信息变化后调用；student_ids 为 None 表示范围未知，下次访问时整体重建"""
+        with self._lock:
+            if student_ids is not None:
+                now = time.time()
+                for sid in student_ids:
+                    self._updated[sid] = now
+            if self._built_at is None or self._stale:
+                return
+            if student_ids is None:
+                self._stale = True
+                return
+            for sid in student_ids:
+                self._update_student(sid)
+
+    def _update_student(self, sid):
+        old = self._students.pop(sid, None)
+        if old is not None:
+            for key, _ in self._table_entries(sid, old):
+                table = self._tables.get(key)
+                if table is not None:
+                    table.remove(sid)
+
+        info = self._load_student(sid)
+        if info is None:
+            return
+        self._students[sid] = info
+        for key, value in self._table_entries(sid, info):
+            table = self._tables.get(key)
+            if table is None:
+                table = self._tables[key] = RankTable()
+            table.set(sid, value)
+
+    def _load_student(self, sid):
+        """从数据库读取单个学生的成绩并汇总"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT name, grade, major, class_name FROM students WHERE student_id = ?',
+                (sid,),
+            )
+            student = cursor.fetchone()
+            if student is None:
+                return None
+            cursor.execute('''
+                SELECT g.semester, c.credits, g.final_score
+                FROM grades g
+                JOIN courses c ON g.course_id = c.course_id
+                WHERE g.student_id = ? AND g.final_score IS NOT NULL
+                  AND g.semester IS NOT NULL AND g.semester <> ''
+            ''', (sid,))
+            rows = cursor.fetchall()
+
+        info = {
+            'name': student[0],
+            'grade': str(student[1]) if student[1] not in (None, '') else None,
+            'major': student[2] or None,
+            'class_name': student[3] or None,
+            'terms': {},
+        }
+        if rows:
+            scores = np.array([r[2] for r in rows], dtype=np.float64)
+            gpas = score_to_gpa(scores).tolist()
+            for (semester, credits, score), gpa in zip(rows, gpas):
+                term = info['terms'].setdefault(semester, [0.0, 0.0, 0.0])
+                term[0] += credits
+                term[1] += score * credits
+                term[2] += gpa * credits
+        return info
+
+    # ==================== 查询 ====================
+
+    def rank_of(self, student_id, scope='major', semester=None, metric='weighted_avg'):
+        """学生在专业（scope='major'）或班级（scope='class'）中的名次
+
+        semester 为空表示累计；返回 {'rank', 'total', 'value', 'percentile'}，
+        percentile 为成绩低于该生的人数占比（%），无成绩时返回 None
+        """
+        if scope not in SCOPES or metric not in METRICS:
+            raise ValueError(f'未知的排名范围或指标: {scope}, {metric}')
+        with self._lock:
+            self._ensure_built()
+            info = self._students.get(student_id)
+            if info is None:
+                return None
+            scope_value = self._scope_values(info).get(scope)
+            table = self._tables.get((scope, scope_value, semester or ALL_TERMS, metric))
+            position = table.rank(student_id) if table else None
+            if position is None:
+                return None
+            rank, lower = position
+            return {
+                'rank': rank,
+                'total': len(table),
+                'value': table.values[student_id],
+                'percentile': lower * 100.0 / len(table),
+            }
+
+    def top(self, grade, major, class_name=None, semester=None, metric='weighted_avg', n=None):
+        """专业（或指定班级）前 n 名（n 为空表示全部）
+
+        每项含 rank, student_id, name, class_name, avg_score（学分加权平均）, gpa, credit_sum
+        """
+        if metric not in METRICS:
+            raise ValueError(f'未知的排名指标: {metric}')
+        if class_name and class_name != '全部':
+            key = ('class', (str(grade), major, class_name))
+        else:
+            key = ('major', (str(grade), major))
+        semester = semester if semester and semester != '全部' else ALL_TERMS
+        with self._lock:
+            self._ensure_built()
+            table = self._tables.get(key + (semester, metric))
+            if table is None:
+                return []
+            result = []
+            for rank, sid, _ in table.top(n):
+                info = self._students[sid]
+                credit_sum, weighted_avg, gpa = self._summaries(info)[semester]
+                result.append({
+                    'rank': rank,
+                    'student_id': sid,
+                    'name': info['name'],
+                    'class_name': info['class_name'],
+                    'avg_score': weighted_avg,
+                    'gpa': gpa,
+                    'credit_sum': credit_sum,
+                })
+            return result
+
+    def student_summary(self, student_id):
+        """学生各学期及累计的加权平均分、绩点和专业/班级名次"""
+        with self._lock:
+            self._ensure_built()
+            info = self._students.get(student_id)
+            if info is None:
+                return None
+            terms = []
+            for semester, (credit_sum, weighted_avg, gpa) in sorted(
+                self._summaries(info).items(), key=lambda item: (item[0] is None, item[0] or '')
+            ):
+                terms.append({
+                    'semester': semester,
+                    'credit_sum': credit_sum,
+                    'avg_score': weighted_avg,
+                    'gpa': gpa,
+                    'major_rank': self.rank_of(student_id, 'major', semester),
+                    'class_rank': self.rank_of(student_id, 'class', semester),
+                })
+            return {
+                'student_id': student_id,
+                'name': info['name'],
+                'major': info['major'],
+                'class_name': info['class_name'],
+                'terms': terms,
+            }
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_ranking_service(db=None):
+    """取得数据库对应的排名服务（默认使用 DatabaseManager 单例）"""
+    if db is None:
+        from database.db_manager import DatabaseManager
+        db = DatabaseManager()
+    with _services_lock:
+        service = _services.get(db.db_path)
+        if service is None:
+            service = RankingService(db)
+            _services[db.db_path] = service
+        return service
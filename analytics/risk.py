@@ -0,0 +1,461 @@
+"""
+学业预警
+按学期扫描每个学生的成绩，标记三类学业风险：
+    - 不及格学分：一个学期不及格课程的学分合计达到 FAILED_CREDITS_LINE
+    - 成绩下滑：学期学分加权平均比上一学期下降 DECLINE_LINE 分以上
+    - 持续落后：连续 BELOW_CLASS_STREAK 个学期低于班级平均
+另外把考试成绩为空或 0 分记为缺考，把中途不再有成绩（未满 TERMS_TO_GRADUATE 个学期）记为退学/休学。
+结果保存在 student_risk（每个学生每学期一行，只保存有风险的）和 risk_term_counts（各学期人数）两张表中，
+供预警名单和 show_student_risk_trend 趋势图使用。
+
+成绩通过 DatabaseManager 写入时只重新计算涉及的班级（班级平均变化会影响同班同学的“持续落后”），
+其他进程写入的成绩在 rescan_interval 秒后访问时整体重新扫描
+"""
+import threading
+import time
+
+import numpy as np
+
+from .engine import get_analytics
+from .stats import FAIL_LINE
+
+
+FAILED_CREDITS_LINE = 4.0
+DECLINE_LINE = 10.0
+BELOW_CLASS_STREAK = 2
+TERMS_TO_GRADUATE = 8
+
+# 风险标记 -> 显示名称
+FLAG_LABELS = {
+    'failed_credits': '不及格学分',
+    'declining': '成绩下滑',
+    'below_class': '持续落后',
+    'absence': '缺考',
+    'dropout': '退学/休学',
+}
+WARN_FLAGS = ('failed_credits', 'declining', 'below_class')
+
+RISK_LEVELS = {1: '关注', 2: '预警'}
+
+_INSERT_RISK = '''
+    INSERT INTO student_risk (
+        student_id, semester, term_avg, class_avg, failed_credits, score_drop,
+        below_streak, absent_count, flags, risk_level, warn, absence, dropout
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# 单条 SQL 中 IN (...) 的参数个数上限
+_CHUNK = 500
+
+
+def _chunks(items):
+    items = list(items)
+    for start in range(0, len(items), _CHUNK):
+        yield items[start:start + _CHUNK]
+
+
+def assess_student(student_id, terms, all_terms, class_avgs):
+    """评估一个学生各学期的风险
+
+    terms: {学期: (学分, 加权总分, 不及格学分, 缺考门数)}；all_terms: 全部学期（升序）；
+    class_avgs: {学期: 班级平均}。返回有风险的学期，每项为 student_risk 的一行
+    """
+    rows = []
+    previous_avg = None
+    streak = 0
+    started = False
+    remaining = len(terms)
+    for index, semester in enumerate(all_terms):
+        term = terms.get(semester)
+        if term is None:
+            # 已有成绩、之后再无成绩且未到毕业学期数；最后一个学期可能尚未录完，不判断
+            if (started and remaining == 0 and len(terms) < TERMS_TO_GRADUATE
+                    and index < len(all_terms) - 1):
+                rows.append((student_id, semester, None, None, 0.0, None, 0, 0,
+                             'dropout', 2, 0, 0, 1))
+                break
+            continue
+        started = True
+        remaining -= 1
+        credits, weighted, failed_credits, absent_count = term
+        term_avg = weighted / credits if credits else None
+        class_avg = class_avgs.get(semester)
+
+        flags = []
+        if failed_credits >= FAILED_CREDITS_LINE:
+            flags.append('failed_credits')
+        score_drop = None
+        if term_avg is not None and previous_avg is not None:
+            score_drop = previous_avg - term_avg
+            if score_drop >= DECLINE_LINE:
+                flags.append('declining')
+        if term_avg is not None and class_avg is not None and term_avg < class_avg:
+            streak += 1
+        else:
+            streak = 0
+        if streak >= BELOW_CLASS_STREAK:
+            flags.append('below_class')
+        if absent_count:
+            flags.append('absence')
+        if term_avg is not None:
+            previous_avg = term_avg
+        if not flags:
+            continue
+
+        warn = int(any(flag in WARN_FLAGS for flag in flags))
+        severe = len(flags) >= 2 or failed_credits >= 2 * FAILED_CREDITS_LINE
+        rows.append((
+            student_id, semester, term_avg, class_avg, failed_credits, score_drop,
+            streak, absent_count, ','.join(flags), 2 if severe else 1,
+            warn, int(absent_count > 0), 0,
+        ))
+    return rows
+
+
+def assess_students(students, all_terms):
+    """students: {学号: (班级键, {学期: (...)})}，同一班级的学生须全部给出（用于计算班级平均）"""
+    # 班级平均：班内各学生学期加权平均的平均值
+    class_sums = {}
+    for class_key, terms in students.values():
+        if class_key is None:
+            continue
+        for semester, (credits, weighted, _, _) in terms.items():
+            if credits:
+                total = class_sums.setdefault((class_key, semester), [0.0, 0])
+                total[0] += weighted / credits
+                total[1] += 1
+    class_avgs = {}
+    for (class_key, semester), (total, count) in class_sums.items():
+        class_avgs.setdefault(class_key, {})[semester] = total / count
+
+    rows = []
+    for sid, (class_key, terms) in students.items():
+        rows.extend(assess_student(sid, terms, all_terms, class_avgs.get(class_key, {})))
+    return rows
+
+
+class RiskEngine:
+    """学业预警（线程安全）"""
+
+    def __init__(self, db, rescan_interval=300):
+        self.db = db
+        self.rescan_interval = rescan_interval
+        self._lock = threading.RLock()
+        self._checked_at = None
+        self._source = None   # 上次整体扫描所用的列式数据
+        self._stale = False   # 范围未知的修改之后需按数据库最新数据重新扫描
+        self._pending = set()  # 成绩有变化、尚未重新计算的学号
+        db.add_grade_listener(self.on_grades_changed)
+
+    # ==================== 整体扫描 ====================
+
+    def scan(self, data=None):
+        """由成绩列式数据计算全部学生的风险并重写两张表，返回有风险的学生学期数"""
+        with self._lock:
+            data = data if data is not None else get_analytics(self.db).data
+            started = time.perf_counter()
+            students, all_terms = self._collect(data)
+            rows = assess_students(students, all_terms)
+            # 列式数据可能比数据库晚几秒，_pending 保留到 refresh 时按数据库重新计算
+            self._source = data
+            with self.db.get_connection() as conn:
+                # 多进程模式下各工作进程各自扫描：加写锁后确认表中结果不比本次数据新
+                conn.execute('BEGIN IMMEDIATE')
+                stored = self._stored_loaded_at(conn)
+                if stored is not None and stored > data.loaded_at:
+                    conn.rollback()
+                    print("学业预警扫描跳过: 已有依据更新数据的结果")
+                    return None
+                conn.execute('DELETE FROM student_risk')
+                conn.executemany(_INSERT_RISK, rows)
+                self._store_counts(conn, all_terms)
+                self._store_loaded_at(conn, data.loaded_at)
+                conn.commit()
+            print(f"学业预警扫描完成: {len(students)} 名学生，{len(rows)} 条预警，"
+                  f"耗时 {time.perf_counter() - started:.2f}秒")
+            return len(rows)
+
+    @staticmethod
+    def _stored_loaded_at(conn):
+        row = conn.execute('SELECT data_loaded_at FROM risk_scan WHERE id = 1').fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _store_loaded_at(conn, loaded_at):
+        conn.execute('''
+            INSERT INTO risk_scan (id, data_loaded_at) VALUES (1, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                data_loaded_at = MAX(data_loaded_at, excluded.data_loaded_at),
+                updated_at = CURRENT_TIMESTAMP
+        ''', (loaded_at,))
+
+    @staticmethod
+    def _collect(data):
+        """列式数据 -> ({学号: (班级键, {学期: (学分, 加权总分, 不及格学分, 缺考门数)})}, 全部学期)"""
+        semesters = data.codes['semester']
+        keep = np.flatnonzero(semesters >= 0)
+        scores = data.score_values('final_score', keep)
+        exams = data.score_values('exam_score', keep)
+        credits = data.credits[keep].astype(np.float64)
+        has_score = ~np.isnan(scores)
+        graded_credits = np.where(has_score, credits, 0.0)
+
+        # (学生, 学期) 分组求和
+        n_terms = max(1, len(data.labels['semester']))
+        pair = data.student_idx[keep].astype(np.int64) * n_terms + semesters[keep]
+        pairs, inverse = np.unique(pair, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        def total(weights):
+            return np.bincount(inverse, weights=weights, minlength=len(pairs)).tolist()
+
+        credit_sum = total(graded_credits)
+        weighted_sum = total(np.where(has_score, scores * credits, 0.0))
+        failed = total(np.where(has_score & (scores < FAIL_LINE), credits, 0.0))
+        absent = total((np.isnan(exams) | (exams == 0)).astype(np.float64))
+
+        labels = data.labels
+        codes = data.codes
+        students = {}
+        for p, c, w, f, a in zip(pairs.tolist(), credit_sum, weighted_sum, failed, absent):
+            student, term = divmod(p, n_terms)
+            sid = data.student_ids[student]
+            entry = students.get(sid)
+            if entry is None:
+                key = tuple(
+                    labels[name][codes[name][student]] if codes[name][student] >= 0 else None
+                    for name in ('grade', 'major', 'class_name')
+                )
+                entry = students[sid] = (key if None not in key else None, {})
+            entry[1][labels['semester'][term]] = (c, w, f, int(a))
+        return students, sorted(labels['semester'])
+
+    # ==================== 增量更新 ====================
+
+    def on_grades_changed(self, student_ids=None):
+        """成绩或学生信息变化后调用；student_ids 为 None 表示范围未知，下次访问时整体扫描"""
+        with self._lock:
+            if student_ids is None:
+                self._stale = True
+                self._pending.clear()
+            elif self._source is not None:
+                self._pending.update(student_ids)
+
+    def refresh(self):
+        """重新计算成绩有变化的学生所在的班级，返回处理的学生数"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            changed = set(self._pending)
+            self._pending.clear()
+            with self.db.get_connection() as conn:
+                # 按数据库当前数据计算，之前读取的列式数据不应再覆盖这些结果
+                loaded_at = time.time()
+                conn.execute('BEGIN IMMEDIATE')
+                all_terms = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT semester FROM grades "
+                    "WHERE semester IS NOT NULL AND semester <> '' ORDER BY semester"
+                ).fetchall()]
+                known = [row[0] for row in conn.execute(
+                    'SELECT semester FROM risk_term_counts ORDER BY semester'
+                ).fetchall()]
+                if all_terms != known:
+                    # 出现新学期（或学期被删除）时所有学生的退学判断都可能改变
+                    conn.rollback()
+                    self._stale = True
+                    return 0
+                students = self._load_students(conn, changed)
+                affected = changed | set(students)
+                for chunk in _chunks(affected):
+                    conn.execute(
+                        f'DELETE FROM student_risk WHERE student_id IN ({",".join("?" * len(chunk))})',
+                        chunk,
+                    )
+                conn.executemany(_INSERT_RISK, assess_students(students, all_terms))
+                self._store_counts(conn, all_terms)
+                self._store_loaded_at(conn, loaded_at)
+                conn.commit()
+            return len(affected)
+
+    @staticmethod
+    def _load_students(conn, student_ids):
+        """从数据库读取学生及其同班同学的学期汇总，格式同 _collect"""
+        classes = set()
+        single = []
+        for chunk in _chunks(student_ids):
+            rows = conn.execute(
+                f'SELECT student_id, grade, major, class_name FROM students '
+                f'WHERE student_id IN ({",".join("?" * len(chunk))})',
+                chunk,
+            ).fetchall()
+            for sid, grade, major, class_name in rows:
+                key = (str(grade) if grade not in (None, '') else None, major or None,
+                       class_name or None)
+                if None in key:
+                    single.append(sid)
+                else:
+                    classes.add(key)
+
+        select = f'''
+            SELECT s.student_id, s.grade, s.major, s.class_name, g.semester,
+                   SUM(CASE WHEN g.final_score IS NOT NULL THEN c.credits ELSE 0 END),
+                   SUM(CASE WHEN g.final_score IS NOT NULL THEN g.final_score * c.credits ELSE 0 END),
+                   SUM(CASE WHEN g.final_score < {FAIL_LINE} THEN c.credits ELSE 0 END),
+                   SUM(CASE WHEN g.exam_score IS NULL OR g.exam_score = 0 THEN 1 ELSE 0 END)
+            FROM students s
+            JOIN grades g ON g.student_id = s.student_id
+            JOIN courses c ON g.course_id = c.course_id
+            WHERE {{}} AND g.semester IS NOT NULL AND g.semester <> ''
+            GROUP BY s.student_id, g.semester
+        '''
+        rows = []
+        for grade, major, class_name in classes:
+            rows.extend(conn.execute(
+                select.format('s.grade = ? AND s.major = ? AND s.class_name = ?'),
+                (grade, major, class_name),
+            ).fetchall())
+        for chunk in _chunks(single):
+            rows.extend(conn.execute(
+                select.format(f's.student_id IN ({",".join("?" * len(chunk))})'), chunk,
+            ).fetchall())
+
+        students = {}
+        for sid, grade, major, class_name, semester, c, w, f, a in rows:
+            key = (str(grade) if grade not in (None, '') else None, major or None,
+                   class_name or None)
+            entry = students.setdefault(sid, (key if None not in key else None, {}))
+            entry[1][semester] = (c or 0.0, w or 0.0, f or 0.0, a or 0)
+        return students
+
+    @staticmethod
+    def _store_counts(conn, all_terms):
+        """按 student_risk 重新统计各学期的预警人数（没有预警的学期也保留一行）"""
+        counts = {
+            row[0]: row[1:] for row in conn.execute(
+                'SELECT semester, SUM(warn), SUM(absence), SUM(dropout) '
+                'FROM student_risk GROUP BY semester'
+            ).fetchall()
+        }
+        conn.execute('DELETE FROM risk_term_counts')
+        conn.executemany(
+            'INSERT INTO risk_term_counts (semester, warn, absence, dropout) VALUES (?, ?, ?, ?)',
+            [(semester,) + tuple(counts.get(semester, (0, 0, 0))) for semester in all_terms],
+        )
+
+    def _ensure_current(self):
+        """首次访问时扫描；之后每 rescan_interval 秒检查一次列式数据是否已重新加载"""
+        now = time.monotonic()
+        if self._stale:
+            # 共享的列式数据有重新加载间隔（也可能来自快照），直接读取最新数据
+            self._stale = False
+            self.scan(get_analytics(self.db).load_latest())
+            self._checked_at = now
+        elif self._checked_at is None or now - self._checked_at >= self.rescan_interval:
+            data = get_analytics(self.db).data
+            if data is not self._source:
+                self.scan(data)
+            self._checked_at = now
+        self.refresh()
+
+    # ==================== 查询 ====================
+    # 两张结果表由 scan/refresh 通过写连接更新；开启只读快照时读连接看到的是旧副本，
+    # 因此查询也走写连接
+
+    def timeline(self):
+        """各学期预警人数，格式与 show_student_risk_trend 一致：[{'term', 'warn', 'absence', 'drop'}, ...]"""
+        with self._lock:
+            self._ensure_current()
+            with self.db.get_connection() as conn:
+                rows = conn.execute(
+                    'SELECT semester, warn, absence, dropout FROM risk_term_counts ORDER BY semester'
+                ).fetchall()
+        return [
+            {'term': semester, 'warn': warn, 'absence': absence, 'drop': dropout}
+            for semester, warn, absence, dropout in rows
+        ]
+
+    def risk_list(self, semester=None, grade=None, major=None, class_name=None,
+                  min_level=1, limit=None):
+        """预警名单（默认最近一个学期），按风险等级、不及格学分降序
+
+        每项含 student_id, name, grade, major, class_name, semester, term_avg, class_avg,
+        failed_credits, score_drop, below_streak, absent_count, flags（显示名称列表）, level
+        """
+        with self._lock:
+            self._ensure_current()
+            with self.db.get_connection() as conn:
+                if not semester or semester == '全部':
+                    row = conn.execute('SELECT MAX(semester) FROM risk_term_counts').fetchone()
+                    semester = row[0] if row else None
+                    if semester is None:
+                        return []
+                conditions = ['r.semester = ?', 'r.risk_level >= ?']
+                params = [semester, min_level]
+                for column, value in (('grade', grade), ('major', major),
+                                      ('class_name', class_name)):
+                    if value not in (None, '', '全部'):
+                        conditions.append(f's.{column} = ?')
+                        params.append(str(value) if column == 'grade' else value)
+                sql = f'''
+                    SELECT r.student_id, s.name, s.grade, s.major, s.class_name, r.semester,
+                           r.term_avg, r.class_avg, r.failed_credits, r.score_drop,
+                           r.below_streak, r.absent_count, r.flags, r.risk_level
+                    FROM student_risk r
+                    JOIN students s ON r.student_id = s.student_id
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY r.risk_level DESC, r.failed_credits DESC, r.student_id
+                '''
+                if limit:
+                    sql += ' LIMIT ?'
+                    params.append(int(limit))
+                rows = conn.execute(sql, params).fetchall()
+
+        columns = ('student_id', 'name', 'grade', 'major', 'class_name', 'semester',
+                   'term_avg', 'class_avg', 'failed_credits', 'score_drop',
+                   'below_streak', 'absent_count')
+        result = []
+        for row in rows:
+            item = dict(zip(columns, row))
+            item['flags'] = [FLAG_LABELS[flag] for flag in row[12].split(',') if flag]
+            item['level'] = RISK_LEVELS.get(row[13], '')
+            result.append(item)
+        return result
+
+    def student_risks(self, student_id):
+        """单个学生各学期的风险记录（学期升序）"""
+        with self._lock:
+            self._ensure_current()
+            with self.db.get_connection() as conn:
+                rows = conn.execute('''
+                    SELECT semester, term_avg, class_avg, failed_credits, score_drop,
+                           below_streak, absent_count, flags, risk_level
+                    FROM student_risk WHERE student_id = ? ORDER BY semester
+                ''', (student_id,)).fetchall()
+        return [
+            {
+                'semester': semester, 'term_avg': term_avg, 'class_avg': class_avg,
+                'failed_credits': failed_credits, 'score_drop': score_drop,
+                'below_streak': streak, 'absent_count': absent,
+                'flags': [FLAG_LABELS[flag] for flag in flags.split(',') if flag],
+                'level': RISK_LEVELS.get(level, ''),
+            }
+            for semester, term_avg, class_avg, failed_credits, score_drop, streak, absent, flags, level
+            in rows
+        ]
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_risk_engine(db=None):
+    """取得数据库对应的学业预警引擎（默认使用 DatabaseManager 单例）"""
+    if db is None:
+        from database.db_manager import DatabaseManager
+        db = DatabaseManager()
+    with _engines_lock:
+        engine = _engines.get(db.db_path)
+        if engine is None:
+            engine = RiskEngine(db)
+            _engines[db.db_path] = engine
+        return engine
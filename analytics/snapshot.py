@@ -0,0 +1,175 @@
+"""
+列式快照文件
+把 GradeColumns 的数组逐个保存为 .npy 文件，字符串字典保存在 meta.json 中；
+读取时用内存映射打开（np.load(mmap_mode='r')），多个服务器进程、分析进程共享同一份
+操作系统页缓存，不必各自从 SQLite 读取并转换全部成绩
+
+目录结构：
+    <快照目录>/CURRENT        当前版本的子目录名
+    <快照目录>/v<时间戳>/     一个完整版本（*.npy + meta.json）
+新版本先写入临时目录再改名，最后原子替换 CURRENT，读取方不会读到写了一半的快照
+"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
+
+import numpy as np
+
+from .columns import CODED_DIMENSIONS, SCORE_FIELDS, GradeColumns
+
+
+SNAPSHOT_FORMAT = 1
+# 保留的旧版本数（其他进程可能仍映射着旧文件）
+KEEP_VERSIONS = 2
+
+# 数组属性 -> 文件名
+_ARRAYS = ('student_idx', 'course_idx', 'course_credits', 'credits')
+_LISTS = ('student_ids', 'student_names', 'course_ids', 'course_names',
+          'teacher_ids', 'teacher_names')
+
+
+def default_snapshot_dir(db_path):
+    """数据库对应的默认快照目录"""
+    return os.path.abspath(db_path) + '.columns'
+
+
+def current_version(directory):
+    """当前快照版本名，尚未生成时返回 None"""
+    try:
+        with open(os.path.join(directory, 'CURRENT'), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_snapshot(data, directory):
+    """把列式数据写为新版本快照，返回版本名"""
+    os.makedirs(directory, exist_ok=True)
+    version = f'v{time.time_ns()}'
+    tmp_dir = os.path.join(directory, version + '.tmp')
+    os.makedirs(tmp_dir)
+
+    arrays = {name: getattr(data, name) for name in _ARRAYS}
+    for field in SCORE_FIELDS:
+        arrays[f'score_{field}'] = data.scores[field]
+    for name in CODED_DIMENSIONS:
+        arrays[f'code_{name}'] = data.codes[name]
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, name + '.npy'), np.ascontiguousarray(array))
+
+    meta = {
+        'format': SNAPSHOT_FORMAT,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'rows': len(data),
+        'loaded_at': data.loaded_at,
+        'labels': {name: data.labels[name] for name in CODED_DIMENSIONS},
+    }
+    for name in _LISTS:
+        meta[name] = getattr(data, name)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    os.rename(tmp_dir, os.path.join(directory, version))
+    pointer = os.path.join(directory, 'CURRENT.tmp')
+    with open(pointer, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, 'CURRENT'))
+    _remove_old_versions(directory, version)
+    return version
+
+
+def _remove_old_versions(directory, current):
+    versions = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith('v') and not name.endswith('.tmp') and name != current
+    )
+    for name in versions[:max(0, len(versions) - (KEEP_VERSIONS - 1))]:
+        # Windows 下仍被映射的文件无法删除，下次再清理
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def open_snapshot(directory, version=None):
+    """以内存映射方式打开快照（默认当前版本），返回只读的 GradeColumns"""
+    version = version or current_version(directory)
+    if not version:
+        raise FileNotFoundError(f'快照不存在: {directory}')
+    path = os.path.join(directory, version)
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f'快照格式不兼容: {meta.get("format")}')
+
+    def load(name):
+        return np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+
+    data = GradeColumns()
+    for name in _ARRAYS:
+        setattr(data, name, load(name))
+    data.scores = {field: load(f'score_{field}') for field in SCORE_FIELDS}
+    for name in CODED_DIMENSIONS:
+        data.codes[name] = load(f'code_{name}')
+        data.labels[name] = meta['labels'][name]
+    for name in _LISTS:
+        setattr(data, name, meta[name])
+    data.teacher_name_of = dict(zip(data.teacher_ids, data.teacher_names))
+    data.loaded_at = meta.get('loaded_at', 0.0)
+    data.add_identity_codes()
+    data.version = version
+    return data
+
+
+def build_snapshot(db, directory=None):
+    """从数据库读取全部成绩并写入快照，返回版本名"""
+    directory = directory or default_snapshot_dir(db.db_path)
+    with db.get_read_connection() as conn:
+        data = GradeColumns.load(conn)
+    return write_snapshot(data, directory)
+
+
+class SnapshotScheduler:
+    """定期重建快照的后台线程；数据库没有新的写入时跳过"""
+
+    def __init__(self, db, directory=None, interval=300):
+        self.db = db
+        self.directory = directory or default_snapshot_dir(db.db_path)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._built_version = None
+
+    def _data_version(self):
+        if self._conn is None:
+            uri = 'file:' + pathname2url(os.path.abspath(self.db.db_path)) + '?mode=ro'
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def refresh(self, force=False):
+        """数据库有变化（或 force）时重建快照，返回是否重建"""
+        version = self._data_version()
+        if not force and version == self._built_version and current_version(self.directory):
+            return False
+        build_snapshot(self.db, self.directory)
+        self._built_version = version
+        return True
+
+    def start(self):
+        """立即生成一次快照，之后每 interval 秒检查一次"""
+        self.refresh(force=True)
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='columns-snapshot', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"刷新列式快照失败: {e}")
+
+    def stop(self):
+        self._stop.set()
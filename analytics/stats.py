@@ -0,0 +1,173 @@
+"""
+向量化分组统计
+所有函数都以“分组编码数组 + 数值数组”为输入，用 bincount / lexsort 一次算出全部分组的结果，
+不在 Python 中逐组循环
+"""
+import numpy as np
+
+
+# 与界面、SQL 统计一致的分数线
+FAIL_LINE = 60
+GOOD_LINE = 80
+EXCELLENT_LINE = 90
+
+# 成绩分布的默认分段：0-9, 10-19, ..., 80-89, 90-100
+DEFAULT_BINS = np.arange(0, 101, 10)
+
+
+def group_keys(code_arrays):
+    """多个维度的编码合并为一个分组编码
+
+    返回 (分组编码数组, 各分组对应的各维度编码 [n_groups, n_dims])
+    """
+    if len(code_arrays) == 1:
+        uniques, inverse = np.unique(code_arrays[0], return_inverse=True)
+        return inverse.reshape(-1), uniques.reshape(-1, 1)
+    stacked = np.stack(code_arrays, axis=1)
+    uniques, inverse = np.unique(stacked, axis=0, return_inverse=True)
+    return inverse.reshape(-1), uniques
+
+
+def group_summary(groups, n_groups, scores, credits=None):
+    """每组的人次、平均分、挂科率、优秀率、良好率及学分加权平均分
+
+    scores 中的 NaN 不参与统计；返回字典，每项为长度 n_groups 的数组
+    """
+    valid = ~np.isnan(scores)
+    groups = groups[valid]
+    scores = scores[valid]
+
+    count = np.bincount(groups, minlength=n_groups)
+    total = np.bincount(groups, weights=scores, minlength=n_groups)
+    fail = np.bincount(groups, weights=scores < FAIL_LINE, minlength=n_groups)
+    excellent = np.bincount(groups, weights=scores >= EXCELLENT_LINE, minlength=n_groups)
+    good = np.bincount(
+        groups, weights=(scores >= GOOD_LINE) & (scores < EXCELLENT_LINE), minlength=n_groups
+    )
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary = {
+            'count': count,
+            'avg_score': total / count,
+            'fail_rate': fail / count,
+            'excellent_rate': excellent / count,
+            'good_rate': good / count,
+            'min_score': _group_extreme(np.minimum, groups, scores, n_groups, np.inf),
+            'max_score': _group_extreme(np.maximum, groups, scores, n_groups, -np.inf),
+        }
+        if credits is not None:
+            credits = credits[valid]
+            credit_sum = np.bincount(groups, weights=credits, minlength=n_groups)
+            weighted = np.bincount(groups, weights=scores * credits, minlength=n_groups)
+            summary['credit_sum'] = credit_sum
+            summary['weighted_avg'] = weighted / credit_sum
+    return summary
+
+
+def _group_extreme(ufunc, groups, values, n_groups, initial):
+    result = np.full(n_groups, initial)
+    ufunc.at(result, groups, values)
+    result[np.isinf(result)] = np.nan
+    return result
+
+
+def distinct_count(groups, n_groups, items):
+    """每组中不同 items（如学生下标）的个数"""
+    if not len(groups):
+        return np.zeros(n_groups, dtype=np.int64)
+    pairs = np.unique(np.stack([groups, items], axis=1), axis=0)
+    return np.bincount(pairs[:, 0], minlength=n_groups)
+
+
+def group_percentiles(groups, n_groups, values, quantiles):
+    """每组的分位数（线性插值，与 numpy.percentile 默认方法一致）
+
+    返回 [n_groups, len(quantiles)] 数组，空组为 NaN
+    """
+    valid = ~np.isnan(values)
+    groups = groups[valid]
+    values = values[valid]
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+
+    count = np.bincount(groups, minlength=n_groups)
+    start = np.concatenate(([0], np.cumsum(count)[:-1]))
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    nonempty = count > 0
+    if not nonempty.any():
+        return result
+    # 每组内的浮点位置 -> 上下两个元素插值
+    position = (count[nonempty, None] - 1) * quantiles[None, :]
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, count[nonempty, None] - 1)
+    fraction = position - lower
+    base = start[nonempty, None]
+    low_values = sorted_values[base + lower]
+    high_values = sorted_values[base + upper]
+    result[nonempty] = low_values + (high_values - low_values) * fraction
+    return result
+
+
+def group_whiskers(groups, n_groups, values, q1, q3, whis=1.5):
+    """每组箱线图须线的位置（与 matplotlib 箱线图相同）
+
+    须线为距四分位数 whis 倍四分位距以内的最小值和最大值；q1、q3 为各组的四分位数。
+    返回 (下须, 上须) 两个数组，空组为 NaN
+    """
+    valid = ~np.isnan(values)
+    groups = groups[valid]
+    values = values[valid]
+    iqr = q3 - q1
+    low_fence = (q1 - whis * iqr)[groups]
+    high_fence = (q3 + whis * iqr)[groups]
+    inside_low = values >= low_fence
+    inside_high = values <= high_fence
+    whislo = _group_extreme(np.minimum, groups[inside_low], values[inside_low], n_groups, np.inf)
+    whishi = _group_extreme(np.maximum, groups[inside_high], values[inside_high], n_groups, -np.inf)
+    return whislo, whishi
+
+
+def group_fliers(groups, n_groups, values, whislo, whishi, limit=50):
+    """每组须线以外的离群值（箱线图中单独画出的点）
+
+    相同的分数只保留一个；每组最多 limit 个，超出时保留离须线最远的。
+    返回长度为 n_groups 的列表，每项为该组离群值的升序数组
+    """
+    valid = ~np.isnan(values)
+    groups = groups[valid]
+    values = values[valid]
+    outside = (values < whislo[groups]) | (values > whishi[groups])
+    pairs = np.unique(np.stack([groups[outside].astype(np.float64), values[outside]], axis=1), axis=0)
+    groups = pairs[:, 0].astype(np.int64)
+    values = pairs[:, 1]
+    # 组内按离须线的距离降序，保留前 limit 个
+    distance = np.maximum(whislo[groups] - values, values - whishi[groups])
+    order = np.lexsort((-distance, groups))
+    groups = groups[order]
+    values = values[order]
+    rank = np.arange(len(groups)) - np.searchsorted(groups, groups)
+    groups = groups[rank < limit]
+    values = values[rank < limit]
+    order = np.lexsort((values, groups))
+    groups = groups[order]
+    values = values[order]
+    bounds = np.searchsorted(groups, np.arange(n_groups + 1))
+    return [values[bounds[i]:bounds[i + 1]] for i in range(n_groups)]
+
+
+def group_histogram(groups, n_groups, values, bins=DEFAULT_BINS):
+    """每组的分段人数，返回 [n_groups, len(bins) - 1] 数组
+
+    与 numpy.histogram 相同：各段左闭右开，最后一段包含右端点，超出范围的值不计入
+    """
+    bins = np.asarray(bins, dtype=np.float64)
+    n_bins = len(bins) - 1
+    valid = ~np.isnan(values) & (values >= bins[0]) & (values <= bins[-1])
+    groups = groups[valid]
+    values = values[valid]
+    index = np.searchsorted(bins, values, side='right') - 1
+    index[index == n_bins] = n_bins - 1
+    counts = np.bincount(groups * n_bins + index, minlength=n_groups * n_bins)
+    return counts.reshape(n_groups, n_bins)
@@ -0,0 +1,8 @@
+"""
+性能基准测试模块
+生成不同规模的数据集，测量 DatabaseManager 常用操作的耗时
+
+用法：
+    python -m benchmarks.bench_db --sizes 2000 20000
+    python -m benchmarks.bench_db --compare 旧结果.json 新结果.json
+"""
@@ -0,0 +1,251 @@
+"""
+DatabaseManager 常用操作的基准测试
+对每个数据规模测量各操作的耗时，结果写入JSON文件，便于不同提交之间对比
+
+用法：
+    python -m benchmarks.bench_db                       # 默认 2000/20000/200000 名学生
+    python -m benchmarks.bench_db --sizes 2000 --repeat 50
+    python -m benchmarks.bench_db --compare 旧结果.json 新结果.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from benchmarks.dataset import ensure_dataset, ELECTIVE_COURSES
+
+
+DEFAULT_SIZES = [2000, 20000, 200000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def open_manager(path):
+    """打开指定数据库的 DatabaseManager（DatabaseManager 为单例，切换数据集时需重建）"""
+    DatabaseManager._instance = None
+    return DatabaseManager(path)
+
+
+class BenchContext:
+    """一个数据集上的测试环境：随机抽取测试用的学生、教师"""
+
+    def __init__(self, db, seed=7):
+        self.db = db
+        self.rng = random.Random(seed)
+        with db.get_connection() as conn:
+            self.student_ids = [row[0] for row in conn.execute('SELECT student_id FROM students')]
+            self.teacher_ids = [row[0] for row in conn.execute('SELECT teacher_id FROM teachers')]
+
+    def student(self):
+        return self.rng.choice(self.student_ids)
+
+    def teacher(self):
+        return self.rng.choice(self.teacher_ids)
+
+    def elective(self):
+        return f'E{self.rng.randint(1, ELECTIVE_COURSES):04d}'
+
+
+def bench_authenticate_user(ctx):
+    sid = ctx.student()
+    return lambda: ctx.db.authenticate_user(sid, 'student123')
+
+
+def bench_get_all_courses(ctx):
+    return ctx.db.get_all_courses
+
+
+def bench_enroll_course(ctx):
+    sid, course_id = ctx.student(), ctx.elective()
+    # 退课放在计时之外，保证每次选课都会真正插入
+    ctx.db.drop_course(sid, course_id)
+    return lambda: ctx.db.enroll_course(sid, course_id)
+
+
+def bench_get_student_grades(ctx):
+    sid = ctx.student()
+    return lambda: ctx.db.get_student_grades(sid)
+
+
+def bench_get_teacher_students(ctx):
+    tid = ctx.teacher()
+    return lambda: ctx.db.get_teacher_students(tid)
+
+
+def bench_get_student_semester_trend(ctx):
+    sid = ctx.student()
+    return lambda: ctx.db.get_student_semester_trend(sid)
+
+
+def bench_get_student_course_scores_by_semester(ctx):
+    sid = ctx.student()
+    return lambda: ctx.db.get_student_course_scores_by_semester(sid)
+
+
+def bench_get_statistics(ctx):
+    return ctx.db.get_statistics
+
+
+def bench_get_grade_distribution(ctx):
+    return ctx.db.get_grade_distribution
+
+
+def bench_get_all_students(ctx):
+    return ctx.db.get_all_students
+
+
+# 名称 -> 准备函数；准备函数返回本次要计时的无参调用
+BENCHMARKS = {
+    'authenticate_user': bench_authenticate_user,
+    'get_all_courses': bench_get_all_courses,
+    'enroll_course': bench_enroll_course,
+    'get_student_grades': bench_get_student_grades,
+    'get_teacher_students': bench_get_teacher_students,
+    'get_student_semester_trend': bench_get_student_semester_trend,
+    'get_student_course_scores_by_semester': bench_get_student_course_scores_by_semester,
+    'get_statistics': bench_get_statistics,
+    'get_grade_distribution': bench_get_grade_distribution,
+    'get_all_students': bench_get_all_students,
+}
+
+
+def summarize(samples):
+    """耗时样本（秒）-> 统计值（毫秒）"""
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(round(len(ms) * 0.95)) - 1)]
+    return {
+        'runs': len(ms),
+        'min_ms': round(ms[0], 3),
+        'median_ms': round(statistics.median(ms), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p95_ms': round(p95, 3),
+        'max_ms': round(ms[-1], 3),
+    }
+
+
+def run_benchmark(ctx, prepare, repeat, budget, warmup=1):
+    """执行一项基准：预热后最多运行 repeat 次，单项总耗时超过 budget 秒时提前结束（至少 3 次）"""
+    for _ in range(warmup):
+        prepare(ctx)()
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < repeat:
+        call = prepare(ctx)
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+        if len(samples) >= 3 and time.perf_counter() > deadline:
+            break
+    return summarize(samples)
+
+
+def run_size(students, names, repeat, budget, data_dir=None):
+    """在一个数据规模上运行选定的基准"""
+    path = ensure_dataset(students, data_dir)
+    db = open_manager(path)
+    ctx = BenchContext(db)
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(ctx, BENCHMARKS[name], repeat, budget)
+        r = results[name]
+        print(f"  {name:<30} 中位数 {r['median_ms']:>10.3f}ms  p95 {r['p95_ms']:>10.3f}ms  ({r['runs']}次)")
+    with db.get_connection() as conn:
+        conn.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(old_path, new_path, threshold=0.10):
+    """对比两次结果的中位数，变化超过 threshold 的项标记出来"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    print(f"对比 {old['meta'].get('commit')} -> {new['meta'].get('commit')}（中位数）")
+    regressions = 0
+    for size, new_results in new['results'].items():
+        old_results = old['results'].get(size, {})
+        print(f"\n[{size} 名学生]")
+        for name, item in new_results.items():
+            if name not in old_results:
+                print(f"  {name:<30} {'-':>10}  -> {item['median_ms']:>10.3f}ms")
+                continue
+            before = old_results[name]['median_ms']
+            after = item['median_ms']
+            ratio = after / before if before else 1.0
+            mark = ''
+            if ratio > 1 + threshold:
+                mark = '  变慢'
+                regressions += 1
+            elif ratio < 1 - threshold:
+                mark = '  变快'
+            print(f"  {name:<30} {before:>10.3f}ms -> {after:>10.3f}ms  x{ratio:.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DatabaseManager 性能基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='学生人数（默认 2000 20000 200000）')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='只运行指定的基准')
+    parser.add_argument('--repeat', type=int, default=30, help='每项最多运行次数（默认 30）')
+    parser.add_argument('--budget', type=float, default=10.0, help='每项最长运行秒数（默认 10）')
+    parser.add_argument('--data-dir', help='数据集缓存目录（默认系统临时目录）')
+    parser.add_argument('--output', help='结果文件（默认 benchmarks/results/时间_提交.json）')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两次结果文件')
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare)
+        sys.exit(1 if regressions else 0)
+
+    names = args.only or list(BENCHMARKS)
+    commit = git_commit()
+    results = {}
+    for students in args.sizes:
+        print(f"\n[{students} 名学生]")
+        results[str(students)] = run_size(students, names, args.repeat, args.budget, args.data_dir)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'{stamp}_{commit or "unknown"}.json')
+    report = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+
+if __name__ == '__main__':
+    main()
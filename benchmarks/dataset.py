@@ -0,0 +1,212 @@
+"""
+基准测试数据集生成
+结构与 database/init_db.py 的示例数据一致（班级、专业课程体系、学期成绩），
+但学生人数可配置，并使用批量插入以便快速生成大规模数据
+"""
+import hashlib
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import truncate_score
+from database.init_db import DatabaseInitializer
+from database.migrations import LATEST_VERSION, set_version
+
+
+MAJORS = ['物联网工程', '电信工程及管理', '智能科学与技术', '电子信息工程']
+# 年级 -> 已修学期数（与 init_db 相同）
+YEARS = {'2021': 7, '2022': 5, '2023': 3, '2024': 1}
+STUDENTS_PER_CLASS = 42
+STUDENTS_PER_TEACHER = 66
+COURSES_PER_TERM = 4
+# 开放选课的公选课，供选课/退课基准使用
+ELECTIVE_COURSES = 20
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'teaching_system_bench')
+
+
+def dataset_path(students, data_dir=None):
+    """指定规模的数据集文件路径"""
+    return os.path.join(data_dir or DEFAULT_DATA_DIR, f'bench_{students}.db')
+
+
+def _hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def _grade_level(score):
+    if score >= 90:
+        return '优秀'
+    if score >= 80:
+        return '良好'
+    if score >= 70:
+        return '中等'
+    if score >= 60:
+        return '及格'
+    return '不及格'
+
+
+def _random_score(rng, failing):
+    """按 init_db 的规则生成 (平时分, 期末分, 总评)"""
+    if failing:
+        target = rng.uniform(30, 59.9)
+    else:
+        r = rng.random()
+        if r < 0.2:
+            target = rng.uniform(60, 70)
+        elif r < 0.6:
+            target = rng.uniform(70, 85)
+        elif r < 0.9:
+            target = rng.uniform(85, 92)
+        else:
+            target = rng.uniform(92, 98)
+    usual = rng.uniform(70, 95)
+    exam = min(100, max(0, (target - 0.4 * usual) / 0.6))
+    return usual, exam, truncate_score(usual * 0.4 + exam * 0.6)
+
+
+def generate_dataset(path, students, seed=2025):
+    """生成包含 students 个学生的数据库文件（已存在则覆盖）"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    rng = random.Random(seed)
+    initializer = DatabaseInitializer(path)
+    initializer.create_tables()
+    conn = initializer.conn
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('PRAGMA journal_mode=MEMORY')
+    cursor = conn.cursor()
+
+    users = [('admin', _hash_password('admin123'), 'admin')]
+
+    # 教师
+    teacher_count = max(30, students // STUDENTS_PER_TEACHER)
+    teacher_password = _hash_password('teacher123')
+    teacher_ids = [f'teacher{i:05d}' for i in range(1, teacher_count + 1)]
+    users += [(tid, teacher_password, 'teacher') for tid in teacher_ids]
+
+    # 学生：按年级、专业均分到班级
+    class_count = max(1, students // (len(YEARS) * len(MAJORS) * STUDENTS_PER_CLASS))
+    classes = []
+    for year in YEARS:
+        for major_index, major in enumerate(MAJORS):
+            for c in range(class_count):
+                classes.append((year, major, f'{year}{major_index + 1:02d}{c + 1:04d}'))
+
+    student_rows = []
+    student_password = _hash_password('student123')
+    counters = {year: 0 for year in YEARS}
+    for index in range(students):
+        year, major, class_name = classes[index % len(classes)]
+        counters[year] += 1
+        student_id = f'{year}{counters[year]:06d}'
+        student_rows.append((student_id, year, major, class_name))
+    users += [(row[0], student_password, 'student') for row in student_rows]
+
+    cursor.executemany(
+        "INSERT INTO users (username, password_hash, role, status) VALUES (?, ?, ?, 'active')",
+        users,
+    )
+    user_ids = dict(cursor.execute('SELECT username, user_id FROM users').fetchall())
+
+    cursor.executemany(
+        '''INSERT INTO teachers (teacher_id, user_id, name, gender, department, title)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        [
+            (tid, user_ids[tid], f'教师{i}', '男' if i % 2 else '女',
+             MAJORS[i % len(MAJORS)] + '系', ['教授', '副教授', '讲师'][i % 3])
+            for i, tid in enumerate(teacher_ids, 1)
+        ],
+    )
+    cursor.executemany(
+        '''INSERT INTO students (student_id, user_id, name, gender, major, grade, class_name)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        [
+            (sid, user_ids[sid], f'学生{i}', '男' if i % 2 else '女', major, year, class_name)
+            for i, (sid, year, major, class_name) in enumerate(student_rows, 1)
+        ],
+    )
+
+    # 课程、选课与成绩：每个班级每学期 COURSES_PER_TERM 门课
+    class_students = {}
+    for sid, year, major, class_name in student_rows:
+        class_students.setdefault((year, major, class_name), []).append(sid)
+
+    course_rows = []
+    enrollment_rows = []
+    grade_rows = []
+    course_counter = 0
+    for (year, major, class_name), members in class_students.items():
+        for term in range(1, YEARS[year] + 1):
+            start_year = int(year) + (term - 1) // 2
+            semester = f'{start_year}-{start_year + 1}-{2 if term % 2 == 0 else 1}'
+            for n in range(COURSES_PER_TERM):
+                course_counter += 1
+                course_id = f'C{year}{term}{course_counter:07d}'
+                course_rows.append((
+                    course_id, f'{major}课程{term}-{n + 1}', rng.choice(teacher_ids),
+                    3.0, 48, semester, f'周{rng.randint(1, 5)}',
+                    f'教{rng.randint(101, 505)}', 60, 'closed',
+                ))
+                fail_rate = rng.uniform(0.10, 0.20)
+                for sid in members:
+                    usual, exam, final = _random_score(rng, rng.random() < fail_rate)
+                    enrollment_rows.append((sid, course_id))
+                    grade_rows.append((sid, course_id, usual, exam, final,
+                                       _grade_level(final), semester))
+
+    for i in range(1, ELECTIVE_COURSES + 1):
+        course_rows.append((
+            f'E{i:04d}', f'公选课{i}', rng.choice(teacher_ids), 2.0, 32,
+            '2025-2026-1', '周六', f'教{100 + i}', students + 1000, 'open',
+        ))
+
+    cursor.executemany(
+        '''INSERT INTO courses (course_id, course_name, teacher_id, credits, hours,
+           semester, class_time, classroom, capacity, status)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        course_rows,
+    )
+    cursor.executemany(
+        'INSERT INTO enrollments (student_id, course_id) VALUES (?, ?)',
+        enrollment_rows,
+    )
+    cursor.executemany(
+        '''INSERT INTO grades (student_id, course_id, usual_score, exam_score,
+           final_score, grade_level, semester) VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        grade_rows,
+    )
+    set_version(conn, LATEST_VERSION)
+    conn.commit()
+    conn.close()
+
+    return {
+        'students': students,
+        'teachers': teacher_count,
+        'courses': len(course_rows),
+        'grades': len(grade_rows),
+    }
+
+
+def ensure_dataset(students, data_dir=None, seed=2025, rebuild=False):
+    """返回指定规模的数据集路径，不存在或人数不符时重新生成"""
+    path = dataset_path(students, data_dir)
+    if not rebuild and os.path.exists(path):
+        try:
+            conn = sqlite3.connect(path)
+            count = conn.execute('SELECT COUNT(*) FROM students').fetchone()[0]
+            conn.close()
+            if count == students:
+                return path
+        except sqlite3.Error:
+            pass
+    print(f"正在生成 {students} 名学生的数据集: {path}")
+    info = generate_dataset(path, students, seed)
+    print(f"  - 课程 {info['courses']} 门，成绩 {info['grades']} 条")
+    return path
@@ -0,0 +1,277 @@
+"""
+网络服务器压力测试
+用 asyncio 模拟大量学生同时在线，按真实操作顺序
+（登录 -> 查看课程 -> 选课 -> 退课 -> 查看成绩 -> 注销）向已启动的服务器发送请求，
+统计吞吐量、各操作耗时分布和错误率
+
+仅用于本机或测试环境的服务器。用法：
+    python server_main.py --port 8888
+    python -m benchmarks.load_server --users 1000 --concurrency 200 --db teaching_system.db
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network.protocol import WRITE_ACTIONS, encode_message, decode_message
+from network.metrics import LatencyHistogram
+
+
+class LoadStats:
+    """按操作统计耗时与错误（只在事件循环线程中修改，无需加锁）"""
+
+    def __init__(self):
+        self.latency = {}
+        self.errors = {}
+        self.codes = {}
+        self.throttled = 0  # 被限流后重试的次数
+        self.sessions = 0
+        self.failed_sessions = 0
+
+    def record(self, action, elapsed, response):
+        hist = self.latency.get(action)
+        if hist is None:
+            hist = self.latency[action] = LatencyHistogram()
+        hist.add(elapsed * 1000)
+        if response is None or not response.get('success'):
+            self.errors[action] = self.errors.get(action, 0) + 1
+            code = 'exception' if response is None else response.get('code', 'failed')
+            self.codes[code] = self.codes.get(code, 0) + 1
+
+    def summary(self, duration):
+        total = sum(h.total for h in self.latency.values())
+        errors = sum(self.errors.values())
+        actions = {}
+        for action, hist in sorted(self.latency.items(), key=lambda item: -item[1].total):
+            actions[action] = {
+                'count': hist.total,
+                'errors': self.errors.get(action, 0),
+                'p50_ms': round(hist.percentile(50), 2),
+                'p95_ms': round(hist.percentile(95), 2),
+                'p99_ms': round(hist.percentile(99), 2),
+                'max_ms': round(hist.max, 2),
+            }
+        return {
+            'duration': round(duration, 2),
+            'requests': total,
+            'throughput': round(total / duration, 1) if duration else 0,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'error_codes': self.codes,
+            'throttled': self.throttled,
+            'sessions': self.sessions,
+            'failed_sessions': self.failed_sessions,
+            'actions': actions,
+        }
+
+
+class Connection:
+    """一个模拟客户端的连接"""
+
+    def __init__(self, host, port, stats, timeout, max_retries=3):
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.reader = None
+        self.writer = None
+        self.token = None
+        self.counter = 0
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, limit=64 * 1024 * 1024),
+            self.timeout,
+        )
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+
+    async def request(self, action, data=None):
+        """发送请求并等待响应，失败时返回 None"""
+        message = {'action': action, 'data': data or {}, 'token': self.token}
+        if action in WRITE_ACTIONS:
+            self.counter += 1
+            message['request_id'] = f'load-{id(self)}-{self.counter}'
+        start = time.perf_counter()
+        response = None
+        # 与 Client 一样，被限流时按服务器建议的时间等待后重试；耗时按用户感受到的总时间计算
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.writer.write(encode_message(message))
+                await self.writer.drain()
+                line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+                response = decode_message(line) if line else None
+            except (asyncio.TimeoutError, OSError, ValueError):
+                response = None
+            if response is None or response.get('code') != 'rate_limited' or attempt == self.max_retries:
+                break
+            self.stats.throttled += 1
+            await asyncio.sleep(response.get('retry_after', 1.0))
+        self.stats.record(action, time.perf_counter() - start, response)
+        return response
+
+
+async def student_session(host, port, username, password, stats, think_time, timeout,
+                          courses_cache, max_retries=3):
+    """一名学生的完整操作流程"""
+    conn = Connection(host, port, stats, timeout, max_retries)
+    try:
+        await conn.open()
+    except (asyncio.TimeoutError, OSError):
+        stats.record('connect', timeout, None)
+        stats.failed_sessions += 1
+        return
+
+    async def think():
+        if think_time:
+            await asyncio.sleep(random.uniform(0, think_time * 2))
+
+    try:
+        resp = await conn.request('login', {'username': username, 'password': password})
+        if not resp or not resp.get('success'):
+            stats.failed_sessions += 1
+            return
+        session = resp['data']['session']
+        conn.token = session['token']
+        student_id = session['student_id']
+        await think()
+
+        await conn.request('get_student_info', {'user_id': session['user_id']})
+        await think()
+
+        # 课程列表很大，只在首次请求时解析可选课程
+        resp = await conn.request('get_courses')
+        if resp and resp.get('success') and not courses_cache:
+            courses_cache.extend(
+                c['course_id'] for c in resp['data']['courses'] if c.get('status') == 'open'
+            )
+        await think()
+
+        resp = await conn.request('get_student_courses', {'student_id': student_id})
+        enrolled = set()
+        if resp and resp.get('success'):
+            enrolled = {c['course_id'] for c in resp['data']['courses']}
+        await think()
+
+        candidates = [c for c in courses_cache if c not in enrolled]
+        if candidates:
+            course_id = random.choice(candidates)
+            resp = await conn.request('enroll_course',
+                                      {'student_id': student_id, 'course_id': course_id})
+            await think()
+            if resp and resp.get('success'):
+                await conn.request('drop_course',
+                                   {'student_id': student_id, 'course_id': course_id})
+                await think()
+
+        await conn.request('get_student_grades', {'student_id': student_id})
+        await think()
+
+        await conn.request('logout')
+        stats.sessions += 1
+    finally:
+        await conn.close()
+
+
+def load_usernames(db_path, limit):
+    """从数据库读取学生账号"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT username FROM users WHERE role = 'student' AND status = 'active' "
+            "ORDER BY user_id LIMIT ?",
+            (limit,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+async def run_load(host, port, usernames, password, users, concurrency, ramp_up,
+                   think_time, timeout, max_retries=3):
+    """运行 users 个会话，最多 concurrency 个同时进行，在 ramp_up 秒内逐步启动"""
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(concurrency)
+    courses_cache = []
+
+    async def one(index):
+        if ramp_up:
+            await asyncio.sleep(ramp_up * index / users)
+        async with semaphore:
+            await student_session(host, port, usernames[index % len(usernames)], password,
+                                  stats, think_time, timeout, courses_cache, max_retries)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(users)))
+    return stats.summary(time.perf_counter() - start)
+
+
+def print_summary(summary):
+    print(f"\n耗时 {summary['duration']}s，请求 {summary['requests']}，"
+          f"吞吐量 {summary['throughput']} 请求/秒")
+    print(f"完成会话 {summary['sessions']}，失败会话 {summary['failed_sessions']}，"
+          f"错误率 {summary['error_rate'] * 100:.2f}% {summary['error_codes'] or ''}，"
+          f"限流重试 {summary['throttled']} 次")
+    print(f"\n{'操作':<24}{'次数':>8}{'错误':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'最大':>10}")
+    for action, item in summary['actions'].items():
+        print(f"{action:<26}{item['count']:>8}{item['errors']:>8}"
+              f"{item['p50_ms']:>10.1f}{item['p95_ms']:>10.1f}{item['p99_ms']:>10.1f}"
+              f"{item['max_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='网络服务器压力测试')
+    parser.add_argument('--host', default='127.0.0.1', help='服务器地址（默认 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8888, help='服务器端口（默认 8888）')
+    parser.add_argument('--db', default='teaching_system.db', help='读取学生账号的数据库')
+    parser.add_argument('--password', default='student123', help='学生账号密码')
+    parser.add_argument('--users', type=int, default=1000, help='模拟的会话总数（默认 1000）')
+    parser.add_argument('--concurrency', type=int, default=100, help='同时进行的会话数（默认 100）')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='在多少秒内逐步启动全部会话')
+    parser.add_argument('--think-time', type=float, default=0.2, help='操作之间的平均停顿秒数')
+    parser.add_argument('--timeout', type=float, default=30.0, help='单个请求超时秒数')
+    parser.add_argument('--max-retries', type=int, default=3,
+                        help='被限流时的最多重试次数（默认 3；登录前的请求按IP限流，'
+                             '本机发出的登录共用一个令牌桶）')
+    parser.add_argument('--output', help='将结果写入JSON文件')
+    parser.add_argument('--allow-remote', action='store_true', help='允许连接非本机的测试服务器')
+    args = parser.parse_args()
+
+    if args.host not in ('127.0.0.1', 'localhost', '::1') and not args.allow_remote:
+        print("只允许对本机服务器进行压力测试；测试环境的服务器请加 --allow-remote")
+        sys.exit(1)
+
+    usernames = load_usernames(args.db, args.users)
+    if not usernames:
+        print(f"数据库 {args.db} 中没有学生账号")
+        sys.exit(1)
+
+    print(f"压力测试 {args.host}:{args.port}：{args.users} 个会话，并发 {args.concurrency}，"
+          f"{len(usernames)} 个不同账号")
+    summary = asyncio.run(run_load(
+        args.host, args.port, usernames, args.password, args.users,
+        args.concurrency, args.ramp_up, args.think_time, args.timeout, args.max_retries,
+    ))
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from network.client import Client
 from gui.login_window import LoginWindow
+from visualization.loader import warm_up
 
 
 class NetworkLoginWindow(LoginWindow):
@@ -45,6 +46,7 @@ class NetworkLoginWindow(LoginWindow):
         
         # 验证角色
         if user['role'] != expected_role:
+            self.client.logout()
             messagebox.showerror("错误", f"该账号不是{self.get_role_name(expected_role)}账号！")
             return
         
@@ -57,6 +59,8 @@ class NetworkLoginWindow(LoginWindow):
 
     def open_main_window(self):
         """打开网络模式下的主窗口"""
+        # 登录后在后台预先导入绘图模块，打开图表时不必等待
+        warm_up()
         role = self.current_user['role']
         if role == 'admin':
             from gui.network_admin_window import NetworkAdminWindow
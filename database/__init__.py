@@ -3,5 +3,9 @@
 """
 from .db_manager import DatabaseManager
 from .init_db import DatabaseInitializer
+from .profiler import QueryProfiler
+from .rows import TableRows
+from .read_pool import ReadPool
+from .log_writer import LogWriter
 
-__all__ = ['DatabaseManager', 'DatabaseInitializer']
\ No newline at end of file
+__all__ = ['DatabaseManager', 'DatabaseInitializer', 'QueryProfiler', 'TableRows', 'ReadPool', 'LogWriter']
\ No newline at end of file
@@ -4,10 +4,37 @@
 """
 import sqlite3
 import hashlib
+import math
 import threading
+import time
+import os
 from datetime import datetime
 from contextlib import contextmanager
 
+from .profiler import QueryProfiler
+from .rows import TableRows
+from .migrations import apply_migrations
+from .read_pool import ReadPool
+from .log_writer import LogWriter
+from . import log_archive
+
+
+# 每个连接缓存的预编译语句数（sqlite3 默认 128）
+STATEMENT_CACHE_SIZE = 512
+
+# 统计分析用只读连接的最大数量
+READ_POOL_SIZE = 4
+
+
+def truncate_score(value):
+    """成绩保留两位小数，向下截断（例如 85.567 -> 85.56）
+
+    先四舍五入到 6 位再取整，避免 0.29 * 100 = 28.999… 这类浮点误差
+    """
+    if value is None:
+        return None
+    return math.floor(round(value * 100, 6)) / 100
+
 
 class DatabaseManager:
     """数据库管理类"""
@@ -27,33 +54,115 @@ class DatabaseManager:
         if not hasattr(self, 'initialized'):
             self.db_path = db_path
             self.local = threading.local()
+            self.profiler = None
+            self.migrated = False
+            self._migrate_lock = threading.Lock()
+            self.read_pool = ReadPool(db_path, READ_POOL_SIZE, STATEMENT_CACHE_SIZE)
+            self.log_writer = LogWriter(db_path)
+            # 成绩变化的回调（如排名服务增量更新），参数为学号列表，None 表示范围未知
+            self._grade_listeners = []
+            # 过期日志的压缩归档目录
+            self.log_archive_dir = os.path.join(
+                os.path.dirname(os.path.abspath(db_path)), 'logs', 'archive'
+            )
             self.initialized = True
+            
+            # 设置 TEACHING_SQL_PROFILE=文件路径 时开启SQL统计，退出时写入该文件
+            profile_path = os.environ.get('TEACHING_SQL_PROFILE')
+            if profile_path:
+                self.enable_profiling(profile_path)
     
     @contextmanager
     def get_connection(self):
         """获取数据库连接（线程安全）"""
         if not hasattr(self.local, 'conn') or self.local.conn is None:
-            self.local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.local.conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
             self.local.conn.row_factory = sqlite3.Row
-            
-            # 注册 TRUNCATE 函数，模拟 MySQL 的 TRUNCATE(number, decimals)
-            def truncate_func(number, decimals):
-                if number is None:
-                    return None
-                try:
-                    factor = 10 ** decimals
-                    return int(number * factor) / factor
-                except Exception:
-                    return number
-            
-            self.local.conn.create_function("TRUNCATE", 2, truncate_func)
+            self.migrate(self.local.conn)
         
         try:
-            yield self.local.conn
+            profiler = self.profiler
+            with self._timed():
+                yield profiler.wrap(self.local.conn) if profiler else self.local.conn
         except Exception as e:
             self.local.conn.rollback()
             raise e
     
+    @contextmanager
+    def get_read_connection(self):
+        """获取只读连接（统计分析查询使用，不与写操作共用连接）
+
+        开启快照（enable_read_snapshot）后读取的是定期刷新的副本，数据可能略有延迟
+        """
+        if not self.migrated:
+            # 迁移需要写连接，先在主连接上完成
+            with self.get_connection():
+                pass
+        with self._timed(), self.read_pool.connection() as conn:
+            profiler = self.profiler
+            yield profiler.wrap(conn) if profiler else conn
+
+    @contextmanager
+    def _timed(self):
+        """累计本线程使用数据库连接的时间（嵌套使用时只计最外层）"""
+        depth = getattr(self.local, 'db_depth', 0)
+        self.local.db_depth = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.local.db_depth = depth
+            if depth == 0:
+                self.local.db_time = self.db_time() + time.perf_counter() - started
+
+    def db_time(self, reset=False):
+        """本线程累计使用数据库连接的时间（秒），reset=True 时清零（服务器按请求统计）"""
+        elapsed = getattr(self.local, 'db_time', 0.0)
+        if reset:
+            self.local.db_time = 0.0
+        return elapsed
+    
+    def enable_read_snapshot(self, refresh_interval=300, snapshot_path=None):
+        """统计分析改为读取快照副本，每 refresh_interval 秒通过备份API刷新一次"""
+        self.read_pool.enable_snapshot(snapshot_path, refresh_interval)
+    
+    def migrate(self, conn):
+        """首次打开数据库时执行未完成的迁移（见 database/migrations.py）"""
+        if self.migrated:
+            return
+        with self._migrate_lock:
+            if not self.migrated:
+                apply_migrations(conn)
+                self.migrated = True
+    
+    def enable_profiling(self, output=None):
+        """开启SQL统计（包括界面中直接执行的查询），output 为退出时写入统计结果的文件"""
+        if self.profiler is None:
+            self.profiler = QueryProfiler()
+            if output:
+                self.profiler.save_at_exit(output)
+        return self.profiler
+    
+    def disable_profiling(self):
+        """关闭SQL统计，返回已收集的统计器"""
+        profiler, self.profiler = self.profiler, None
+        return profiler
+    
+    def enable_wal(self):
+        """开启WAL日志模式（多进程并发读写时，读操作不再阻塞写操作）"""
+        with self.get_connection() as conn:
+            mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+            return str(mode).lower() == 'wal'
+
+    def checkpoint(self):
+        """WAL检查点：把WAL中的内容写回主数据库文件并截断WAL（非WAL模式下无影响）"""
+        with self.get_connection() as conn:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
     def _hash_password(self, password):
         """密码哈希"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -64,6 +173,25 @@ class DatabaseManager:
             return None
         return dict(row)
     
+    def _tuple_cursor(self, conn):
+        """返回以元组形式取行的游标（不构造 sqlite3.Row）"""
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return cursor
+    
+    def _fetch_all(self, cursor, shape='dict'):
+        """读取游标的全部结果并转换为 shape 指定的形式：
+        dict 字典列表（默认）/ tuple 元组列表 / named 命名元组列表 / rows TableRows（列名+元组）
+        """
+        return TableRows.from_cursor(cursor).to(shape)
+    
+    def query(self, sql, params=(), shape='dict'):
+        """执行只读查询，结果形式同 _fetch_all"""
+        with self.get_connection() as conn:
+            cursor = self._tuple_cursor(conn)
+            cursor.execute(sql, params)
+            return self._fetch_all(cursor, shape)
+    
     # ==================== 用户认证相关 ====================
     
     def authenticate_user(self, username, password):
@@ -87,23 +215,33 @@ class DatabaseManager:
             return None
     
     def add_log(self, username, action, description):
-        """添加日志"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO logs (username, action, description)
-                VALUES (?, ?, ?)
-            ''', (username, action, description))
-            conn.commit()
+        """添加日志（放入队列，由后台线程批量写入）"""
+        self.log_writer.add(username, action, description)
+    
+    def flush_logs(self):
+        """立即写入缓冲中的日志"""
+        self.log_writer.flush()
+    
+    def add_grade_listener(self, callback):
+        """注册成绩变化回调 callback(student_ids)，student_ids 为 None 表示涉及学生未知"""
+        if callback not in self._grade_listeners:
+            self._grade_listeners.append(callback)
+    
+    def _notify_grades_changed(self, student_ids=None):
+        for callback in list(self._grade_listeners):
+            try:
+                callback(student_ids)
+            except Exception as e:
+                print(f"成绩变化回调出错: {e}")
     
     # ==================== 用户管理 ====================
     
-    def get_all_users(self):
+    def get_all_users(self, shape='dict'):
         """获取所有用户"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('SELECT * FROM users ORDER BY user_id')
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     def add_user(self, username, password, role):
         """添加用户"""
@@ -140,11 +278,22 @@ class DatabaseManager:
             conn.commit()
             return cursor.rowcount > 0
     
+    def verify_password(self, username, password):
+        """校验用户密码（不记录登录日志）"""
+        password_hash = self._hash_password(password)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT 1 FROM users
+                WHERE username = ? AND password_hash = ? AND status = 'active'
+            ''', (username, password_hash))
+            return cursor.fetchone() is not None
+
     def change_password(self, username, old_password, new_password):
         """修改密码"""
         # 先验证旧密码
-        user = self.authenticate_user(username, old_password)
-        if not user:
+        if not self.verify_password(username, old_password):
             return False
         
         new_password_hash = self._hash_password(new_password)
@@ -173,17 +322,17 @@ class DatabaseManager:
     
     # ==================== 学生管理 ====================
     
-    def get_all_students(self):
+    def get_all_students(self, shape='dict'):
         """获取所有学生"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT s.*, u.username, u.status 
                 FROM students s
                 JOIN users u ON s.user_id = u.user_id
                 ORDER BY s.student_id
             ''')
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     def get_student_by_id(self, student_id):
         """根据学号获取学生信息"""
@@ -259,7 +408,11 @@ class DatabaseManager:
                 student_data.get('address'), student_id
             ))
             conn.commit()
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+        if updated:
+            # 年级、专业、班级可能变化，影响排名范围
+            self._notify_grades_changed([student_id])
+        return updated
     
     def delete_student(self, student_id):
         """删除学生"""
@@ -270,12 +423,14 @@ class DatabaseManager:
             cursor.execute('DELETE FROM grades WHERE student_id = ?', (student_id,))
             cursor.execute('DELETE FROM students WHERE student_id = ?', (student_id,))
             conn.commit()
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        self._notify_grades_changed([student_id])
+        return deleted
     
-    def search_students(self, keyword):
+    def search_students(self, keyword, shape='dict'):
         """搜索学生"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             search_pattern = f'%{keyword}%'
             cursor.execute('''
                 SELECT s.*, u.username, u.status 
@@ -285,21 +440,21 @@ class DatabaseManager:
                    OR s.major LIKE ? OR s.grade LIKE ?
                 ORDER BY s.student_id
             ''', (search_pattern, search_pattern, search_pattern, search_pattern))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     # ==================== 教师管理 ====================
     
-    def get_all_teachers(self):
+    def get_all_teachers(self, shape='dict'):
         """获取所有教师"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT t.*, u.username, u.status 
                 FROM teachers t
                 JOIN users u ON t.user_id = u.user_id
                 ORDER BY t.teacher_id
             ''')
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     def get_teacher_by_id(self, teacher_id):
         """根据教师ID获取教师信息"""
@@ -385,10 +540,10 @@ class DatabaseManager:
             conn.commit()
             return cursor.rowcount > 0
     
-    def search_teachers(self, keyword):
+    def search_teachers(self, keyword, shape='dict'):
         """搜索教师"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             search_pattern = f'%{keyword}%'
             cursor.execute('''
                 SELECT t.*, u.username, u.status 
@@ -398,14 +553,14 @@ class DatabaseManager:
                    OR t.department LIKE ? OR t.title LIKE ?
                 ORDER BY t.teacher_id
             ''', (search_pattern, search_pattern, search_pattern, search_pattern))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     # ==================== 课程管理 ====================
     
-    def get_all_courses(self):
+    def get_all_courses(self, shape='dict'):
         """获取所有课程（包含教师名和已选人数）"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT c.*, t.name as teacher_name,
                        COUNT(e.student_id) as enrolled_count
@@ -415,7 +570,7 @@ class DatabaseManager:
                 GROUP BY c.course_id
                 ORDER BY c.course_id
             ''')
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     def get_course_by_id(self, course_id):
         """根据课程ID获取课程信息"""
@@ -429,10 +584,10 @@ class DatabaseManager:
             ''', (course_id,))
             return self._dict_from_row(cursor.fetchone())
     
-    def get_courses_by_teacher(self, teacher_id):
+    def get_courses_by_teacher(self, teacher_id, shape='dict'):
         """获取教师的所有课程"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT c.*, t.name as teacher_name
                 FROM courses c
@@ -440,7 +595,7 @@ class DatabaseManager:
                 WHERE c.teacher_id = ?
                 ORDER BY c.course_id
             ''', (teacher_id,))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     def add_course(self, course_data):
         """添加课程"""
@@ -482,7 +637,11 @@ class DatabaseManager:
                 course_data.get('status', 'open'), course_id
             ))
             conn.commit()
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+        if updated:
+            # 学分可能变化，影响所有选课学生的加权平均分
+            self._notify_grades_changed()
+        return updated
     
     def delete_course(self, course_id):
         """删除课程"""
@@ -493,12 +652,14 @@ class DatabaseManager:
             cursor.execute('DELETE FROM grades WHERE course_id = ?', (course_id,))
             cursor.execute('DELETE FROM courses WHERE course_id = ?', (course_id,))
             conn.commit()
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        self._notify_grades_changed()
+        return deleted
     
-    def search_courses(self, keyword):
+    def search_courses(self, keyword, shape='dict'):
         """搜索课程"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             search_pattern = f'%{keyword}%'
             cursor.execute('''
                 SELECT c.*, t.name as teacher_name
@@ -508,7 +669,7 @@ class DatabaseManager:
                    OR c.semester LIKE ?
                 ORDER BY c.course_id
             ''', (search_pattern, search_pattern, search_pattern))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     # ==================== 选课管理 ====================
     
@@ -559,10 +720,10 @@ class DatabaseManager:
             conn.commit()
             return cursor.rowcount > 0
     
-    def get_student_courses(self, student_id):
+    def get_student_courses(self, student_id, shape='dict'):
         """获取学生的所有选课"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT c.*, t.name as teacher_name, e.enrollment_date
                 FROM enrollments e
@@ -571,12 +732,12 @@ class DatabaseManager:
                 WHERE e.student_id = ?
                 ORDER BY c.course_id
             ''', (student_id,))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
-    def get_course_students(self, course_id):
+    def get_course_students(self, course_id, shape='dict'):
         """获取课程的所有学生"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT s.*, e.enrollment_date
                 FROM enrollments e
@@ -584,13 +745,12 @@ class DatabaseManager:
                 WHERE e.course_id = ?
                 ORDER BY s.student_id
             ''', (course_id,))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     # ==================== 成绩管理 ====================
     
     def add_or_update_grade(self, grade_data):
         """添加或更新成绩"""
-        import math
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
@@ -601,9 +761,8 @@ class DatabaseManager:
             # 原始计算
             raw_final = usual_score * 0.4 + exam_score * 0.6
             
-            # 保留两位小数，向下取整
-            # 例如 85.567 -> 8556.7 -> 8556 -> 85.56
-            final_score = math.floor(raw_final * 100) / 100
+            # 保留两位小数，向下取整后保存，查询时直接使用
+            final_score = truncate_score(raw_final)
             
             if final_score >= 90:
                 grade_level = '优秀'
@@ -650,12 +809,13 @@ class DatabaseManager:
                 ))
             
             conn.commit()
-            return True
+        self._notify_grades_changed([grade_data['student_id']])
+        return True
     
-    def get_student_grades(self, student_id):
+    def get_student_grades(self, student_id, shape='dict'):
         """获取学生的所有成绩"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT g.*, c.course_name, c.credits, t.name as teacher_name
                 FROM grades g
@@ -664,12 +824,12 @@ class DatabaseManager:
                 WHERE g.student_id = ?
                 ORDER BY g.semester DESC, c.course_id
             ''', (student_id,))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
-    def get_course_grades(self, course_id):
+    def get_course_grades(self, course_id, shape='dict'):
         """获取课程的所有成绩"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT g.*, s.name as student_name, s.student_id
                 FROM grades g
@@ -677,11 +837,11 @@ class DatabaseManager:
                 WHERE g.course_id = ?
                 ORDER BY g.final_score DESC
             ''', (course_id,))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
 
     def get_student_semesters(self, student_id: str):
         """获取学生经历过的学期列表（按时间升序）"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 '''
@@ -704,8 +864,13 @@ class DatabaseManager:
           "class":   [{"semester":..., "avg_score":...}, ...],
           "student_meta": {"major":..., "class_name":...}
         }
+
+        三条曲线都取自成绩分析引擎中同一份列式数据（数据库有写入后最多延迟几秒刷新），
+        专业和班级曲线对同专业/班级的所有学生共用同一份计算结果
         """
-        with self.get_connection() as conn:
+        from analytics import get_analytics
+
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute(
@@ -728,96 +893,77 @@ class DatabaseManager:
             major = meta[0]
             class_name = meta[1]
 
-            cursor.execute(
-                '''
-                SELECT g.semester, AVG(g.final_score) AS avg_score
-                FROM grades g
-                WHERE g.student_id = ?
-                  AND g.final_score IS NOT NULL
-                  AND g.semester IS NOT NULL AND TRIM(g.semester) != ''
-                GROUP BY g.semester
-                ORDER BY g.semester
-                ''',
-                (student_id,),
-            )
-            student_series = [
-                {"semester": row[0], "avg_score": row[1]} for row in cursor.fetchall()
-            ]
+        trend = get_analytics(self).student_semester_trend(student_id, major, class_name)
+        trend["student_meta"] = {"major": major, "class_name": class_name}
+        return trend
+    
+    def get_student_semester_course_scores(self, student_id: str, semester: str, shape: str = 'dict'):
+        """获取某学生在指定学期的每门课成绩，并附带课程平均分（同学期，同课程）。
 
-            cursor.execute(
-                '''
-                SELECT g.semester, AVG(g.final_score) AS avg_score
-                FROM grades g
-                JOIN students s ON g.student_id = s.student_id
-                WHERE s.major = ?
-                  AND g.final_score IS NOT NULL
-                  AND g.semester IS NOT NULL AND TRIM(g.semester) != ''
-                GROUP BY g.semester
-                ORDER BY g.semester
-                ''',
-                (major,),
-            )
-            major_series = [
-                {"semester": row[0], "avg_score": row[1]} for row in cursor.fetchall()
-            ]
+        返回：
+        [{
+          "course_id":..., "course_name":..., "final_score":..., "course_avg":...
+        }, ...]
 
+        课程平均分取自 course_semester_avg 表（成绩写入时由触发器维护），不再逐行扫描成绩表
+        """
+        with self.get_read_connection() as conn:
+            cursor = self._tuple_cursor(conn)
             cursor.execute(
                 '''
-                SELECT g.semester, AVG(g.final_score) AS avg_score
+                SELECT
+                    c.course_id,
+                    c.course_name,
+                    g.final_score,
+                    a.score_total / 100.0 / a.score_count AS course_avg
                 FROM grades g
-                JOIN students s ON g.student_id = s.student_id
-                WHERE s.major = ? AND s.class_name = ?
+                JOIN courses c ON g.course_id = c.course_id
+                LEFT JOIN course_semester_avg a
+                  ON a.course_id = g.course_id AND a.semester = g.semester
+                WHERE g.student_id = ?
+                  AND g.semester = ?
                   AND g.final_score IS NOT NULL
-                  AND g.semester IS NOT NULL AND TRIM(g.semester) != ''
-                GROUP BY g.semester
-                ORDER BY g.semester
+                ORDER BY c.course_id
                 ''',
-                (major, class_name),
+                (student_id, semester),
             )
-            class_series = [
-                {"semester": row[0], "avg_score": row[1]} for row in cursor.fetchall()
-            ]
+            return self._fetch_all(cursor, shape)
 
-            return {
-                "student": student_series,
-                "major": major_series,
-                "class": class_series,
-                "student_meta": {"major": major, "class_name": class_name},
-            }
+    def get_student_course_scores_by_semester(self, student_id: str):
+        """一次查询取得学生所有学期的每门课成绩及课程平均分（雷达图数据）。
 
-    def get_student_semester_course_scores(self, student_id: str, semester: str):
-        """获取某学生在指定学期的每门课成绩，并附带课程平均分（同学期，同课程）。
-
-        返回：
-        [{
-          "course_id":..., "course_name":..., "final_score":..., "course_avg":...
-        }, ...]
+        返回 {学期: [{"course_id", "course_name", "final_score", "course_avg"}, ...]}，学期升序
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        with self.get_read_connection() as conn:
+            cursor = self._tuple_cursor(conn)
             cursor.execute(
                 '''
                 SELECT
+                    g.semester,
                     c.course_id,
                     c.course_name,
                     g.final_score,
-                    (
-                        SELECT AVG(g2.final_score)
-                        FROM grades g2
-                        WHERE g2.course_id = g.course_id
-                          AND g2.semester = g.semester
-                          AND g2.final_score IS NOT NULL
-                    ) AS course_avg
+                    a.score_total / 100.0 / a.score_count AS course_avg
                 FROM grades g
                 JOIN courses c ON g.course_id = c.course_id
+                LEFT JOIN course_semester_avg a
+                  ON a.course_id = g.course_id AND a.semester = g.semester
                 WHERE g.student_id = ?
-                  AND g.semester = ?
+                  AND g.semester IS NOT NULL AND TRIM(g.semester) != ''
                   AND g.final_score IS NOT NULL
-                ORDER BY c.course_id
+                ORDER BY g.semester, c.course_id
                 ''',
-                (student_id, semester),
+                (student_id,),
             )
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            result = {}
+            for semester, course_id, course_name, final_score, course_avg in cursor.fetchall():
+                result.setdefault(semester, []).append({
+                    "course_id": course_id,
+                    "course_name": course_name,
+                    "final_score": final_score,
+                    "course_avg": course_avg,
+                })
+            return result
     
     def delete_grade(self, student_id, course_id):
         """删除成绩"""
@@ -828,13 +974,16 @@ class DatabaseManager:
                 WHERE student_id = ? AND course_id = ?
             ''', (student_id, course_id))
             conn.commit()
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        if deleted:
+            self._notify_grades_changed([student_id])
+        return deleted
     
     # ==================== 统计分析 ====================
     
     def get_statistics(self):
         """获取统计数据"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             
             stats = {}
@@ -866,10 +1015,10 @@ class DatabaseManager:
             
             return stats
     
-    def get_grade_distribution(self, course_id=None):
+    def get_grade_distribution(self, course_id=None, shape='dict'):
         """获取成绩分布"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        with self.get_read_connection() as conn:
+            cursor = self._tuple_cursor(conn)
             
             if course_id:
                 cursor.execute('''
@@ -901,23 +1050,82 @@ class DatabaseManager:
                         END
                 ''')
             
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
+    
+    def get_classroom_utilization(self, shape='dict'):
+        """各教室、各时间段的最高利用率（已选人数 / 容量，最大为 1），供资源利用率热力图使用"""
+        with self.get_read_connection() as conn:
+            cursor = self._tuple_cursor(conn)
+            cursor.execute('''
+                SELECT c.classroom, c.class_time,
+                       MAX(MIN(CAST(COALESCE(e.enrolled_count, 0) AS REAL)
+                               / COALESCE(NULLIF(c.capacity, 0), 1), 1.0)) as utilization
+                FROM courses c
+                LEFT JOIN (
+                    SELECT course_id, COUNT(*) as enrolled_count
+                    FROM enrollments
+                    GROUP BY course_id
+                ) e ON e.course_id = c.course_id
+                GROUP BY c.classroom, c.class_time
+            ''')
+            return self._fetch_all(cursor, shape)
     
     # ==================== 日志管理 ====================
     
-    def get_logs(self, limit=100):
-        """获取日志"""
+    def get_logs(self, limit=100, shape='dict', username=None, action=None,
+                 start=None, end=None, keyword=None, offset=0):
+        """获取日志（按时间倒序），可按用户、操作类型、时间范围 [start, end) 及描述关键字筛选
+
+        start/end 为 'YYYY-MM-DD' 或 'YYYY-MM-DD HH:MM:SS'（UTC），使用 logs 表上的索引
+        """
+        self.flush_logs()
+        conditions = []
+        params = []
+        if username:
+            conditions.append('username = ?')
+            params.append(username)
+        if action:
+            conditions.append('action = ?')
+            params.append(action)
+        if start:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end:
+            conditions.append('timestamp < ?')
+            params.append(end)
+        if keyword:
+            conditions.append('description LIKE ?')
+            params.append(f'%{keyword}%')
+        where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+        
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+            cursor = self._tuple_cursor(conn)
+            cursor.execute(f'''
                 SELECT * FROM logs 
+                {where}
                 ORDER BY timestamp DESC 
-                LIMIT ?
-            ''', (limit,))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+                LIMIT ? OFFSET ?
+            ''', (*params, limit, offset))
+            return self._fetch_all(cursor, shape)
+    
+    def archive_logs(self, retention_days=180):
+        """把超过 retention_days 天的日志按月压缩归档（见 database/log_archive.py），返回归档条数"""
+        self.flush_logs()
+        cutoff = log_archive.retention_cutoff(retention_days)
+        with self.get_connection() as conn:
+            return log_archive.archive_logs(conn, cutoff, self.log_archive_dir)
+    
+    def get_log_archives(self):
+        """已归档的月份列表（YYYY-MM）"""
+        return log_archive.list_archives(self.log_archive_dir)
+    
+    def get_archived_logs(self, month, limit=100):
+        """读取某月的归档日志（按时间倒序）"""
+        return log_archive.read_archive(self.log_archive_dir, month)[:limit]
     
     def clear_logs(self):
         """清空日志"""
+        self.flush_logs()
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM logs')
@@ -947,10 +1155,10 @@ class DatabaseManager:
         """添加成绩（别名方法）"""
         return self.add_or_update_grade(grade_data)
     
-    def get_teacher_students(self, teacher_id):
+    def get_teacher_students(self, teacher_id, shape='dict'):
         """获取选了该教师课程的所有学生（去重），包含选课信息"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = self._tuple_cursor(conn)
             cursor.execute('''
                 SELECT s.*, u.status,
                     GROUP_CONCAT(c.course_id || ': ' || c.course_name, ', ') as courses
@@ -962,7 +1170,7 @@ class DatabaseManager:
                 GROUP BY s.student_id
                 ORDER BY s.student_id
             ''', (teacher_id,))
-            return [self._dict_from_row(row) for row in cursor.fetchall()]
+            return self._fetch_all(cursor, shape)
     
     def get_student_enrollments(self, student_id):
         """获取学生的选课列表（别名方法）"""
@@ -5,8 +5,15 @@
 import sqlite3
 import hashlib
 import random
+import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import truncate_score
+from database.migrations import COURSE_AVG_TABLES, LATEST_VERSION, LOG_INDEXES, RISK_TABLES, set_version
+
 
 class DatabaseInitializer:
     """数据库初始化类"""
@@ -138,6 +145,16 @@ class DatabaseInitializer:
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        for sql in LOG_INDEXES:
+            self.cursor.execute(sql)
+        
+        # 学业预警表
+        for sql in RISK_TABLES:
+            self.cursor.execute(sql)
+        
+        # 课程-学期平均分表（成绩写入时由触发器维护）
+        for sql in COURSE_AVG_TABLES:
+            self.cursor.execute(sql)
         
         self.conn.commit()
         print("[OK] 数据库表创建完成")
@@ -172,6 +189,8 @@ class DatabaseInitializer:
         # 插入课程并生成选课和成绩
         self._insert_courses_and_grades()
         
+        # 新生成的数据已符合所有迁移的要求
+        set_version(self.conn, LATEST_VERSION)
         self.conn.commit()
         print("[OK] 示例数据插入完成")
         self.conn.close()
@@ -452,8 +471,8 @@ class DatabaseInitializer:
                         if exam_score < 0: exam_score = 0
                         if exam_score > 100: exam_score = 100
                         
-                        # 重新计算 final 以保持一致性
-                        final_score = usual_score * 0.4 + exam_score * 0.6
+                        # 重新计算 final 以保持一致性（与录入成绩时相同，保留两位小数向下截断）
+                        final_score = truncate_score(usual_score * 0.4 + exam_score * 0.6)
                         
                         if final_score >= 90: grade_level = '优秀'
                         elif final_score >= 80: grade_level = '良好'
@@ -0,0 +1,99 @@
+"""
+日志归档模块
+超过保留期的日志按月份追加写入 gzip 压缩的 JSON Lines 文件（logs-YYYY-MM.jsonl.gz），
+写入成功后再从 logs 表删除，使 logs 表只保留近期数据
+"""
+import glob
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+
+ARCHIVE_PATTERN = 'logs-*.jsonl.gz'
+MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+# 每次从 logs 表取出的行数，避免一次性读入全部过期日志
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def archive_file(archive_dir, month):
+    """某月（YYYY-MM）的归档文件路径"""
+    return os.path.join(archive_dir, f'logs-{month}.jsonl.gz')
+
+
+def retention_cutoff(retention_days, now=None):
+    """保留期的起点（UTC，与 logs.timestamp 格式一致）"""
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def archive_logs(conn, cutoff, archive_dir):
+    """把 timestamp 早于 cutoff 的日志归档并删除，返回归档条数
+
+    按 log_id 分批处理：每批先写入并关闭归档文件，再在同一事务中删除这批日志；
+    写文件失败时不删除，已写入但未删除的日志下次会被重复归档（不会丢失）
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT log_id, username, action, description, timestamp
+            FROM logs
+            WHERE timestamp < ? AND log_id > ?
+            ORDER BY log_id
+            LIMIT ?
+        ''', (cutoff, last_id, ARCHIVE_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            month = str(row[4])[:7]
+            by_month.setdefault(month, []).append(row)
+
+        for month, month_rows in by_month.items():
+            # gzip 支持追加：每次追加一个新的压缩成员，读取时自动连续解压
+            with gzip.open(archive_file(archive_dir, month), 'at', encoding='utf-8') as f:
+                for log_id, username, action, description, timestamp in month_rows:
+                    f.write(json.dumps({
+                        'log_id': log_id,
+                        'username': username,
+                        'action': action,
+                        'description': description,
+                        'timestamp': timestamp,
+                    }, ensure_ascii=False))
+                    f.write('\n')
+
+        last_id = rows[-1][0]
+        with conn:
+            conn.execute('DELETE FROM logs WHERE timestamp < ? AND log_id <= ?',
+                         (cutoff, last_id))
+        archived += len(rows)
+    return archived
+
+
+def list_archives(archive_dir):
+    """已归档的月份列表（升序）"""
+    months = []
+    for path in glob.glob(os.path.join(archive_dir, ARCHIVE_PATTERN)):
+        name = os.path.basename(path)
+        months.append(name[len('logs-'):-len('.jsonl.gz')])
+    return sorted(months)
+
+
+def read_archive(archive_dir, month):
+    """读取某月的归档日志（按时间倒序），文件不存在时返回空列表"""
+    if not MONTH_RE.match(month or ''):
+        raise ValueError(f'月份格式应为 YYYY-MM: {month}')
+    path = archive_file(archive_dir, month)
+    if not os.path.exists(path):
+        return []
+    logs = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                logs.append(json.loads(line))
+    logs.sort(key=lambda log: (log['timestamp'] or '', log['log_id']), reverse=True)
+    return logs
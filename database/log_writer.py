@@ -0,0 +1,148 @@
+"""
+日志异步写入模块
+add_log 只把日志放入队列，由后台线程按条数或时间间隔批量写入（一次事务），
+登录等高频操作不再每次都提交一个写事务
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.request import pathname2url
+
+
+class LogWriter:
+    """批量写入 logs 表的后台线程
+
+    - 缓冲满 batch_size 条或距上次写入超过 flush_interval 秒时写入
+    - flush() 立即写入并等待调用前加入的日志全部写完（不等待之后其他线程新加入的日志）；
+      进程正常退出时自动调用
+    - close() 之后加入的日志直接同步写入
+    - 进程被强制终止时，尚未写入的日志会丢失
+    """
+
+    def __init__(self, db_path, batch_size=200, flush_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # 队列元素为 (序号, 日志)，None 为 close() 放入的结束标记
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        # 已入队的最大序号、尚未写完的序号（flush() 按序号等待）
+        self._state = threading.Condition()
+        self._seq = 0
+        self._unfinished = set()
+
+    def add(self, username, action, description):
+        """加入队列；时间戳按入队时刻记录（与 CURRENT_TIMESTAMP 一样使用UTC）"""
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        entry = (username, action, description, timestamp)
+        with self._state:
+            closed = self._closed
+            if not closed:
+                self._seq += 1
+                self._unfinished.add(self._seq)
+                self._queue.put((self._seq, entry))
+        if closed:
+            # 后台线程已停止，直接写入
+            self._insert([entry])
+        else:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None or self._closed:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _drain(self, first=None):
+        """从队列中取出最多 batch_size 条"""
+        batch = [] if first is None else [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            if first is None:
+                # close() 放入的结束标记
+                self._write([first] + self._drain())
+                return
+            # 稍等片刻凑满一批，降低事务次数
+            if self._queue.qsize() < self.batch_size - 1:
+                time.sleep(min(0.05, self.flush_interval))
+            self._write(self._drain(first))
+
+    def _write(self, items):
+        batch = [item for item in items if item is not None]
+        try:
+            if batch:
+                self._insert([entry for _, entry in batch])
+        finally:
+            # 标记已处理，flush() 据此等待后台线程手中的批次写完
+            with self._state:
+                self._unfinished.difference_update(seq for seq, _ in batch)
+                self._state.notify_all()
+
+    def _insert(self, batch):
+        with self._write_lock:
+            try:
+                # mode=rw：数据库文件已被删除时不会重新创建空文件
+                uri = 'file:' + pathname2url(os.path.abspath(self.db_path)) + '?mode=rw'
+                conn = sqlite3.connect(uri, uri=True, timeout=30)
+                try:
+                    with conn:
+                        conn.executemany('''
+                            INSERT INTO logs (username, action, description, timestamp)
+                            VALUES (?, ?, ?, ?)
+                        ''', batch)
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"写入日志失败（{len(batch)}条）: {e}")
+
+    def flush(self):
+        """立即写入调用前加入的全部日志（包括后台线程已取出、尚未写完的批次）"""
+        with self._state:
+            target = self._seq
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._write(batch)
+            last = batch[-1]
+            if last is not None and last[0] >= target:
+                break
+        with self._state:
+            self._state.wait_for(
+                lambda: not self._unfinished or min(self._unfinished) > target
+            )
+
+    def close(self):
+        """停止后台线程，写入剩余日志；之后加入的日志同步写入"""
+        with self._state:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+        self.flush()
@@ -0,0 +1,186 @@
+"""
+数据库迁移模块
+用 SQLite 的 PRAGMA user_version 记录已执行到的版本，打开数据库时自动执行未完成的迁移
+"""
+
+
+def _normalize_final_scores(conn):
+    """总评成绩统一保存为两位小数（向下截断），查询时无需再调用自定义函数截断
+
+    先 ROUND(…, 6) 再截断，避免 0.29 * 100 = 28.999… 这类浮点误差把已截断的值再减一分
+    """
+    conn.execute('''
+        UPDATE grades
+        SET final_score = CAST(ROUND(final_score * 100, 6) AS INTEGER) / 100.0
+        WHERE final_score IS NOT NULL
+          AND final_score != CAST(ROUND(final_score * 100, 6) AS INTEGER) / 100.0
+    ''')
+
+
+LOG_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_logs_username_ts ON logs (username, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_logs_action_ts ON logs (action, timestamp)',
+]
+
+
+def _create_log_indexes(conn):
+    """日志表按时间、用户、操作类型建立索引，日志查询和过期归档不再全表扫描排序"""
+    for sql in LOG_INDEXES:
+        conn.execute(sql)
+
+
+RISK_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS student_risk (
+        student_id TEXT NOT NULL,
+        semester TEXT NOT NULL,
+        term_avg REAL,
+        class_avg REAL,
+        failed_credits REAL DEFAULT 0,
+        score_drop REAL,
+        below_streak INTEGER DEFAULT 0,
+        absent_count INTEGER DEFAULT 0,
+        flags TEXT NOT NULL,
+        risk_level INTEGER NOT NULL,
+        warn INTEGER DEFAULT 0,
+        absence INTEGER DEFAULT 0,
+        dropout INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (student_id, semester)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_student_risk_semester ON student_risk (semester, risk_level)',
+    '''
+    CREATE TABLE IF NOT EXISTS risk_term_counts (
+        semester TEXT PRIMARY KEY,
+        warn INTEGER DEFAULT 0,
+        absence INTEGER DEFAULT 0,
+        dropout INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # 最近一次写入预警结果所依据的数据时间，多个工作进程各自扫描时旧数据不覆盖新结果
+    '''
+    CREATE TABLE IF NOT EXISTS risk_scan (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        data_loaded_at REAL NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+
+def _create_risk_tables(conn):
+    """学业预警结果表（见 analytics/risk.py）"""
+    for sql in RISK_TABLES:
+        conn.execute(sql)
+
+
+# 课程-学期平均分：总评成绩以“分”为单位（×100 取整）累加，增删改时加减不会产生浮点误差累积
+_COURSE_AVG_ADD = '''
+        INSERT INTO course_semester_avg (course_id, semester, score_total, score_count)
+        VALUES (NEW.course_id, NEW.semester, CAST(ROUND(NEW.final_score * 100) AS INTEGER), 1)
+        ON CONFLICT (course_id, semester) DO UPDATE SET
+            score_total = score_total + excluded.score_total,
+            score_count = score_count + 1;
+'''
+_COURSE_AVG_REMOVE = '''
+        UPDATE course_semester_avg SET
+            score_total = score_total - CAST(ROUND(OLD.final_score * 100) AS INTEGER),
+            score_count = score_count - 1
+        WHERE course_id = OLD.course_id AND semester = OLD.semester;
+        DELETE FROM course_semester_avg
+        WHERE course_id = OLD.course_id AND semester = OLD.semester AND score_count <= 0;
+'''
+_NEW_SCORED = 'NEW.final_score IS NOT NULL AND NEW.semester IS NOT NULL'
+_OLD_SCORED = 'OLD.final_score IS NOT NULL AND OLD.semester IS NOT NULL'
+_GRADE_KEY_COLUMNS = 'UPDATE OF course_id, semester, final_score'
+
+COURSE_AVG_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS course_semester_avg (
+        course_id TEXT NOT NULL,
+        semester TEXT NOT NULL,
+        score_total INTEGER NOT NULL DEFAULT 0,
+        score_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (course_id, semester)
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_course_avg_insert AFTER INSERT ON grades
+    WHEN {_NEW_SCORED}
+    BEGIN {_COURSE_AVG_ADD} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_course_avg_delete AFTER DELETE ON grades
+    WHEN {_OLD_SCORED}
+    BEGIN {_COURSE_AVG_REMOVE} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_course_avg_update_old AFTER {_GRADE_KEY_COLUMNS} ON grades
+    WHEN {_OLD_SCORED}
+    BEGIN {_COURSE_AVG_REMOVE} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_course_avg_update_new AFTER {_GRADE_KEY_COLUMNS} ON grades
+    WHEN {_NEW_SCORED}
+    BEGIN {_COURSE_AVG_ADD} END
+    ''',
+]
+
+
+def _create_course_avg_table(conn):
+    """课程-学期平均分表，由 grades 表上的触发器在成绩写入时维护，并按现有成绩初始化"""
+    for sql in COURSE_AVG_TABLES:
+        conn.execute(sql)
+    conn.execute('DELETE FROM course_semester_avg')
+    conn.execute('''
+        INSERT INTO course_semester_avg (course_id, semester, score_total, score_count)
+        SELECT course_id, semester, SUM(CAST(ROUND(final_score * 100) AS INTEGER)), COUNT(*)
+        FROM grades
+        WHERE final_score IS NOT NULL AND semester IS NOT NULL
+        GROUP BY course_id, semester
+    ''')
+
+
+# (版本号, 说明, 执行函数)，版本号递增
+MIGRATIONS = [
+    (1, '总评成绩截断为两位小数', _normalize_final_scores),
+    (2, '日志表索引', _create_log_indexes),
+    (3, '学业预警表', _create_risk_tables),
+    (4, '课程-学期平均分表', _create_course_avg_table),
+    (5, '学业预警扫描记录表', _create_risk_tables),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def set_version(conn, version):
+    # PRAGMA 不支持参数绑定
+    conn.execute(f'PRAGMA user_version = {int(version)}')
+
+
+def apply_migrations(conn):
+    """执行尚未执行的迁移，返回执行的迁移数（尚未建表的数据库不处理）"""
+    has_tables = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'grades'"
+    ).fetchone()
+    if not has_tables:
+        return 0
+
+    version = get_version(conn)
+    applied = 0
+    for target, description, migrate in MIGRATIONS:
+        if target <= version:
+            continue
+        print(f"执行数据库迁移 {target}: {description}")
+        migrate(conn)
+        set_version(conn, target)
+        conn.commit()
+        applied += 1
+    return applied
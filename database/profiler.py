@@ -0,0 +1,289 @@
+"""
+SQL 性能分析模块
+按归一化后的SQL语句统计执行次数、总耗时、最大耗时和返回行数，并可输出查询计划
+
+启用方式：
+    1. 设置环境变量 TEACHING_SQL_PROFILE=sql_profile.json 后启动程序，
+       退出时统计结果写入该文件
+    2. 代码中调用 DatabaseManager().enable_profiling()
+
+查看报告：
+    python database/profiler.py sql_profile.json --db teaching_system.db --top 20
+"""
+import argparse
+import atexit
+import json
+import re
+import sqlite3
+import threading
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """归一化SQL：字面量替换为 ?，IN 列表合并，空白压缩为单个空格"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (?...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip().rstrip(';')
+
+
+class QueryStats:
+    """单条归一化语句的统计数据"""
+
+    def __init__(self, sample):
+        self.sample = sample  # 首次出现时的原始SQL，用于生成查询计划
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def to_dict(self, sql):
+        return {
+            'sql': sql,
+            'sample': self.sample,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'rows': self.rows,
+        }
+
+
+class QueryProfiler:
+    """SQL 统计收集器（线程安全）
+
+    语句的耗时包括 execute 本身以及之后读取结果的时间
+    （SQLite 在读取结果时才逐行执行查询）。
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, conn):
+        """返回带统计功能的连接代理"""
+        return ProfiledConnection(conn, self)
+
+    def record(self, sql, elapsed, rows=0, executed=True):
+        """累计一条语句的耗时与行数；executed 为 False 表示只是读取结果"""
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(sql)
+            if executed:
+                stats.count += 1
+            stats.total += elapsed
+            stats.rows += rows
+            if elapsed > stats.max:
+                stats.max = elapsed
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def report(self, top=20, sort_by='total'):
+        """按 total/avg/max/count/rows 排序，返回前 top 条语句的统计"""
+        with self._lock:
+            items = [stats.to_dict(sql) for sql, stats in self._stats.items()]
+        key = {'total': 'total_ms', 'avg': 'avg_ms', 'max': 'max_ms'}.get(sort_by, sort_by)
+        items.sort(key=lambda item: item[key], reverse=True)
+        return items[:top] if top else items
+
+    def save(self, path):
+        """将统计结果写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(top=0), f, ensure_ascii=False, indent=2)
+
+    def save_at_exit(self, path):
+        atexit.register(self.save, path)
+
+
+class ProfiledCursor:
+    """游标代理：统计 execute 与 fetch 的耗时和行数"""
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._sql = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # row_factory 等属性需设置到原游标上
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = next(self._cursor)
+        except StopIteration:
+            self._fetched(start, 0)
+            raise
+        self._fetched(start, 1)
+        return row
+
+    def _fetched(self, start, rows):
+        if self._sql is not None:
+            self._profiler.record(self._sql, time.perf_counter() - start, rows, executed=False)
+
+    def execute(self, sql, parameters=()):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, parameters)
+        finally:
+            self._profiler.record(sql, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_parameters)
+        finally:
+            self._profiler.record(sql, time.perf_counter() - start)
+        return self
+
+    def executescript(self, script):
+        self._sql = None
+        start = time.perf_counter()
+        try:
+            self._cursor.executescript(script)
+        finally:
+            self._profiler.record(script, time.perf_counter() - start)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+
+class ProfiledConnection:
+    """连接代理：通过它创建的游标都会被统计，其余属性直接转发给原连接"""
+
+    def __init__(self, conn, profiler):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_profiler', profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursor(self._conn.cursor(*args, **kwargs), self._profiler)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+def explain_query_plan(conn, sql):
+    """返回语句的查询计划（参数以 NULL 代替，不影响 SQLite 选择索引）"""
+    stripped = _STRING_RE.sub('', sql)
+    if ';' in stripped.strip().rstrip(';'):
+        return ['（多条语句，无查询计划）']
+    params = [None] * stripped.count('?')
+    try:
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    except sqlite3.Error as e:
+        return [f'（无法获取查询计划: {e}）']
+    # 每行为 (id, parent, notused, detail)，按 parent 缩进
+    depth = {0: 0}
+    lines = []
+    for row in rows:
+        node_id, parent, detail = row[0], row[1], row[-1]
+        depth[node_id] = depth.get(parent, 0) + 1
+        lines.append('  ' * (depth[node_id] - 1) + str(detail))
+    return lines
+
+
+def format_report(items, conn=None):
+    """把 report() 的结果格式化为文本；提供数据库连接时附带查询计划"""
+    lines = []
+    for index, item in enumerate(items, 1):
+        lines.append(
+            f"#{index} 次数 {item['count']}  总耗时 {item['total_ms']:.1f}ms  "
+            f"平均 {item['avg_ms']:.2f}ms  最大 {item['max_ms']:.2f}ms  行数 {item['rows']}"
+        )
+        lines.append('    ' + item['sql'])
+        if conn is not None:
+            for plan_line in explain_query_plan(conn, item['sample']):
+                lines.append('      计划: ' + plan_line)
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main():
+    """命令行：读取统计文件，输出耗时最多的语句及其查询计划"""
+    parser = argparse.ArgumentParser(description='SQL 性能分析报告')
+    parser.add_argument('profile', nargs='?', default='sql_profile.json', help='统计结果文件')
+    parser.add_argument('--db', default='teaching_system.db', help='用于生成查询计划的数据库')
+    parser.add_argument('--top', type=int, default=20, help='显示前多少条（默认 20）')
+    parser.add_argument('--sort', default='total', choices=['total', 'avg', 'max', 'count', 'rows'],
+                        help='排序字段（默认 total）')
+    args = parser.parse_args()
+
+    with open(args.profile, encoding='utf-8') as f:
+        items = json.load(f)
+    key = {'total': 'total_ms', 'avg': 'avg_ms', 'max': 'max_ms'}.get(args.sort, args.sort)
+    items.sort(key=lambda item: item[key], reverse=True)
+
+    # 使用 DatabaseManager 的连接，保证连接设置与运行时一致；
+    # 不开启SQL统计，否则退出时会覆盖正在读取的统计文件
+    os.environ.pop('TEACHING_SQL_PROFILE', None)
+    conn = None
+    if args.db:
+        from database.db_manager import DatabaseManager
+        with DatabaseManager(args.db).get_connection() as conn:
+            pass
+    print(format_report(items[:args.top], conn))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+只读连接池
+统计分析类查询使用独立的只读连接（mode=ro + PRAGMA query_only），不与选课、录入成绩等写操作共用连接；
+可选使用定期通过备份 API 刷新的快照副本，使报表查询完全不读取主数据库文件
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+
+class ReadPool:
+    """只读连接池（线程安全），连接按需创建，最多 size 个同时使用"""
+
+    def __init__(self, db_path, size=4, cached_statements=128):
+        self.db_path = db_path
+        self.size = size
+        self.cached_statements = cached_statements
+
+        self.snapshot_path = None
+        self.refresh_interval = None
+        self.generation = 0   # 快照每刷新一次加 1，旧连接归还时关闭
+        self.refreshed_at = 0.0  # 当前快照开始复制的时间（time.time()）
+        self._idle = []       # [(generation, conn), ...]
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def _open(self):
+        path = self.snapshot_path or self.db_path
+        uri = 'file:' + pathname2url(os.path.abspath(path)) + '?mode=ro'
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA query_only = ON')
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def connection(self, timeout=30):
+        """取出一个只读连接，用完自动归还"""
+        if not self._slots.acquire(timeout=timeout):
+            raise sqlite3.OperationalError('只读连接池已满')
+        try:
+            with self._lock:
+                generation = self.generation
+                conn = None
+                while self._idle:
+                    conn_generation, idle_conn = self._idle.pop()
+                    if conn_generation == generation:
+                        conn = idle_conn
+                        break
+                    idle_conn.close()
+            if conn is None:
+                conn = self._open()
+
+            try:
+                yield conn
+            finally:
+                # 只读连接上不会有未提交的写入，结束可能残留的读事务即可
+                if conn.in_transaction:
+                    conn.rollback()
+                with self._lock:
+                    if generation == self.generation:
+                        self._idle.append((generation, conn))
+                        conn = None
+                if conn is not None:
+                    conn.close()
+        finally:
+            self._slots.release()
+
+    def enable_snapshot(self, snapshot_path=None, refresh_interval=300):
+        """改为读取快照副本，并每 refresh_interval 秒刷新一次（0 表示只生成一次）"""
+        self.snapshot_path = snapshot_path or self.db_path + '.snapshot'
+        self.refresh_interval = refresh_interval
+        self.refresh_snapshot()
+        if refresh_interval and self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresher.start()
+
+    def refresh_snapshot(self):
+        """用备份 API 复制主数据库到临时文件，再原子替换快照文件"""
+        tmp_path = self.snapshot_path + '.tmp'
+        started = time.time()
+        source = sqlite3.connect(self.db_path)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        try:
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            # Windows 下快照文件仍被打开时无法替换，下次再试
+            print(f"刷新分析快照失败: {e}")
+            return False
+        with self._lock:
+            self.generation += 1
+            self.refreshed_at = started
+            stale, self._idle = self._idle, []
+        for _, conn in stale:
+            conn.close()
+        return True
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh_snapshot()
+            except Exception as e:
+                print(f"刷新分析快照失败: {e}")
+
+    def close(self):
+        """停止快照刷新、关闭空闲连接并删除快照文件（之后的查询直接读取主数据库）"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=10)
+            self._refresher = None
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.generation += 1
+            snapshot_path, self.snapshot_path = self.snapshot_path, None
+        for _, conn in idle:
+            conn.close()
+        if snapshot_path:
+            remove_snapshot(snapshot_path)
+
+
+def remove_snapshot(snapshot_path):
+    """删除快照文件及刷新时的临时文件（每份都是整个数据库的副本）"""
+    for path in (snapshot_path, snapshot_path + '.tmp'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Windows 下仍有连接打开时无法删除
+            print(f"删除分析快照失败: {e}")
@@ -0,0 +1,59 @@
+"""
+查询结果模块
+以“列名 + 元组行”的紧凑形式保存查询结果，需要时再转换为字典或命名元组，
+避免大列表逐行构造 sqlite3.Row 和字典的开销
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def _record_type(columns):
+    """按列名生成（并缓存）命名元组类型；非法标识符的列名自动改名为 _0、_1 ..."""
+    return namedtuple('Record', columns, rename=True)
+
+
+class TableRows:
+    """查询结果：columns 为列名元组，rows 为元组列表"""
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns, rows):
+        self.columns = tuple(columns)
+        self.rows = rows
+
+    @classmethod
+    def from_cursor(cls, cursor):
+        """读取游标的全部结果（游标应以元组形式返回行）"""
+        columns = [d[0] for d in cursor.description] if cursor.description else []
+        return cls(columns, cursor.fetchall())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def to_dicts(self):
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+    def to_namedtuples(self):
+        record = _record_type(self.columns)
+        return [record._make(row) for row in self.rows]
+
+    def to(self, shape):
+        """转换为指定形式：dict / tuple / named / rows"""
+        if shape == 'dict':
+            return self.to_dicts()
+        if shape == 'tuple':
+            return self.rows
+        if shape == 'named':
+            return self.to_namedtuples()
+        if shape == 'rows':
+            return self
+        raise ValueError(f'未知的结果形式: {shape}')
+
+    def to_wire(self):
+        """网络传输格式：列名只发送一次"""
+        return {'__columns__': list(self.columns), '__rows__': self.rows}
@@ -1,9 +1,21 @@
 """
 GUI界面模块
+各窗口在首次访问时才导入（管理员/教师/学生界面依赖 matplotlib，登录窗口启动时不必加载）
 """
-from .login_window import LoginWindow
-from .admin_window import AdminWindow
-from .teacher_window import TeacherWindow
-from .student_window import StudentWindow
+import importlib
 
-__all__ = ['LoginWindow', 'AdminWindow', 'TeacherWindow', 'StudentWindow']
\ No newline at end of file
+_WINDOWS = {
+    'LoginWindow': '.login_window',
+    'AdminWindow': '.admin_window',
+    'TeacherWindow': '.teacher_window',
+    'StudentWindow': '.student_window',
+}
+
+__all__ = ['LoginWindow', 'AdminWindow', 'TeacherWindow', 'StudentWindow']
+
+
+def __getattr__(name):
+    module = _WINDOWS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
@@ -7,13 +7,12 @@ from tkinter import ttk, messagebox, filedialog
 import sys
 import os
 
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_manager import DatabaseManager
+from analytics import get_analytics, get_ranking_service, get_risk_engine
 from visualization.visualization_core import show_visual
+from visualization.loader import load_matplotlib
 
 
 class AdminWindow:
@@ -404,10 +403,10 @@ class AdminWindow:
     def show_charts(self):
         """显示数据可视化图表"""
         try:
+            matplotlib = load_matplotlib()
+            matplotlib.use('TkAgg')
             import matplotlib.pyplot as plt
             from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-            import matplotlib
-            matplotlib.use('TkAgg')
             
             # 创建新窗口
             chart_win = tk.Toplevel(self.root)
@@ -1563,12 +1562,14 @@ class AdminWindow:
         tab_fail_list = tk.Frame(notebook, bg='white')
         tab_major_rank = tk.Frame(notebook, bg='white')
         tab_semester_trend = tk.Frame(notebook, bg='white')
+        tab_risk = tk.Frame(notebook, bg='white')
 
         notebook.add(tab_grade_class, text="年级-班级概览")
         notebook.add(tab_course_teacher, text="课程-教师分析")
         notebook.add(tab_fail_list, text="挂科名单")
         notebook.add(tab_major_rank, text="专业成绩排名")
         notebook.add(tab_semester_trend, text="学期趋势")
+        notebook.add(tab_risk, text="学业预警")
 
         top_frame_gc = tk.Frame(tab_grade_class, bg='white')
         top_frame_gc.pack(fill=tk.X, padx=20, pady=10)
@@ -1586,7 +1587,7 @@ class AdminWindow:
         # 加载所有学期
         semester_values_gc = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT DISTINCT semester FROM grades WHERE semester IS NOT NULL AND semester <> '' ORDER BY semester DESC")
                 semester_values_gc.extend([r[0] for r in cur.fetchall()])
@@ -1599,7 +1600,7 @@ class AdminWindow:
         tk.Label(top_frame_gc, text="年级:", font=("微软雅黑", 11), bg='white').pack(side=tk.LEFT, padx=5)
         grade_values = []
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT DISTINCT grade FROM students WHERE grade IS NOT NULL AND grade <> '' ORDER BY grade")
                 rows = cur.fetchall()
@@ -1620,7 +1621,7 @@ class AdminWindow:
 
             grades = []
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     if sel_semester and sel_semester != "全部":
                         cur.execute(
@@ -1654,6 +1655,9 @@ class AdminWindow:
 
         def on_show_grade_class_overview():
             import math
+            load_matplotlib()
+            import matplotlib.pyplot as plt
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
             grade = self.grade_gc_var.get().strip()
             semester = self.semester_gc_var.get().strip()
             
@@ -1662,49 +1666,24 @@ class AdminWindow:
                 return
             class_stats = []
             try:
-                with self.db.get_connection() as conn:
-                    cur = conn.cursor()
-                    
-                    conditions = ["s.grade = ?"]
-                    params = [grade]
-                    
-                    if semester and semester != "全部":
-                        conditions.append("g.semester = ?")
-                        params.append(semester)
-                        
-                    where_clause = " AND ".join(conditions)
-                    
-                    sql = f"""
-                        SELECT s.class_name,
-                               s.major,
-                               COUNT(DISTINCT s.student_id) AS student_count,
-                               AVG(g.final_score) AS avg_score,
-                               SUM(CASE WHEN g.final_score < 60 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS fail_rate,
-                               SUM(CASE WHEN g.final_score >= 90 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS excellent_rate,
-                               SUM(CASE WHEN g.final_score >= 80 AND g.final_score < 90 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS good_rate
-                        FROM students s
-                        JOIN grades g ON s.student_id = g.student_id
-                        WHERE {where_clause}
-                        GROUP BY s.class_name, s.major
-                        ORDER BY s.class_name
-                    """
-                    
-                    cur.execute(sql, params)
-                    for row in cur.fetchall():
-                        raw_avg = row[3] or 0
-                        # 保留两位小数向下取整
-                        avg_score = math.floor(raw_avg * 100) / 100
-                        class_stats.append(
-                            {
-                                "class_name": row[0],
-                                "major": row[1],
-                                "student_count": row[2],
-                                "avg_score": avg_score,
-                                "fail_rate": row[4] or 0,
-                                "excellent_rate": row[5] or 0,
-                                "good_rate": row[6] or 0,
-                            }
-                        )
+                rows = get_analytics(self.db).group_stats(
+                    by=('class_name', 'major'), grade=grade, semester=semester
+                )
+                rows.sort(key=lambda r: r['class_name'])
+                for row in rows:
+                    # 保留两位小数向下取整
+                    avg_score = math.floor((row['avg_score'] or 0) * 100) / 100
+                    class_stats.append(
+                        {
+                            "class_name": row['class_name'],
+                            "major": row['major'],
+                            "student_count": row['student_count'],
+                            "avg_score": avg_score,
+                            "fail_rate": row['fail_rate'] or 0,
+                            "excellent_rate": row['excellent_rate'] or 0,
+                            "good_rate": row['good_rate'] or 0,
+                        }
+                    )
             except Exception as e:
                 messagebox.showerror("错误", f"获取班级统计数据失败: {e}")
                 return
@@ -1798,7 +1777,7 @@ class AdminWindow:
         # 加载学期选项
         ct_semester_values = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT DISTINCT semester FROM courses WHERE semester IS NOT NULL AND semester <> '' ORDER BY semester DESC")
                 ct_semester_values.extend([r[0] for r in cur.fetchall()])
@@ -1852,7 +1831,7 @@ class AdminWindow:
             teacher_set = set()
             
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     sql = """
                         SELECT c.course_name, t.teacher_id, t.name
@@ -1972,63 +1951,32 @@ class AdminWindow:
             else:
                 teacher_id = self._teacher_id_map.get(teacher_label)
 
-            conditions = ["g.final_score IS NOT NULL"]
-            params = []
-            if semester and semester != "全部":
-                conditions.append("c.semester = ?")
-                params.append(semester)
-            if course_name:
-                conditions.append("c.course_name = ?")
-                params.append(course_name)
-            if teacher_id:
-                conditions.append("t.teacher_id = ?")
-                params.append(teacher_id)
-
-            where_clause = " AND ".join(conditions)
-
             try:
-                with self.db.get_connection() as conn:
-                    cur = conn.cursor()
-                    cur.execute(
-                        f"""
-                        SELECT t.teacher_id,
-                               t.name,
-                               c.course_name,
-                               COUNT(*) AS total,
-                               AVG(g.final_score) AS avg_score,
-                               SUM(CASE WHEN g.final_score < 60 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS fail_rate,
-                               SUM(CASE WHEN g.final_score >= 90 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS excellent_rate,
-                               SUM(CASE WHEN g.final_score >= 80 AND g.final_score < 90 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS good_rate
-                        FROM grades g
-                        JOIN courses c ON g.course_id = c.course_id
-                        JOIN teachers t ON c.teacher_id = t.teacher_id
-                        WHERE {where_clause}
-                        GROUP BY t.teacher_id, t.name, c.course_name
-                        ORDER BY t.teacher_id, c.course_name
-                        """,
-                        params,
+                rows = get_analytics(self.db).group_stats(
+                    by=('teacher_id', 'course_name'),
+                    course_semester=semester,
+                    course_name=course_name,
+                    teacher_id=teacher_id,
+                )
+                rows.sort(key=lambda r: (r['teacher_id'], r['course_name']))
+                for row in rows:
+                    # 应用两位小数向下取整
+                    display_avg = math.floor((row['avg_score'] or 0) * 100) / 100
+                    
+                    self.course_teacher_tree.insert(
+                        '',
+                        tk.END,
+                        values=(
+                            row['teacher_id'],
+                            row['teacher_name'],
+                            row['course_name'],
+                            row['count'] or 0,
+                            f"{display_avg:.2f}",
+                            f"{((row['fail_rate'] or 0) * 100):.2f}%",
+                            f"{((row['excellent_rate'] or 0) * 100):.2f}%",
+                            f"{((row['good_rate'] or 0) * 100):.2f}%",
+                        ),
                     )
-                    rows = cur.fetchall()
-                    for row in rows:
-                        tid, tname, cname, total, avg_score, fail_rate, excellent_rate, good_rate = row
-                        
-                        # 应用两位小数向下取整
-                        display_avg = math.floor((avg_score or 0) * 100) / 100
-                        
-                        self.course_teacher_tree.insert(
-                            '',
-                            tk.END,
-                            values=(
-                                tid,
-                                tname,
-                                cname,
-                                total or 0,
-                                f"{display_avg:.2f}",
-                                f"{((fail_rate or 0) * 100):.2f}%",
-                                f"{((excellent_rate or 0) * 100):.2f}%",
-                                f"{((good_rate or 0) * 100):.2f}%",
-                            ),
-                        )
             except Exception as e:
                 messagebox.showerror("错误", f"加载课程-教师统计失败: {e}")
 
@@ -2049,7 +1997,7 @@ class AdminWindow:
         tk.Label(top_frame_fl, text="学期:", font=("微软雅黑", 11), bg='white').pack(side=tk.LEFT, padx=0)
         semester_values = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute(
                     "SELECT DISTINCT semester FROM grades WHERE semester IS NOT NULL AND semester <> '' ORDER BY semester DESC"
@@ -2074,7 +2022,7 @@ class AdminWindow:
         
         grade_values_fl = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT DISTINCT grade FROM students WHERE grade IS NOT NULL AND grade <> '' ORDER BY grade")
                 grade_values_fl.extend([str(r[0]) for r in cur.fetchall()])
@@ -2096,7 +2044,7 @@ class AdminWindow:
         
         major_values_fl = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute(
                     "SELECT DISTINCT major FROM students WHERE major IS NOT NULL AND major <> '' ORDER BY major"
@@ -2120,7 +2068,7 @@ class AdminWindow:
         
         class_values_fl = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute(
                     "SELECT DISTINCT class_name FROM students WHERE class_name IS NOT NULL AND class_name <> '' ORDER BY class_name"
@@ -2178,7 +2126,7 @@ class AdminWindow:
                         WHERE {where_clause}
                         ORDER BY 1
                     """
-                    with self.db.get_connection() as conn:
+                    with self.db.get_read_connection() as conn:
                         cur = conn.cursor()
                         cur.execute(sql, params)
                         return [r[0] for r in cur.fetchall() if r[0] is not None and str(r[0]).strip() != ""]
@@ -2275,7 +2223,7 @@ class AdminWindow:
             class_sel = self.class_fl_var.get().strip()
 
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     conditions = ["g.final_score < 60"]
                     params = []
@@ -2302,7 +2250,7 @@ class AdminWindow:
                         f"""
                         SELECT s.student_id, s.name, s.grade, s.major, s.class_name,
                                g.course_id, c.course_name, 
-                               TRUNCATE(g.final_score, 2), 
+                               g.final_score,
                                g.grade_level, g.semester
                         FROM grades g
                         JOIN students s ON g.student_id = s.student_id
@@ -2337,7 +2285,7 @@ class AdminWindow:
         # 加载所有学期
         semester_values_mr = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT DISTINCT semester FROM grades WHERE semester IS NOT NULL AND semester <> '' ORDER BY semester DESC")
                 semester_values_mr.extend([r[0] for r in cur.fetchall()])
@@ -2369,7 +2317,7 @@ class AdminWindow:
 
             grades = []
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     if sel_semester and sel_semester != "全部":
                         cur.execute(
@@ -2408,7 +2356,7 @@ class AdminWindow:
         tk.Label(top_frame_mr, text="专业:", font=("微软雅黑", 11), bg='white').pack(side=tk.LEFT, padx=5)
         major_values = []
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute(
                     "SELECT DISTINCT major FROM students WHERE major IS NOT NULL AND major <> '' ORDER BY major"
@@ -2454,7 +2402,7 @@ class AdminWindow:
                 self.class_mr_var.set("全部")
                 return
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     cur.execute(
                         """
@@ -2484,15 +2432,15 @@ class AdminWindow:
         scrollbar_mr = ttk.Scrollbar(tree_frame_mr)
         scrollbar_mr.pack(side=tk.RIGHT, fill=tk.Y)
 
-        columns_mr = ('rank', 'student_id', 'name', 'class_name', 'avg_score')
+        columns_mr = ('rank', 'student_id', 'name', 'class_name', 'avg_score', 'gpa')
         self.rank_tree = ttk.Treeview(
             tree_frame_mr,
             columns=columns_mr,
             show='headings',
             yscrollcommand=scrollbar_mr.set,
         )
-        headers_mr = ['排名', '学号', '姓名', '班级', '加权平均成绩']
-        widths_mr = [60, 100, 80, 110, 120]
+        headers_mr = ['排名', '学号', '姓名', '班级', '加权平均成绩', '绩点']
+        widths_mr = [60, 100, 80, 110, 120, 80]
         for col, header, width in zip(columns_mr, headers_mr, widths_mr):
             self.rank_tree.heading(col, text=header)
             self.rank_tree.column(col, width=width, anchor='center')
@@ -2510,48 +2458,11 @@ class AdminWindow:
                 messagebox.showwarning("提示", "请先选择年级和专业！")
                 return
             class_name = self.class_mr_var.get().strip()
-            ranking = []
             try:
-                with self.db.get_connection() as conn:
-                    cur = conn.cursor()
-                    conditions = ["s.grade = ?", "s.major = ?"]
-                    params = [grade, major]
-                    if class_name and class_name != "全部":
-                        conditions.append("s.class_name = ?")
-                        params.append(class_name)
-                    
-                    if semester and semester != "全部":
-                        conditions.append("g.semester = ?")
-                        params.append(semester)
-
-                    where_clause = " AND ".join(conditions)
-
-                    cur.execute(
-                        f"""
-                        SELECT s.student_id, s.name, s.class_name,
-                               SUM(g.final_score * c.credits) AS weighted_sum,
-                               SUM(c.credits) AS credit_sum
-                        FROM students s
-                        JOIN grades g ON s.student_id = g.student_id
-                        JOIN courses c ON g.course_id = c.course_id
-                        WHERE {where_clause}
-                        GROUP BY s.student_id, s.name, s.class_name
-                        HAVING credit_sum > 0
-                        ORDER BY weighted_sum * 1.0 / credit_sum DESC
-                        """,
-                        params,
-                    )
-                    for row in cur.fetchall():
-                        student_id, name, class_name, weighted_sum, credit_sum = row
-                        avg_score = (weighted_sum or 0) / (credit_sum or 1)
-                        ranking.append(
-                            {
-                                "student_id": student_id,
-                                "name": name,
-                                "class_name": class_name,
-                                "avg_score": avg_score,
-                            }
-                        )
+                # 学分加权平均成绩排名（排名服务预先排好序，成绩变化时增量更新）
+                ranking = get_ranking_service(self.db).top(
+                    grade, major, class_name=class_name, semester=semester
+                )
             except Exception as e:
                 messagebox.showerror("错误", f"获取排名数据失败: {e}")
                 return
@@ -2560,11 +2471,12 @@ class AdminWindow:
                 messagebox.showinfo("提示", "该条件下暂无成绩数据。")
                 return
 
-            for idx, item in enumerate(ranking, start=1):
+            for item in ranking:
                 self.rank_tree.insert(
                     '',
                     tk.END,
-                    values=(idx, item["student_id"], item["name"], item["class_name"], f"{item['avg_score']:.2f}"),
+                    values=(item["rank"], item["student_id"], item["name"], item["class_name"],
+                            f"{item['avg_score']:.2f}", f"{item['gpa']:.2f}"),
                 )
 
         tk.Button(
@@ -2584,7 +2496,8 @@ class AdminWindow:
         chart_container_tr = tk.Frame(tab_semester_trend, bg='white')
         chart_container_tr.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
 
-        self._trend_chart_canvas = None
+        # 第一次生成趋势图时创建，之后切换条件只原地更新折线
+        self._trend_chart = None
 
         tk.Label(top_frame_tr, text="年级:", font=("微软雅黑", 11), bg='white').pack(side=tk.LEFT, padx=5)
         self.trend_grade_var = tk.StringVar()
@@ -2655,7 +2568,7 @@ class AdminWindow:
                 refresh_trend_class_options()
                 return
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     cur.execute(
                         """
@@ -2683,7 +2596,7 @@ class AdminWindow:
                 self.trend_class_var.set("全部")
                 return
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     cur.execute(
                         """
@@ -2723,6 +2636,7 @@ class AdminWindow:
 
         def draw_semester_trend():
             import math
+            from visualization.visual_utils import ChartController
             grade = self.trend_grade_var.get().strip()
             major = self.trend_major_var.get().strip()
             class_name = self.trend_class_var.get().strip()
@@ -2739,57 +2653,20 @@ class AdminWindow:
                 messagebox.showwarning("提示", "选择班级前请先选择年级和专业！")
                 return
 
-            base_conditions = ["g.final_score IS NOT NULL", "s.grade = ?"]
-            base_params = [grade]
-
-            if major and major != "全部":
-                base_conditions.append("s.major = ?")
-                base_params.append(major)
-            if class_name and class_name != "全部":
-                base_conditions.append("s.class_name = ?")
-                base_params.append(class_name)
-
-            where_base = " AND ".join(base_conditions)
+            engine_metric = {
+                'avg': 'avg_score',
+                'fail_rate': 'fail_rate',
+                'excellent_rate': 'excellent_rate',
+            }[metric_key]
 
             def query_series(group_field=None):
-                select_metric = {
-                    'avg': "AVG(g.final_score)",
-                    'fail_rate': "SUM(CASE WHEN g.final_score < 60 THEN 1 ELSE 0 END) * 1.0 / COUNT(*)",
-                    'excellent_rate': "SUM(CASE WHEN g.final_score >= 90 THEN 1 ELSE 0 END) * 1.0 / COUNT(*)",
-                }[metric_key]
-
-                group_select = ""
-                group_by = "c.semester"
-                if group_field:
-                    group_select = f", {group_field}"
-                    group_by = f"c.semester, {group_field}"
-
-                sql = f"""
-                    SELECT c.semester{group_select}, {select_metric} AS val
-                    FROM grades g
-                    JOIN courses c ON g.course_id = c.course_id
-                    JOIN students s ON g.student_id = s.student_id
-                    WHERE {where_base} AND c.semester IS NOT NULL AND c.semester <> ''
-                    GROUP BY {group_by}
-                    ORDER BY c.semester
-                """
-                with self.db.get_connection() as conn:
-                    cur = conn.cursor()
-                    cur.execute(sql, base_params)
-                    rows = cur.fetchall()
-
-                series = {}
-                semesters = []
-                if not group_field:
-                    for sem, val in rows:
-                        semesters.append(sem)
-                        series.setdefault("平均", {})[sem] = val
-                else:
-                    for sem, gval, val in rows:
-                        semesters.append(sem)
-                        series.setdefault(str(gval), {})[sem] = val
-                semesters = sorted(list({s for s in semesters}))
-                return semesters, series
+                return get_analytics(self.db).semester_trend(
+                    engine_metric,
+                    series_by=group_field,
+                    grade=grade,
+                    major=major,
+                    class_name=class_name,
+                )
 
             try:
                 if class_name and class_name != "全部":
@@ -2797,14 +2674,14 @@ class AdminWindow:
                     plot_series = {f"{grade}-{major}-{class_name}": series.get("平均", {})}
                 elif major and major != "全部":
                     semesters, major_series = query_series(group_field=None)
-                    semesters2, class_series = query_series(group_field="s.class_name")
+                    semesters2, class_series = query_series(group_field="class_name")
                     semesters = sorted(list(set(semesters) | set(semesters2)))
                     plot_series = {f"{grade}-{major}-平均": major_series.get("平均", {})}
                     for cname, data in class_series.items():
                         plot_series[f"{cname}"] = data
                 else:
                     semesters, grade_series = query_series(group_field=None)
-                    semesters2, major_series = query_series(group_field="s.major")
+                    semesters2, major_series = query_series(group_field="major")
                     semesters = sorted(list(set(semesters) | set(semesters2)))
                     plot_series = {f"{grade}-平均": grade_series.get("平均", {})}
                     for mname, data in major_series.items():
@@ -2817,33 +2694,33 @@ class AdminWindow:
                 messagebox.showinfo("提示", "该条件下暂无趋势数据。")
                 return
 
-            for widget in chart_container_tr.winfo_children():
-                widget.destroy()
+            chart = self._trend_chart
+            if chart is None:
+                chart = self._trend_chart = ChartController(chart_container_tr, figsize=(9, 4.5))
+                chart.ax.grid(True, linestyle='--', alpha=0.3)
+                chart.widget.pack(fill=tk.BOTH, expand=True)
 
-            fig, ax = plt.subplots(figsize=(9, 4.5))
+            chart.begin()
             x = list(range(len(semesters)))
-            for label, data in plot_series.items():
+            for i, (label, data) in enumerate(plot_series.items()):
                 y = [_value_transform(metric_key, data.get(sem)) for sem in semesters]
                 if metric_key == 'avg':
                     y = [math.floor(v * 100) / 100 for v in y]
-                ax.plot(x, y, marker='o', linewidth=2, label=label)
+                chart.line(label, x, y, marker='o', linewidth=2, label=label, color=f"C{i % 10}")
 
-            ax.set_xticks(x)
-            ax.set_xticklabels(semesters, rotation=30, ha='right')
-            ax.set_ylabel(_metric_label(metric_key))
             title_parts = ["学期趋势", metric_text, f"年级:{grade}"]
             if major and major != "全部":
                 title_parts.append(f"专业:{major}")
             if class_name and class_name != "全部":
                 title_parts.append(f"班级:{class_name}")
-            ax.set_title(" ".join(title_parts))
-            ax.grid(True, linestyle='--', alpha=0.3)
-            ax.legend(fontsize=9)
-            fig.tight_layout()
-
-            self._trend_chart_canvas = FigureCanvasTkAgg(fig, master=chart_container_tr)
-            self._trend_chart_canvas.draw()
-            self._trend_chart_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            chart.finish(
+                title=" ".join(title_parts),
+                ylabel=_metric_label(metric_key),
+                xticks=x,
+                xticklabels=semesters,
+                xtick_rotation=30,
+                legend=True,
+            )
 
         tk.Button(
             top_frame_tr,
@@ -2855,6 +2732,144 @@ class AdminWindow:
             cursor='hand2',
             command=draw_semester_trend,
         ).pack(side=tk.LEFT, padx=10)
+
+        top_frame_rk = tk.Frame(tab_risk, bg='white')
+        top_frame_rk.pack(fill=tk.X, padx=20, pady=10)
+
+        tk.Label(top_frame_rk, text="学期:", font=("微软雅黑", 11), bg='white').pack(side=tk.LEFT, padx=5)
+        self.semester_rk_var = tk.StringVar()
+        semester_values_rk = [v for v in semester_values_gc if v != "全部"]
+        semester_combo_rk = ttk.Combobox(
+            top_frame_rk,
+            textvariable=self.semester_rk_var,
+            font=("微软雅黑", 11),
+            width=12,
+            state='readonly',
+            values=semester_values_rk,
+        )
+        semester_combo_rk.pack(side=tk.LEFT, padx=5)
+        if semester_values_rk:
+            semester_combo_rk.current(0)
+
+        tk.Label(top_frame_rk, text="年级:", font=("微软雅黑", 11), bg='white').pack(side=tk.LEFT, padx=5)
+        self.grade_rk_var = tk.StringVar()
+        grade_combo_rk = ttk.Combobox(
+            top_frame_rk,
+            textvariable=self.grade_rk_var,
+            font=("微软雅黑", 11),
+            width=10,
+            state='readonly',
+            values=["全部"] + grade_values,
+        )
+        grade_combo_rk.pack(side=tk.LEFT, padx=5)
+        grade_combo_rk.current(0)
+
+        tk.Label(top_frame_rk, text="专业:", font=("微软雅黑", 11), bg='white').pack(side=tk.LEFT, padx=5)
+        self.major_rk_var = tk.StringVar()
+        major_combo_rk = ttk.Combobox(
+            top_frame_rk,
+            textvariable=self.major_rk_var,
+            font=("微软雅黑", 11),
+            width=16,
+            state='readonly',
+            values=major_values_fl,
+        )
+        major_combo_rk.pack(side=tk.LEFT, padx=5)
+        major_combo_rk.current(0)
+
+        self.severe_rk_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            top_frame_rk,
+            text="仅显示预警级",
+            variable=self.severe_rk_var,
+            font=("微软雅黑", 11),
+            bg='white',
+        ).pack(side=tk.LEFT, padx=5)
+
+        tree_frame_rk = tk.Frame(tab_risk, bg='white')
+        tree_frame_rk.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+        scrollbar_rk = ttk.Scrollbar(tree_frame_rk)
+        scrollbar_rk.pack(side=tk.RIGHT, fill=tk.Y)
+
+        columns_rk = ('student_id', 'name', 'class_name', 'term_avg', 'class_avg',
+                      'failed_credits', 'score_drop', 'flags', 'level')
+        self.risk_tree = ttk.Treeview(
+            tree_frame_rk,
+            columns=columns_rk,
+            show='headings',
+            yscrollcommand=scrollbar_rk.set,
+        )
+        headers_rk = ['学号', '姓名', '班级', '学期均分', '班级均分', '不及格学分', '较上学期', '预警原因', '等级']
+        widths_rk = [90, 80, 110, 80, 80, 90, 80, 220, 60]
+        for col, header, width in zip(columns_rk, headers_rk, widths_rk):
+            self.risk_tree.heading(col, text=header)
+            self.risk_tree.column(col, width=width, anchor='center')
+        self.risk_tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar_rk.config(command=self.risk_tree.yview)
+
+        def load_risk_list():
+            for item in self.risk_tree.get_children():
+                self.risk_tree.delete(item)
+            try:
+                risks = get_risk_engine(self.db).risk_list(
+                    semester=self.semester_rk_var.get().strip(),
+                    grade=self.grade_rk_var.get().strip(),
+                    major=self.major_rk_var.get().strip(),
+                    min_level=2 if self.severe_rk_var.get() else 1,
+                )
+            except Exception as e:
+                messagebox.showerror("错误", f"加载预警名单失败: {e}")
+                return
+
+            if not risks:
+                messagebox.showinfo("提示", "该条件下没有预警学生。")
+                return
+
+            def _fmt(value, signed=False):
+                if value is None:
+                    return "-"
+                return f"{-value:+.2f}" if signed else f"{value:.2f}"
+
+            for item in risks:
+                self.risk_tree.insert(
+                    '',
+                    tk.END,
+                    values=(item['student_id'], item['name'], item['class_name'],
+                            _fmt(item['term_avg']), _fmt(item['class_avg']),
+                            _fmt(item['failed_credits']), _fmt(item['score_drop'], signed=True),
+                            "、".join(item['flags']), item['level']),
+                )
+
+        def show_risk_trend():
+            try:
+                timeline = get_risk_engine(self.db).timeline()
+            except Exception as e:
+                messagebox.showerror("错误", f"获取预警趋势失败: {e}")
+                return
+            show_visual(self.root, "admin", "student_risk_trend", {"timeline": timeline})
+
+        tk.Button(
+            top_frame_rk,
+            text="生成名单",
+            font=("微软雅黑", 11),
+            bg='#FF9800',
+            fg='white',
+            width=8,
+            cursor='hand2',
+            command=load_risk_list,
+        ).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(
+            top_frame_rk,
+            text="预警趋势图",
+            font=("微软雅黑", 11),
+            bg='#f44336',
+            fg='white',
+            width=10,
+            cursor='hand2',
+            command=show_risk_trend,
+        ).pack(side=tk.LEFT, padx=5)
     
     def show_user_management(self):
         """显示用户管理"""
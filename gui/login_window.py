@@ -10,6 +10,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_manager import DatabaseManager
+from visualization.loader import warm_up
 
 
 class LoginWindow:
@@ -223,6 +224,8 @@ class LoginWindow:
     
     def open_main_window(self):
         """打开主窗口"""
+        # 登录后在后台预先导入绘图模块，打开图表时不必等待
+        warm_up()
         role = self.current_user['role']
         
         if role == 'admin':
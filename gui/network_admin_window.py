@@ -3,7 +3,7 @@ from tkinter import ttk, messagebox
 
 import os
 
-from visualization.visualization_core import show_visual
+from network.async_client import AsyncClient
 
 
 class NetworkAdminWindow:
@@ -18,6 +18,11 @@ class NetworkAdminWindow:
         self.root.title(f"本科教学管理系统 - 网络管理员端 [{self.user_info['username']}]")
         self.root.geometry("1200x800")
 
+        # 网络请求在后台线程执行，避免阻塞界面
+        self.async_client = AsyncClient(self.client, self.root)
+        # 服务器渲染的图表：(图表, 参数) -> (数据版本, base64 PNG)
+        self._chart_images = {}
+
         self.root.protocol("WM_DELETE_WINDOW", self.logout)
 
         self.create_widgets()
@@ -252,182 +257,222 @@ class NetworkAdminWindow:
         """显示数据总览（通过网络获取统计和成绩分布）"""
         self.clear_content()
 
-        tk.Label(
+        title_label = tk.Label(
             self.content_frame,
             text="数据总览",
             font=("微软雅黑", 20, "bold"),
             bg="white",
-        ).pack(pady=20)
+        )
+        title_label.pack(pady=20)
 
         # 统计数据
-        stats_resp = self.client.get_statistics()
-        if not stats_resp.get('success'):
-            messagebox.showerror("错误", stats_resp.get('message', '获取统计数据失败'))
-            return
-        stats = stats_resp['data'].get('statistics', {})
-
-        cards_frame = tk.Frame(self.content_frame, bg="white")
-        cards_frame.pack(pady=20)
-
-        cards = [
-            ("学生总数", stats.get('total_students', 0), "#4CAF50"),
-            ("教师总数", stats.get('total_teachers', 0), "#2196F3"),
-            ("课程总数", stats.get('total_courses', 0), "#FF9800"),
-        ]
-
-        for i, (title, value, color) in enumerate(cards):
-            card = tk.Frame(cards_frame, bg=color, width=250, height=150)
-            card.grid(row=0, column=i, padx=20, pady=10)
-            card.pack_propagate(False)
-
-            tk.Label(
-                card,
-                text=title,
-                font=("微软雅黑", 14),
-                bg=color,
-                fg="white",
-            ).pack(pady=20)
-
+        def on_statistics(stats_resp):
+            if not stats_resp.get('success'):
+                messagebox.showerror("错误", stats_resp.get('message', '获取统计数据失败'))
+                return
+            stats = stats_resp['data'].get('statistics', {})
+
+            cards_frame = tk.Frame(self.content_frame, bg="white")
+            cards_frame.pack(pady=20)
+
+            cards = [
+                ("学生总数", stats.get('total_students', 0), "#4CAF50"),
+                ("教师总数", stats.get('total_teachers', 0), "#2196F3"),
+                ("课程总数", stats.get('total_courses', 0), "#FF9800"),
+            ]
+
+            for i, (title, value, color) in enumerate(cards):
+                card = tk.Frame(cards_frame, bg=color, width=250, height=150)
+                card.grid(row=0, column=i, padx=20, pady=10)
+                card.pack_propagate(False)
+
+                tk.Label(
+                    card,
+                    text=title,
+                    font=("微软雅黑", 14),
+                    bg=color,
+                    fg="white",
+                ).pack(pady=20)
+
+                tk.Label(
+                    card,
+                    text=str(value),
+                    font=("微软雅黑", 36, "bold"),
+                    bg=color,
+                    fg="white",
+                ).pack()
+
+            # 成绩分布
             tk.Label(
-                card,
-                text=str(value),
-                font=("微软雅黑", 36, "bold"),
-                bg=color,
-                fg="white",
-            ).pack()
-
-        # 成绩分布
-        tk.Label(
-            self.content_frame,
-            text="成绩分布统计",
-            font=("微软雅黑", 16, "bold"),
-            bg="white",
-        ).pack(pady=(30, 10))
-
-        dist_resp = self.client.get_grade_distribution()
-        if not dist_resp.get('success'):
-            messagebox.showerror("错误", dist_resp.get('message', '获取成绩分布失败'))
-            return
+                self.content_frame,
+                text="成绩分布统计",
+                font=("微软雅黑", 16, "bold"),
+                bg="white",
+            ).pack(pady=(30, 10))
 
-        dist_list = dist_resp['data'].get('distribution', [])
-        distribution = {item['grade_level']: item['count'] for item in dist_list}
+            def on_distribution(dist_resp):
+                if not dist_resp.get('success'):
+                    messagebox.showerror("错误", dist_resp.get('message', '获取成绩分布失败'))
+                    return
 
-        # 可视化按钮区域
-        btn_frame = tk.Frame(self.content_frame, bg="white")
-        btn_frame.pack(pady=(0, 10))
+                dist_list = dist_resp['data'].get('distribution', [])
+                distribution = {item['grade_level']: item['count'] for item in dist_list}
+
+                # 可视化按钮区域
+                btn_frame = tk.Frame(self.content_frame, bg="white")
+                btn_frame.pack(pady=(0, 10))
+
+                # 图表由服务器渲染为 PNG，本机不需要 matplotlib
+                def show_grade_distribution_chart():
+                    self.show_server_chart("grade_distribution", "成绩分布柱状图")
+
+                def show_statistics_overview_chart():
+                    self.show_server_chart("statistics_overview", "基础统计柱状图")
+
+                def show_resource_heatmap_chart():
+                    self.show_server_chart("resource_heatmap", "资源利用率热力图")
+
+                def show_risk_trend_chart():
+                    self.show_server_chart("student_risk_trend", "学生流失趋势堆叠图")
+
+                def show_major_boxplot_chart():
+                    self.show_server_chart("grouped_grade_boxplot", "分组成绩箱线图", {"by": "major"})
+
+                tk.Button(
+                    btn_frame,
+                    text="成绩分布柱状图",
+                    font=("微软雅黑", 11),
+                    bg="#2196F3",
+                    fg="white",
+                    width=14,
+                    cursor="hand2",
+                    command=show_grade_distribution_chart,
+                ).pack(side=tk.LEFT, padx=5)
+
+                tk.Button(
+                    btn_frame,
+                    text="数据总览对比图",
+                    font=("微软雅黑", 11),
+                    bg="#4CAF50",
+                    fg="white",
+                    width=14,
+                    cursor="hand2",
+                    command=show_statistics_overview_chart,
+                ).pack(side=tk.LEFT, padx=5)
+
+                tk.Button(
+                    btn_frame,
+                    text="资源利用率热力图",
+                    font=("微软雅黑", 11),
+                    bg="#FF9800",
+                    fg="white",
+                    width=16,
+                    cursor="hand2",
+                    command=show_resource_heatmap_chart,
+                ).pack(side=tk.LEFT, padx=5)
+
+                tk.Button(
+                    btn_frame,
+                    text="学生预警趋势图",
+                    font=("微软雅黑", 11),
+                    bg="#f44336",
+                    fg="white",
+                    width=14,
+                    cursor="hand2",
+                    command=show_risk_trend_chart,
+                ).pack(side=tk.LEFT, padx=5)
+
+                tk.Button(
+                    btn_frame,
+                    text="专业成绩箱线图",
+                    font=("微软雅黑", 11),
+                    bg="#9C27B0",
+                    fg="white",
+                    width=14,
+                    cursor="hand2",
+                    command=show_major_boxplot_chart,
+                ).pack(side=tk.LEFT, padx=5)
+
+                dist_frame = tk.Frame(self.content_frame, bg="white")
+                dist_frame.pack(fill=tk.X, padx=50, pady=20)
+
+                colors = {
+                    '优秀': '#4CAF50',
+                    '良好': '#2196F3',
+                    '中等': '#FF9800',
+                    '及格': '#FFC107',
+                    '不及格': '#f44336',
+                }
 
-        def show_grade_distribution_chart():
-            # 使用统一可视化接口绘制全校成绩等级分布柱状图
-            show_visual(
-                parent=self.root,
-                role="admin",
-                chart_type="grade_distribution",
-                data={"distribution": distribution},
+                total = sum(distribution.values()) or 1
+
+                for level, count in distribution.items():
+                    item_frame = tk.Frame(dist_frame, bg="white")
+                    item_frame.pack(fill=tk.X, pady=5)
+
+                    tk.Label(
+                        item_frame,
+                        text=f"{level}:",
+                        font=("微软雅黑", 12),
+                        bg="white",
+                        width=10,
+                        anchor="w",
+                    ).pack(side=tk.LEFT, padx=10)
+
+                    canvas = tk.Canvas(
+                        item_frame, width=400, height=30, bg="white", highlightthickness=0
+                    )
+                    canvas.pack(side=tk.LEFT, padx=10)
+
+                    width = int(400 * count / total)
+                    canvas.create_rectangle(0, 5, width, 25, fill=colors.get(level, '#999'), outline="")
+
+                    tk.Label(
+                        item_frame,
+                        text=f"{count} 人",
+                        font=("微软雅黑", 12),
+                        bg="white",
+                    ).pack(side=tk.LEFT, padx=10)
+
+                tk.Label(
+                    self.content_frame,
+                    text=f"平均分: {stats.get('average_score', 0)}",
+                    font=("微软雅黑", 14, "bold"),
+                    bg="white",
+                    fg="#2196F3",
+                ).pack(pady=20)
+
+            self.async_client.call(
+                'get_grade_distribution', callback=on_distribution, owner=title_label
             )
 
-        def show_statistics_overview_chart():
-            # 使用统一可视化接口绘制学生/教师/课程数量对比图
-            show_visual(
-                parent=self.root,
-                role="admin",
-                chart_type="statistics_overview",
-                data={"statistics": stats},
-            )
+        self.async_client.call('get_statistics', callback=on_statistics, owner=title_label)
+
+    def show_server_chart(self, chart, title, params=None):
+        """请求服务器渲染图表并在新窗口中显示；数据未变化时使用本地保存的图片"""
+        params = params or {}
+        key = (chart, tuple(sorted(params.items())))
+        version, image = self._chart_images.get(key, (None, None))
 
-        def show_resource_heatmap_chart():
-            resp = self.client.get_all_courses()
+        def on_rendered(resp):
             if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '获取课程数据失败'))
+                messagebox.showerror("错误", resp.get('message', '生成图表失败'))
                 return
-            courses = resp['data'].get('courses', [])
-            show_visual(
-                parent=self.root,
-                role="admin",
-                chart_type="resource_heatmap",
-                data={"courses": courses},
-            )
-
-        tk.Button(
-            btn_frame,
-            text="成绩分布柱状图",
-            font=("微软雅黑", 11),
-            bg="#2196F3",
-            fg="white",
-            width=14,
-            cursor="hand2",
-            command=show_grade_distribution_chart,
-        ).pack(side=tk.LEFT, padx=5)
-
-        tk.Button(
-            btn_frame,
-            text="数据总览对比图",
-            font=("微软雅黑", 11),
-            bg="#4CAF50",
-            fg="white",
-            width=14,
-            cursor="hand2",
-            command=show_statistics_overview_chart,
-        ).pack(side=tk.LEFT, padx=5)
-
-        tk.Button(
-            btn_frame,
-            text="资源利用率热力图",
-            font=("微软雅黑", 11),
-            bg="#FF9800",
-            fg="white",
-            width=16,
-            cursor="hand2",
-            command=show_resource_heatmap_chart,
-        ).pack(side=tk.LEFT, padx=5)
-
-        dist_frame = tk.Frame(self.content_frame, bg="white")
-        dist_frame.pack(fill=tk.X, padx=50, pady=20)
-
-        colors = {
-            '优秀': '#4CAF50',
-            '良好': '#2196F3',
-            '中等': '#FF9800',
-            '及格': '#FFC107',
-            '不及格': '#f44336',
-        }
-
-        total = sum(distribution.values()) or 1
-
-        for level, count in distribution.items():
-            item_frame = tk.Frame(dist_frame, bg="white")
-            item_frame.pack(fill=tk.X, pady=5)
-
-            tk.Label(
-                item_frame,
-                text=f"{level}:",
-                font=("微软雅黑", 12),
-                bg="white",
-                width=10,
-                anchor="w",
-            ).pack(side=tk.LEFT, padx=10)
-
-            canvas = tk.Canvas(
-                item_frame, width=400, height=30, bg="white", highlightthickness=0
-            )
-            canvas.pack(side=tk.LEFT, padx=10)
-
-            width = int(400 * count / total)
-            canvas.create_rectangle(0, 5, width, 25, fill=colors.get(level, '#999'), outline="")
+            result = resp['data']
+            if result.get('not_modified'):
+                data = image
+            else:
+                data = result['image']
+                self._chart_images[key] = (result['version'], data)
 
-            tk.Label(
-                item_frame,
-                text=f"{count} 人",
-                font=("微软雅黑", 12),
-                bg="white",
-            ).pack(side=tk.LEFT, padx=10)
+            win = tk.Toplevel(self.root)
+            win.title(title)
+            photo = tk.PhotoImage(master=win, data=data)
+            label = tk.Label(win, image=photo, bg="white")
+            label.image = photo
+            label.pack(fill=tk.BOTH, expand=True)
 
-        tk.Label(
-            self.content_frame,
-            text=f"平均分: {stats.get('average_score', 0)}",
-            font=("微软雅黑", 14, "bold"),
-            bg="white",
-            fg="#2196F3",
-        ).pack(pady=20)
+        self.async_client.call('render_chart', chart, params, 'png', version, callback=on_rendered)
 
     # ==================== 学生管理（增删改查，网络模式） ====================
 
@@ -457,15 +502,22 @@ class NetworkAdminWindow:
 
         def search_students():
             keyword = search_entry.get().strip()
+
+            def on_students(resp):
+                if not resp.get('success'):
+                    messagebox.showerror("错误", resp.get('message', '搜索学生失败'))
+                    return
+                students = resp['data'].get('students', [])
+                self.load_students(students)
+
             if keyword:
-                resp = self.client.search_students(keyword)
+                self.async_client.call(
+                    'search_students', keyword, callback=on_students, owner=self.student_tree
+                )
             else:
-                resp = self.client.get_all_students()
-            if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '搜索学生失败'))
-                return
-            students = resp['data'].get('students', [])
-            self.load_students(students)
+                self.async_client.call(
+                    'get_all_students', callback=on_students, owner=self.student_tree
+                )
 
         tk.Button(
             toolbar,
@@ -561,11 +613,16 @@ class NetworkAdminWindow:
     def load_students(self, students=None):
         """加载学生数据到树形视图（可传入现成列表，否则从服务器获取）"""
         if students is None:
-            resp = self.client.get_all_students()
-            if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '获取学生数据失败'))
-                return
-            students = resp['data'].get('students', [])
+            def on_students(resp):
+                if not resp.get('success'):
+                    messagebox.showerror("错误", resp.get('message', '获取学生数据失败'))
+                    return
+                self.load_students(resp['data'].get('students', []))
+
+            self.async_client.call(
+                'get_all_students', callback=on_students, owner=self.student_tree
+            )
+            return
 
         for item in self.student_tree.get_children():
             self.student_tree.delete(item)
@@ -669,13 +726,17 @@ class NetworkAdminWindow:
                     "enrollment_date": entries["enrollment_date"].get().strip(),
                 }
 
-                resp = self.client.add_student(student_data, username, password)
-                if resp.get('success'):
-                    messagebox.showinfo("成功", resp.get('message', '学生添加成功！'))
-                    add_win.destroy()
-                    self.load_students()
-                else:
-                    messagebox.showerror("错误", resp.get('message', '学生添加失败！'))
+                def on_added(resp):
+                    if resp.get('success'):
+                        messagebox.showinfo("成功", resp.get('message', '学生添加成功！'))
+                        add_win.destroy()
+                        self.load_students()
+                    else:
+                        messagebox.showerror("错误", resp.get('message', '学生添加失败！'))
+
+                self.async_client.call(
+                    'add_student', student_data, username, password, callback=on_added
+                )
             except ValueError as e:
                 messagebox.showerror("错误", f"输入格式错误: {e}")
             except Exception as e:
@@ -766,13 +827,17 @@ class NetworkAdminWindow:
                     "address": "",  # 简化
                 }
 
-                resp = self.client.update_student(values[0], student_data)
-                if resp.get('success'):
-                    messagebox.showinfo("成功", resp.get('message', '学生信息更新成功！'))
-                    edit_win.destroy()
-                    self.load_students()
-                else:
-                    messagebox.showerror("错误", resp.get('message', '更新失败！'))
+                def on_updated(resp):
+                    if resp.get('success'):
+                        messagebox.showinfo("成功", resp.get('message', '学生信息更新成功！'))
+                        edit_win.destroy()
+                        self.load_students()
+                    else:
+                        messagebox.showerror("错误", resp.get('message', '更新失败！'))
+
+                self.async_client.call(
+                    'update_student', values[0], student_data, callback=on_updated
+                )
             except Exception as e:
                 messagebox.showerror("错误", f"更新失败: {e}")
 
@@ -801,12 +866,14 @@ class NetworkAdminWindow:
         if not messagebox.askyesno("确认", f"确定要删除学生 {student_name} ({student_id}) 吗？\n此操作将删除该学生的所有相关数据！"):
             return
 
-        resp = self.client.delete_student(student_id)
-        if resp.get('success'):
-            messagebox.showinfo("成功", resp.get('message', '学生删除成功！'))
-            self.load_students()
-        else:
-            messagebox.showerror("错误", resp.get('message', '删除失败！'))
+        def on_deleted(resp):
+            if resp.get('success'):
+                messagebox.showinfo("成功", resp.get('message', '学生删除成功！'))
+                self.load_students()
+            else:
+                messagebox.showerror("错误", resp.get('message', '删除失败！'))
+
+        self.async_client.call('delete_student', student_id, callback=on_deleted)
 
     # ==================== 教师管理（增删改查，网络模式） ====================
 
@@ -889,12 +956,16 @@ class NetworkAdminWindow:
             if not keyword:
                 self.load_teachers()
                 return
-            resp = self.client.search_teachers(keyword)
-            if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '搜索教师失败'))
-                return
-            teachers = resp['data'].get('teachers', [])
-            self.load_teachers(teachers)
+            def on_teachers(resp):
+                if not resp.get('success'):
+                    messagebox.showerror("错误", resp.get('message', '搜索教师失败'))
+                    return
+                teachers = resp['data'].get('teachers', [])
+                self.load_teachers(teachers)
+
+            self.async_client.call(
+                'search_teachers', keyword, callback=on_teachers, owner=self.teacher_tree
+            )
 
         tk.Button(
             toolbar,
@@ -945,11 +1016,16 @@ class NetworkAdminWindow:
 
     def load_teachers(self, teachers=None):
         if teachers is None:
-            resp = self.client.get_all_teachers()
-            if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '获取教师数据失败'))
-                return
-            teachers = resp['data'].get('teachers', [])
+            def on_teachers(resp):
+                if not resp.get('success'):
+                    messagebox.showerror("错误", resp.get('message', '获取教师数据失败'))
+                    return
+                self.load_teachers(resp['data'].get('teachers', []))
+
+            self.async_client.call(
+                'get_all_teachers', callback=on_teachers, owner=self.teacher_tree
+            )
+            return
 
         for item in self.teacher_tree.get_children():
             self.teacher_tree.delete(item)
@@ -1061,13 +1137,17 @@ class NetworkAdminWindow:
                     "hire_date": entries["hire_date"].get().strip(),
                 }
 
-                resp = self.client.add_teacher(teacher_data, username, password)
-                if resp.get('success'):
-                    messagebox.showinfo("成功", resp.get('message', '教师添加成功！'))
-                    add_win.destroy()
-                    self.load_teachers()
-                else:
-                    messagebox.showerror("错误", resp.get('message', '教师添加失败！'))
+                def on_added(resp):
+                    if resp.get('success'):
+                        messagebox.showinfo("成功", resp.get('message', '教师添加成功！'))
+                        add_win.destroy()
+                        self.load_teachers()
+                    else:
+                        messagebox.showerror("错误", resp.get('message', '教师添加失败！'))
+
+                self.async_client.call(
+                    'add_teacher', teacher_data, username, password, callback=on_added
+                )
             except Exception as e:
                 messagebox.showerror("错误", f"添加失败: {e}")
 
@@ -1165,13 +1245,17 @@ class NetworkAdminWindow:
                     "office": entries["office"].get().strip(),
                 }
 
-                resp = self.client.update_teacher(values[0], teacher_data)
-                if resp.get('success'):
-                    messagebox.showinfo("成功", resp.get('message', '教师信息更新成功！'))
-                    edit_win.destroy()
-                    self.load_teachers()
-                else:
-                    messagebox.showerror("错误", resp.get('message', '更新失败！'))
+                def on_updated(resp):
+                    if resp.get('success'):
+                        messagebox.showinfo("成功", resp.get('message', '教师信息更新成功！'))
+                        edit_win.destroy()
+                        self.load_teachers()
+                    else:
+                        messagebox.showerror("错误", resp.get('message', '更新失败！'))
+
+                self.async_client.call(
+                    'update_teacher', values[0], teacher_data, callback=on_updated
+                )
             except Exception as e:
                 messagebox.showerror("错误", f"更新失败: {e}")
 
@@ -1200,12 +1284,14 @@ class NetworkAdminWindow:
         if not messagebox.askyesno("确认", f"确定要删除教师 {teacher_name} ({teacher_id}) 吗？\n此操作将删除该教师的所有相关数据！"):
             return
 
-        resp = self.client.delete_teacher(teacher_id)
-        if resp.get('success'):
-            messagebox.showinfo("成功", resp.get('message', '教师删除成功！'))
-            self.load_teachers()
-        else:
-            messagebox.showerror("错误", resp.get('message', '删除失败！'))
+        def on_deleted(resp):
+            if resp.get('success'):
+                messagebox.showinfo("成功", resp.get('message', '教师删除成功！'))
+                self.load_teachers()
+            else:
+                messagebox.showerror("错误", resp.get('message', '删除失败！'))
+
+        self.async_client.call('delete_teacher', teacher_id, callback=on_deleted)
 
     # ==================== 课程管理（增删改查，网络模式） ====================
 
@@ -1288,12 +1374,16 @@ class NetworkAdminWindow:
             if not keyword:
                 self.load_courses()
                 return
-            resp = self.client.search_courses(keyword)
-            if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '搜索课程失败'))
-                return
-            courses = resp['data'].get('courses', [])
-            self.load_courses(courses)
+            def on_courses(resp):
+                if not resp.get('success'):
+                    messagebox.showerror("错误", resp.get('message', '搜索课程失败'))
+                    return
+                courses = resp['data'].get('courses', [])
+                self.load_courses(courses)
+
+            self.async_client.call(
+                'search_courses', keyword, callback=on_courses, owner=self.course_tree
+            )
 
         tk.Button(
             toolbar,
@@ -1355,11 +1445,16 @@ class NetworkAdminWindow:
 
     def load_courses(self, courses=None):
         if courses is None:
-            resp = self.client.get_all_courses()
-            if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '获取课程数据失败'))
-                return
-            courses = resp['data'].get('courses', [])
+            def on_courses(resp):
+                if not resp.get('success'):
+                    messagebox.showerror("错误", resp.get('message', '获取课程数据失败'))
+                    return
+                self.load_courses(resp['data'].get('courses', []))
+
+            self.async_client.call(
+                'get_all_courses', callback=on_courses, owner=self.course_tree
+            )
+            return
 
         for item in self.course_tree.get_children():
             self.course_tree.delete(item)
@@ -1450,13 +1545,15 @@ class NetworkAdminWindow:
                     "status": entries["status"].get() or "open",
                 }
 
-                resp = self.client.add_course(course_data)
-                if resp.get('success'):
-                    messagebox.showinfo("成功", resp.get('message', '课程添加成功！'))
-                    add_win.destroy()
-                    self.load_courses()
-                else:
-                    messagebox.showerror("错误", resp.get('message', '课程添加失败！'))
+                def on_added(resp):
+                    if resp.get('success'):
+                        messagebox.showinfo("成功", resp.get('message', '课程添加成功！'))
+                        add_win.destroy()
+                        self.load_courses()
+                    else:
+                        messagebox.showerror("错误", resp.get('message', '课程添加失败！'))
+
+                self.async_client.call('add_course', course_data, callback=on_added)
             except ValueError as e:
                 messagebox.showerror("错误", f"输入格式错误: {e}")
             except Exception as e:
@@ -1548,13 +1645,15 @@ class NetworkAdminWindow:
                     "classroom": None,
                 }
 
-                resp = self.client.update_course(values[0], course_data)
-                if resp.get('success'):
-                    messagebox.showinfo("成功", resp.get('message', '课程信息更新成功！'))
-                    edit_win.destroy()
-                    self.load_courses()
-                else:
-                    messagebox.showerror("错误", resp.get('message', '更新失败！'))
+                def on_updated(resp):
+                    if resp.get('success'):
+                        messagebox.showinfo("成功", resp.get('message', '课程信息更新成功！'))
+                        edit_win.destroy()
+                        self.load_courses()
+                    else:
+                        messagebox.showerror("错误", resp.get('message', '更新失败！'))
+
+                self.async_client.call('update_course', values[0], course_data, callback=on_updated)
             except Exception as e:
                 messagebox.showerror("错误", f"更新失败: {e}")
 
@@ -1583,12 +1682,14 @@ class NetworkAdminWindow:
         if not messagebox.askyesno("确认", f"确定要删除课程 {course_name} ({course_id}) 吗？\n此操作将删除该课程的所有相关选课和成绩记录！"):
             return
 
-        resp = self.client.delete_course(course_id)
-        if resp.get('success'):
-            messagebox.showinfo("成功", resp.get('message', '课程删除成功！'))
-            self.load_courses()
-        else:
-            messagebox.showerror("错误", resp.get('message', '删除失败！'))
+        def on_deleted(resp):
+            if resp.get('success'):
+                messagebox.showinfo("成功", resp.get('message', '课程删除成功！'))
+                self.load_courses()
+            else:
+                messagebox.showerror("错误", resp.get('message', '删除失败！'))
+
+        self.async_client.call('delete_course', course_id, callback=on_deleted)
 
     # ==================== 系统日志 ====================
 
@@ -1654,40 +1755,49 @@ class NetworkAdminWindow:
         self.load_logs()
 
     def load_logs(self):
-        resp = self.client.get_logs(limit=200)
-        if not resp.get('success'):
-            messagebox.showerror("错误", resp.get('message', '获取日志失败'))
-            return
-        logs = resp['data'].get('logs', [])
-
-        for item in self.log_tree.get_children():
-            self.log_tree.delete(item)
+        def on_logs(resp):
+            if not resp.get('success'):
+                messagebox.showerror("错误", resp.get('message', '获取日志失败'))
+                return
+            logs = resp['data'].get('logs', [])
+
+            for item in self.log_tree.get_children():
+                self.log_tree.delete(item)
+
+            for log in logs:
+                self.log_tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        log.get('timestamp'),
+                        log.get('username'),
+                        log.get('action'),
+                        log.get('description'),
+                    ),
+                )
 
-        for log in logs:
-            self.log_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    log.get('timestamp'),
-                    log.get('username'),
-                    log.get('action'),
-                    log.get('description'),
-                ),
-            )
+        self.async_client.call('get_logs', limit=200, callback=on_logs, owner=self.log_tree)
 
     def clear_logs(self):
         if not messagebox.askyesno("确认", "确定要清空所有日志吗？"):
             return
-        resp = self.client.clear_logs()
-        if resp.get('success'):
-            messagebox.showinfo("成功", resp.get('message', '日志已清空'))
-            self.load_logs()
-        else:
-            messagebox.showerror("错误", resp.get('message', '清空日志失败'))
+        def on_cleared(resp):
+            if resp.get('success'):
+                messagebox.showinfo("成功", resp.get('message', '日志已清空'))
+                self.load_logs()
+            else:
+                messagebox.showerror("错误", resp.get('message', '清空日志失败'))
+
+        self.async_client.call('clear_logs', callback=on_cleared)
 
     def logout(self):
         """注销并返回登录窗口"""
         if messagebox.askyesno("确认", "确定要注销并返回登录界面吗？"):
+            self.async_client.shutdown()
+            try:
+                self.client.logout()
+            except Exception:
+                pass
             try:
                 self.root.destroy()
             except Exception:
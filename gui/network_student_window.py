@@ -4,6 +4,7 @@ from tkinter import ttk, messagebox
 import os
 
 from visualization.visualization_core import show_visual
+from network.async_client import AsyncClient
 
 
 class NetworkStudentWindow:
@@ -28,6 +29,9 @@ class NetworkStudentWindow:
         self.root.title(f"本科教学管理系统 - 网络学生端 [{self.student_info['name']}]")
         self.root.geometry("1000x700")
 
+        # 网络请求在后台线程执行，避免阻塞界面
+        self.async_client = AsyncClient(self.client, self.root)
+
         # 窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.logout)
 
@@ -342,48 +346,53 @@ class NetworkStudentWindow:
         scrollbar.config(command=self.course_tree.yview)
 
         # 从服务器加载已选课程
-        resp = self.client.get_student_courses(self.student_info['student_id'])
-        if not resp.get('success'):
-            messagebox.showerror("错误", resp.get('message', '获取课程失败'))
-            return
+        def on_courses(resp):
+            if not resp.get('success'):
+                messagebox.showerror("错误", resp.get('message', '获取课程失败'))
+                return
 
-        courses = resp['data'].get('courses', [])
+            courses = resp['data'].get('courses', [])
+
+            def show_credit_radar_chart():
+                if not courses:
+                    messagebox.showwarning("提示", "当前暂无选课，无法生成学分雷达图！")
+                    return
+                show_visual(
+                    parent=self.root,
+                    role="student",
+                    chart_type="credit_radar",
+                    data={"courses": courses},
+                )
 
-        def show_credit_radar_chart():
-            if not courses:
-                messagebox.showwarning("提示", "当前暂无选课，无法生成学分雷达图！")
-                return
-            show_visual(
-                parent=self.root,
-                role="student",
-                chart_type="credit_radar",
-                data={"courses": courses},
-            )
+            tk.Button(
+                btn_frame,
+                text="学分雷达图",
+                font=("微软雅黑", 11),
+                bg="#2196F3",
+                fg="white",
+                width=14,
+                cursor="hand2",
+                command=show_credit_radar_chart,
+            ).pack(side=tk.LEFT, padx=5)
 
-        tk.Button(
-            btn_frame,
-            text="学分雷达图",
-            font=("微软雅黑", 11),
-            bg="#2196F3",
-            fg="white",
-            width=14,
-            cursor="hand2",
-            command=show_credit_radar_chart,
-        ).pack(side=tk.LEFT, padx=5)
+            for enroll in courses:
+                self.course_tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        enroll.get('course_id'),
+                        enroll.get('course_name'),
+                        enroll.get('teacher_name'),
+                        enroll.get('credits'),
+                        enroll.get('class_time'),
+                        enroll.get('classroom'),
+                    ),
+                )
 
-        for enroll in courses:
-            self.course_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    enroll.get('course_id'),
-                    enroll.get('course_name'),
-                    enroll.get('teacher_name'),
-                    enroll.get('credits'),
-                    enroll.get('class_time'),
-                    enroll.get('classroom'),
-                ),
-            )
+        self.async_client.call(
+            'get_student_courses', self.student_info['student_id'],
+            callback=on_courses, owner=self.course_tree,
+        )
 
     def show_enrollment(self):
         """显示选课管理"""
@@ -460,47 +469,59 @@ class NetworkStudentWindow:
 
     def load_available_courses(self):
         """加载可选课程（通过服务器）"""
-        for item in self.enroll_tree.get_children():
-            self.enroll_tree.delete(item)
-
         # 所有课程
-        resp_all = self.client.get_all_courses()
-        if not resp_all.get('success'):
-            messagebox.showerror("错误", resp_all.get('message', '获取课程列表失败'))
-            return
-        all_courses = resp_all['data'].get('courses', [])
+        def on_all_courses(resp_all):
+            if not resp_all.get('success'):
+                messagebox.showerror("错误", resp_all.get('message', '获取课程列表失败'))
+                return
+            all_courses = resp_all['data'].get('courses', [])
+
+            # 已选课程
+            def on_enrolled(resp_enrolled):
+                if not resp_enrolled.get('success'):
+                    messagebox.showerror("错误", resp_enrolled.get('message', '获取已选课程失败'))
+                    return
+                enrolled_courses = resp_enrolled['data'].get('courses', [])
+                enrolled_ids = {c.get('course_id') for c in enrolled_courses}
+
+                # 已修课程（成绩表里出现过的课程）
+                def on_grades(resp_grades):
+                    if not resp_grades.get('success'):
+                        messagebox.showerror("错误", resp_grades.get('message', '获取成绩失败'))
+                        return
+                    grade_rows = resp_grades.get('data', {}).get('grades', [])
+                    taken_ids = {g.get('course_id') for g in grade_rows}
+
+                    for item in self.enroll_tree.get_children():
+                        self.enroll_tree.delete(item)
+
+                    for course in all_courses:
+                        cid = course.get('course_id')
+                        if cid and cid not in enrolled_ids and cid not in taken_ids:
+                            self.enroll_tree.insert(
+                                "",
+                                tk.END,
+                                values=(
+                                    course.get('course_id'),
+                                    course.get('course_name'),
+                                    course.get('teacher_name') or "待定",
+                                    course.get('credits'),
+                                    course.get('capacity'),
+                                    course.get('enrolled_count'),
+                                ),
+                            )
+
+                self.async_client.call(
+                    'get_student_grades', self.student_info['student_id'],
+                    callback=on_grades, owner=self.enroll_tree,
+                )
 
-        # 已选课程
-        resp_enrolled = self.client.get_student_courses(self.student_info['student_id'])
-        if not resp_enrolled.get('success'):
-            messagebox.showerror("错误", resp_enrolled.get('message', '获取已选课程失败'))
-            return
-        enrolled_courses = resp_enrolled['data'].get('courses', [])
-        enrolled_ids = {c.get('course_id') for c in enrolled_courses}
+            self.async_client.call(
+                'get_student_courses', self.student_info['student_id'],
+                callback=on_enrolled, owner=self.enroll_tree,
+            )
 
-        # 已修课程（成绩表里出现过的课程）
-        resp_grades = self.client.get_student_grades(self.student_info['student_id'])
-        if not resp_grades.get('success'):
-            messagebox.showerror("错误", resp_grades.get('message', '获取成绩失败'))
-            return
-        grade_rows = resp_grades.get('data', {}).get('grades', [])
-        taken_ids = {g.get('course_id') for g in grade_rows}
-
-        for course in all_courses:
-            cid = course.get('course_id')
-            if cid and cid not in enrolled_ids and cid not in taken_ids:
-                self.enroll_tree.insert(
-                    "",
-                    tk.END,
-                    values=(
-                        course.get('course_id'),
-                        course.get('course_name'),
-                        course.get('teacher_name') or "待定",
-                        course.get('credits'),
-                        course.get('capacity'),
-                        course.get('enrolled_count'),
-                    ),
-                )
+        self.async_client.call('get_all_courses', callback=on_all_courses, owner=self.enroll_tree)
 
     def enroll_course(self):
         """选课（通过服务器）"""
@@ -516,12 +537,16 @@ class NetworkStudentWindow:
         if not messagebox.askyesno("确认", f"确定要选 {course_name} 吗？"):
             return
 
-        resp = self.client.enroll_course(self.student_info['student_id'], course_id)
-        if resp.get('success'):
-            messagebox.showinfo("成功", resp.get('message', '选课成功'))
-            self.load_available_courses()
-        else:
-            messagebox.showerror("失败", resp.get('message', '选课失败'))
+        def on_enrolled(resp):
+            if resp.get('success'):
+                messagebox.showinfo("成功", resp.get('message', '选课成功'))
+                self.load_available_courses()
+            else:
+                messagebox.showerror("失败", resp.get('message', '选课失败'))
+
+        self.async_client.call(
+            'enroll_course', self.student_info['student_id'], course_id, callback=on_enrolled
+        )
 
     def drop_course(self):
         """退课（通过服务器）"""
@@ -557,23 +582,28 @@ class NetworkStudentWindow:
         scrollbar.config(command=drop_tree.yview)
 
         # 已选课程
-        resp = self.client.get_student_courses(self.student_info['student_id'])
-        if not resp.get('success'):
-            messagebox.showerror("错误", resp.get('message', '获取已选课程失败'))
-            drop_win.destroy()
-            return
-        enrolled = resp['data'].get('courses', [])
-
-        for enroll in enrolled:
-            drop_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    enroll.get('course_id'),
-                    enroll.get('course_name'),
-                    enroll.get('teacher_name'),
-                ),
-            )
+        def on_enrolled(resp):
+            if not resp.get('success'):
+                messagebox.showerror("错误", resp.get('message', '获取已选课程失败'))
+                drop_win.destroy()
+                return
+            enrolled = resp['data'].get('courses', [])
+
+            for enroll in enrolled:
+                drop_tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        enroll.get('course_id'),
+                        enroll.get('course_name'),
+                        enroll.get('teacher_name'),
+                    ),
+                )
+
+        self.async_client.call(
+            'get_student_courses', self.student_info['student_id'],
+            callback=on_enrolled, owner=drop_tree,
+        )
 
         def confirm_drop():
             selection = drop_tree.selection()
@@ -588,13 +618,17 @@ class NetworkStudentWindow:
             if not messagebox.askyesno("确认", f"确定要退 {course_name} 吗？"):
                 return
 
-            resp_drop = self.client.drop_course(self.student_info['student_id'], course_id)
-            if resp_drop.get('success'):
-                messagebox.showinfo("成功", resp_drop.get('message', '退课成功'))
-                drop_win.destroy()
-                self.load_available_courses()
-            else:
-                messagebox.showerror("失败", resp_drop.get('message', '退课失败'))
+            def on_dropped(resp_drop):
+                if resp_drop.get('success'):
+                    messagebox.showinfo("成功", resp_drop.get('message', '退课成功'))
+                    drop_win.destroy()
+                    self.load_available_courses()
+                else:
+                    messagebox.showerror("失败", resp_drop.get('message', '退课失败'))
+
+            self.async_client.call(
+                'drop_course', self.student_info['student_id'], course_id, callback=on_dropped
+            )
 
         tk.Button(
             drop_win,
@@ -642,70 +676,75 @@ class NetworkStudentWindow:
         self.grade_tree.pack(fill=tk.BOTH, expand=True)
         scrollbar.config(command=self.grade_tree.yview)
 
-        resp = self.client.get_student_grades(self.student_info['student_id'])
-        if not resp.get('success'):
-            messagebox.showerror("错误", resp.get('message', '获取成绩失败'))
-            return
+        def on_grades(resp):
+            if not resp.get('success'):
+                messagebox.showerror("错误", resp.get('message', '获取成绩失败'))
+                return
 
-        grades = resp['data'].get('grades', [])
+            grades = resp['data'].get('grades', [])
 
-        # 按钮：成绩成长曲线（学期平均成绩变化）
-        def show_score_trend():
-            show_visual(
-                parent=self.root,
-                role="student",
-                chart_type="personal_score_trend",
-                data={"grades": grades},
-            )
+            # 按钮：成绩成长曲线（学期平均成绩变化）
+            def show_score_trend():
+                show_visual(
+                    parent=self.root,
+                    role="student",
+                    chart_type="personal_score_trend",
+                    data={"grades": grades},
+                )
 
-        btn_frame = tk.Frame(self.content_frame, bg="white")
-        btn_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
+            btn_frame = tk.Frame(self.content_frame, bg="white")
+            btn_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
 
-        tk.Button(
-            btn_frame,
-            text="成绩成长曲线",
-            font=("微软雅黑", 11),
-            bg="#4CAF50",
-            fg="white",
-            width=14,
-            cursor="hand2",
-            command=show_score_trend,
-        ).pack(side=tk.LEFT, padx=5)
-        total_score = 0
-        count = 0
-
-        for grade in grades:
-            final_score = grade.get('final_score')
-            usual_score = grade.get('usual_score')
-            exam_score = grade.get('exam_score')
-
-            self.grade_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    grade.get('course_name'),
-                    grade.get('teacher_name'),
-                    f"{usual_score:.1f}" if usual_score is not None else "-",
-                    f"{exam_score:.1f}" if exam_score is not None else "-",
-                    f"{final_score:.1f}" if final_score is not None else "-",
-                    grade.get('grade_level'),
-                    grade.get('semester'),
-                ),
-            )
+            tk.Button(
+                btn_frame,
+                text="成绩成长曲线",
+                font=("微软雅黑", 11),
+                bg="#4CAF50",
+                fg="white",
+                width=14,
+                cursor="hand2",
+                command=show_score_trend,
+            ).pack(side=tk.LEFT, padx=5)
+            total_score = 0
+            count = 0
 
-            if final_score is not None:
-                total_score += final_score
-                count += 1
+            for grade in grades:
+                final_score = grade.get('final_score')
+                usual_score = grade.get('usual_score')
+                exam_score = grade.get('exam_score')
 
-        if count > 0:
-            avg_score = total_score / count
-            tk.Label(
-                self.content_frame,
-                text=f"平均分: {avg_score:.2f}",
-                font=("微软雅黑", 12, "bold"),
-                bg="white",
-                fg="#2196F3",
-            ).pack(pady=10)
+                self.grade_tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        grade.get('course_name'),
+                        grade.get('teacher_name'),
+                        f"{usual_score:.1f}" if usual_score is not None else "-",
+                        f"{exam_score:.1f}" if exam_score is not None else "-",
+                        f"{final_score:.1f}" if final_score is not None else "-",
+                        grade.get('grade_level'),
+                        grade.get('semester'),
+                    ),
+                )
+
+                if final_score is not None:
+                    total_score += final_score
+                    count += 1
+
+            if count > 0:
+                avg_score = total_score / count
+                tk.Label(
+                    self.content_frame,
+                    text=f"平均分: {avg_score:.2f}",
+                    font=("微软雅黑", 12, "bold"),
+                    bg="white",
+                    fg="#2196F3",
+                ).pack(pady=10)
+
+        self.async_client.call(
+            'get_student_grades', self.student_info['student_id'],
+            callback=on_grades, owner=self.grade_tree,
+        )
 
     def change_password_placeholder(self):
         """修改密码占位（暂未实现网络接口）"""
@@ -727,6 +766,11 @@ class NetworkStudentWindow:
     def logout(self):
         """注销并返回登录窗口"""
         if messagebox.askyesno("确认", "确定要注销并返回登录界面吗？"):
+            self.async_client.shutdown()
+            try:
+                self.client.logout()
+            except Exception:
+                pass
             try:
                 self.root.destroy()
             except Exception:
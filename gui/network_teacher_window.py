@@ -4,6 +4,7 @@ from tkinter import ttk, messagebox
 import os
 
 from visualization.visualization_core import show_visual
+from network.async_client import AsyncClient
 
 
 class NetworkTeacherWindow:
@@ -30,6 +31,9 @@ class NetworkTeacherWindow:
         )
         self.root.geometry("1100x750")
 
+        # 网络请求在后台线程执行，避免阻塞界面
+        self.async_client = AsyncClient(self.client, self.root)
+
         # 窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.logout)
 
@@ -344,33 +348,38 @@ class NetworkTeacherWindow:
 
     def load_my_courses(self):
         """加载我的课程（通过服务器）"""
-        for item in self.course_tree.get_children():
-            self.course_tree.delete(item)
+        def on_courses(resp):
+            if not resp.get('success'):
+                messagebox.showerror("错误", resp.get('message', '获取课程失败'))
+                return
 
-        resp = self.client.get_teacher_courses(self.teacher_info['teacher_id'])
-        if not resp.get('success'):
-            messagebox.showerror("错误", resp.get('message', '获取课程失败'))
-            return
+            courses = resp['data'].get('courses', [])
+            self.course_list = courses
 
-        courses = resp['data'].get('courses', [])
-        self.course_list = courses
-
-        for course in courses:
-            self.course_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    course.get('course_id'),
-                    course.get('course_name'),
-                    course.get('credits'),
-                    course.get('hours'),
-                    course.get('semester'),
-                    course.get('class_time'),
-                    course.get('classroom'),
-                    course.get('capacity'),
-                    course.get('enrolled_count', 0),
-                ),
-            )
+            for item in self.course_tree.get_children():
+                self.course_tree.delete(item)
+
+            for course in courses:
+                self.course_tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        course.get('course_id'),
+                        course.get('course_name'),
+                        course.get('credits'),
+                        course.get('hours'),
+                        course.get('semester'),
+                        course.get('class_time'),
+                        course.get('classroom'),
+                        course.get('capacity'),
+                        course.get('enrolled_count', 0),
+                    ),
+                )
+
+        self.async_client.call(
+            'get_teacher_courses', self.teacher_info['teacher_id'],
+            callback=on_courses, owner=self.course_tree,
+        )
 
     def view_course_students(self):
         """查看课程选课学生（通过服务器）"""
@@ -417,30 +426,32 @@ class NetworkTeacherWindow:
         tree.pack(fill=tk.BOTH, expand=True)
         scrollbar.config(command=tree.yview)
 
-        resp = self.client.get_course_students(course_id)
-        if not resp.get('success'):
-            messagebox.showerror("错误", resp.get('message', '获取学生列表失败'))
-            student_win.destroy()
-            return
+        def on_students(resp):
+            if not resp.get('success'):
+                messagebox.showerror("错误", resp.get('message', '获取学生列表失败'))
+                student_win.destroy()
+                return
 
-        students = resp['data'].get('students', [])
-        for student in students:
-            tree.insert(
-                "",
-                tk.END,
-                values=(
-                    student.get('student_id'),
-                    student.get('name'),
-                    student.get('class_name'),
-                    student.get('enrollment_date'),
-                ),
-            )
+            students = resp['data'].get('students', [])
+            for student in students:
+                tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        student.get('student_id'),
+                        student.get('name'),
+                        student.get('class_name'),
+                        student.get('enrollment_date'),
+                    ),
+                )
 
-        tk.Label(
-            student_win,
-            text=f"共 {len(students)} 名学生选课",
-            font=("微软雅黑", 11),
-        ).pack(pady=10)
+            tk.Label(
+                student_win,
+                text=f"共 {len(students)} 名学生选课",
+                font=("微软雅黑", 11),
+            ).pack(pady=10)
+
+        self.async_client.call('get_course_students', course_id, callback=on_students, owner=tree)
 
     # ==================== 成绩录入 ====================
 
@@ -474,15 +485,22 @@ class NetworkTeacherWindow:
         self.course_combo.pack(side=tk.LEFT, padx=10)
 
         # 加载课程列表
-        resp = self.client.get_teacher_courses(self.teacher_info['teacher_id'])
-        if not resp.get('success'):
-            messagebox.showerror("错误", resp.get('message', '获取课程失败'))
-            return
-        courses = resp['data'].get('courses', [])
-        self.course_list = courses
-        self.course_combo['values'] = [
-            f"{c.get('course_id')} - {c.get('course_name')}" for c in courses
-        ]
+        self.course_list = []
+
+        def on_courses(resp):
+            if not resp.get('success'):
+                messagebox.showerror("错误", resp.get('message', '获取课程失败'))
+                return
+            courses = resp['data'].get('courses', [])
+            self.course_list = courses
+            self.course_combo['values'] = [
+                f"{c.get('course_id')} - {c.get('course_name')}" for c in courses
+            ]
+
+        self.async_client.call(
+            'get_teacher_courses', self.teacher_info['teacher_id'],
+            callback=on_courses, owner=self.course_combo,
+        )
 
         tk.Button(
             select_frame,
@@ -571,49 +589,57 @@ class NetworkTeacherWindow:
         course = self.course_list[index]
         course_id = course.get('course_id')
 
-        for item in self.grade_tree.get_children():
-            self.grade_tree.delete(item)
-
         # 获取选课学生
-        resp_students = self.client.get_course_students(course_id)
-        if not resp_students.get('success'):
-            messagebox.showerror("错误", resp_students.get('message', '获取学生失败'))
-            return
-        students = resp_students['data'].get('students', [])
+        def on_students(resp_students):
+            if not resp_students.get('success'):
+                messagebox.showerror("错误", resp_students.get('message', '获取学生失败'))
+                return
+            students = resp_students['data'].get('students', [])
 
-        # 获取成绩
-        resp_grades = self.client.get_course_grades(course_id)
-        if not resp_grades.get('success'):
-            messagebox.showerror("错误", resp_grades.get('message', '获取成绩失败'))
-            return
-        grades = resp_grades['data'].get('grades', [])
-        grades_dict = {g.get('student_id'): g for g in grades}
-
-        # 缓存当前课程和其成绩，供可视化使用
-        self.current_course_grades = grades
-        self.current_course_name = course.get('course_name')
-
-        for student in students:
-            sid = student.get('student_id')
-            grade = grades_dict.get(sid, {})
-            usual = grade.get('usual_score')
-            exam = grade.get('exam_score')
-            final_score = grade.get('final_score')
-
-            self.grade_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    sid,
-                    student.get('name'),
-                    student.get('class_name'),
-                    f"{usual:.1f}" if usual is not None else "-",
-                    f"{exam:.1f}" if exam is not None else "-",
-                    f"{final_score:.1f}" if final_score is not None else "-",
-                    grade.get('grade_level', '-'),
-                ),
+            # 获取成绩
+            def on_grades(resp_grades):
+                if not resp_grades.get('success'):
+                    messagebox.showerror("错误", resp_grades.get('message', '获取成绩失败'))
+                    return
+                grades = resp_grades['data'].get('grades', [])
+                grades_dict = {g.get('student_id'): g for g in grades}
+
+                # 缓存当前课程和其成绩，供可视化使用
+                self.current_course_grades = grades
+                self.current_course_name = course.get('course_name')
+
+                for item in self.grade_tree.get_children():
+                    self.grade_tree.delete(item)
+
+                for student in students:
+                    sid = student.get('student_id')
+                    grade = grades_dict.get(sid, {})
+                    usual = grade.get('usual_score')
+                    exam = grade.get('exam_score')
+                    final_score = grade.get('final_score')
+
+                    self.grade_tree.insert(
+                        "",
+                        tk.END,
+                        values=(
+                            sid,
+                            student.get('name'),
+                            student.get('class_name'),
+                            f"{usual:.1f}" if usual is not None else "-",
+                            f"{exam:.1f}" if exam is not None else "-",
+                            f"{final_score:.1f}" if final_score is not None else "-",
+                            grade.get('grade_level', '-'),
+                        ),
+                    )
+
+            self.async_client.call(
+                'get_course_grades', course_id, callback=on_grades, owner=self.grade_tree
             )
 
+        self.async_client.call(
+            'get_course_students', course_id, callback=on_students, owner=self.grade_tree
+        )
+
     def edit_grade(self):
         """编辑成绩（通过服务器）"""
         if not self.course_combo.get():
@@ -694,13 +720,15 @@ class NetworkTeacherWindow:
                     'semester': course.get('semester'),
                 }
 
-                resp = self.client.add_or_update_grade(grade_data)
-                if resp.get('success'):
-                    messagebox.showinfo("成功", resp.get('message', '成绩录入成功'))
-                    edit_win.destroy()
-                    self.load_course_students()
-                else:
-                    messagebox.showerror("错误", resp.get('message', '成绩录入失败'))
+                def on_saved(resp):
+                    if resp.get('success'):
+                        messagebox.showinfo("成功", resp.get('message', '成绩录入成功'))
+                        edit_win.destroy()
+                        self.load_course_students()
+                    else:
+                        messagebox.showerror("错误", resp.get('message', '成绩录入失败'))
+
+                self.async_client.call('add_or_update_grade', grade_data, callback=on_saved)
             except ValueError:
                 messagebox.showerror("错误", "请输入有效的数字！")
 
@@ -775,41 +803,46 @@ class NetworkTeacherWindow:
         scrollbar.config(command=self.student_tree.yview)
 
         def load_and_filter():
-            resp = self.client.get_teacher_students(self.teacher_info['teacher_id'])
-            if not resp.get('success'):
-                messagebox.showerror("错误", resp.get('message', '获取学生列表失败'))
-                return
-            all_students = resp['data'].get('students', [])
-
-            keyword = search_entry.get().strip()
-            if keyword:
-                students = [
-                    s for s in all_students
-                    if keyword in s.get('student_id', '')
-                    or keyword in s.get('name', '')
-                    or keyword in s.get('major', '')
-                ]
-            else:
-                students = all_students
-
-            for item in self.student_tree.get_children():
-                self.student_tree.delete(item)
-
-            for s in students:
-                self.student_tree.insert(
-                    "",
-                    tk.END,
-                    values=(
-                        s.get('student_id'),
-                        s.get('name'),
-                        s.get('gender'),
-                        s.get('major'),
-                        s.get('grade'),
-                        s.get('class_name'),
-                        s.get('phone'),
-                        s.get('courses', '-'),
-                    ),
-                )
+            def on_students(resp):
+                if not resp.get('success'):
+                    messagebox.showerror("错误", resp.get('message', '获取学生列表失败'))
+                    return
+                all_students = resp['data'].get('students', [])
+
+                keyword = search_entry.get().strip()
+                if keyword:
+                    students = [
+                        s for s in all_students
+                        if keyword in s.get('student_id', '')
+                        or keyword in s.get('name', '')
+                        or keyword in s.get('major', '')
+                    ]
+                else:
+                    students = all_students
+
+                for item in self.student_tree.get_children():
+                    self.student_tree.delete(item)
+
+                for s in students:
+                    self.student_tree.insert(
+                        "",
+                        tk.END,
+                        values=(
+                            s.get('student_id'),
+                            s.get('name'),
+                            s.get('gender'),
+                            s.get('major'),
+                            s.get('grade'),
+                            s.get('class_name'),
+                            s.get('phone'),
+                            s.get('courses', '-'),
+                        ),
+                    )
+
+            self.async_client.call(
+                'get_teacher_students', self.teacher_info['teacher_id'],
+                callback=on_students, owner=self.student_tree,
+            )
 
         tk.Button(
             search_frame,
@@ -905,14 +938,16 @@ class NetworkTeacherWindow:
                 messagebox.showerror("错误", "新密码长度至少6位！")
                 return
 
-            resp = self.client.change_password(
-                self.user_info['username'], old_pwd, new_pwd
+            def on_changed(resp):
+                if resp.get('success'):
+                    messagebox.showinfo("成功", resp.get('message', '密码修改成功！请重新登录。'))
+                    self.logout()
+                else:
+                    messagebox.showerror("错误", resp.get('message', '旧密码错误或修改失败！'))
+
+            self.async_client.call(
+                'change_password', self.user_info['username'], old_pwd, new_pwd, callback=on_changed
             )
-            if resp.get('success'):
-                messagebox.showinfo("成功", resp.get('message', '密码修改成功！请重新登录。'))
-                self.logout()
-            else:
-                messagebox.showerror("错误", resp.get('message', '旧密码错误或修改失败！'))
 
         tk.Button(
             input_frame,
@@ -933,6 +968,11 @@ class NetworkTeacherWindow:
     def logout(self):
         """注销并返回登录窗口"""
         if messagebox.askyesno("确认", "确定要注销并返回登录界面吗？"):
+            self.async_client.shutdown()
+            try:
+                self.client.logout()
+            except Exception:
+                pass
             try:
                 self.root.destroy()
             except Exception:
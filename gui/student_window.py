@@ -6,12 +6,10 @@ from tkinter import ttk, messagebox
 import sys
 import os
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_manager import DatabaseManager
-from visualization.visual_utils import create_figure
+from visualization.visual_utils import ChartController, create_figure
 
 
 class StudentWindow:
@@ -647,6 +645,9 @@ class StudentWindow:
 
     def show_grade_analytics(self):
         """显示成绩分析"""
+        # matplotlib 在第一次打开成绩分析时才导入
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         self.clear_content()
 
         tk.Label(
@@ -679,23 +680,22 @@ class StudentWindow:
         trend_canvas_frame = tk.Frame(tab_trend, bg='white')
         trend_canvas_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        trend_fig = create_figure(figsize=(8, 4.5))
-        trend_ax = trend_fig.add_subplot(111)
-        trend_canvas = FigureCanvasTkAgg(trend_fig, master=trend_canvas_frame)
-        trend_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # 图表只创建一次，刷新时原地更新折线（见 ChartController）
+        trend_chart = ChartController(trend_canvas_frame, figsize=(8, 4.5))
+        trend_chart.ax.grid(True, linestyle='--', alpha=0.3)
+        trend_chart.widget.pack(fill=tk.BOTH, expand=True)
 
         def _plot_trend():
             try:
-                trend_ax.clear()
                 data = self.db.get_student_semester_trend(student_id)
                 student_series = data.get('student') or []
                 major_series = data.get('major') or []
                 class_series = data.get('class') or []
                 meta = data.get('student_meta') or {}
 
+                trend_chart.begin()
                 if not student_series:
-                    trend_ax.text(0.5, 0.5, '暂无成绩数据', ha='center', va='center')
-                    trend_canvas.draw()
+                    trend_chart.finish(message='暂无成绩数据')
                     return
 
                 semesters = [d['semester'] for d in student_series]
@@ -711,42 +711,50 @@ class StudentWindow:
                 y_major = [major_map.get(s) for s in semesters]
                 y_class = [class_map.get(s) for s in semesters]
 
-                trend_ax.plot(semesters, y_student, marker='o', linewidth=2.0, label='个人平均分')
+                x = list(range(len(semesters)))
+                trend_chart.line('student', x, y_student, marker='o', linewidth=2.0,
+                                 label='个人平均分', color='C0')
                 if any(v is not None for v in y_major):
-                    trend_ax.plot(
-                        semesters,
+                    trend_chart.line(
+                        'major',
+                        x,
                         y_major,
                         marker='o',
                         linewidth=1.6,
                         linestyle='--',
                         label=f"专业平均分({meta.get('major') or ''})",
+                        color='C1',
                     )
                 if any(v is not None for v in y_class):
-                    trend_ax.plot(
-                        semesters,
+                    trend_chart.line(
+                        'class',
+                        x,
                         y_class,
                         marker='o',
                         linewidth=1.6,
                         linestyle='--',
                         label=f"班级平均分({meta.get('class_name') or ''})",
+                        color='C2',
                     )
 
-                trend_ax.set_title('按学期平均分趋势')
-                trend_ax.set_xlabel('学期')
-                trend_ax.set_ylabel('平均分')
-
                 # Y 轴范围：根据当前显示数据自适应（避免固定 0-100）
+                ylim = None
                 y_candidates = [v for v in (y_student + y_major + y_class) if isinstance(v, (int, float))]
                 if y_candidates:
                     ymin = min(y_candidates)
                     ymax = max(y_candidates)
                     pad = max(2.0, (ymax - ymin) * 0.1)
-                    trend_ax.set_ylim(max(0, ymin - pad), min(100, ymax + pad))
-                trend_ax.tick_params(axis='x', rotation=30)
-                trend_ax.legend(loc='best')
-                trend_ax.grid(True, linestyle='--', alpha=0.3)
-                trend_fig.tight_layout()
-                trend_canvas.draw()
+                    ylim = (max(0, ymin - pad), min(100, ymax + pad))
+                trend_chart.finish(
+                    title='按学期平均分趋势',
+                    xlabel='学期',
+                    ylabel='平均分',
+                    xticks=x,
+                    xticklabels=semesters,
+                    xtick_rotation=30,
+                    ylim=ylim,
+                    legend=True,
+                )
             except Exception as e:
                 messagebox.showerror('错误', f'生成趋势图失败: {e}')
 
@@ -800,6 +808,9 @@ class StudentWindow:
         radar_canvas = FigureCanvasTkAgg(radar_fig, master=radar_canvas_frame)
         radar_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
+        # 各学期雷达图数据，打开页面时一次查询取得，切换学期不再访问数据库
+        radar_rows = {}
+
         def _plot_radar():
             try:
                 semester = (semester_var.get() or '').strip()
@@ -809,7 +820,7 @@ class StudentWindow:
 
                 radar_ax.clear()
 
-                rows = self.db.get_student_semester_course_scores(student_id, semester)
+                rows = radar_rows.get(semester)
                 if not rows:
                     radar_ax.text(0.5, 0.5, '该学期暂无成绩数据', ha='center', va='center', transform=radar_ax.transAxes)
                     radar_canvas.draw()
@@ -899,6 +910,8 @@ class StudentWindow:
                 messagebox.showerror('错误', f'生成雷达图失败: {e}')
 
         def _load_semesters():
+            radar_rows.clear()
+            radar_rows.update(self.db.get_student_course_scores_by_semester(student_id))
             semesters = self.db.get_student_semesters(student_id)
             semester_cb['values'] = semesters
             if semesters:
@@ -6,13 +6,10 @@ from tkinter import ttk, messagebox
 import sys
 import os
 
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_manager import DatabaseManager
+from analytics import get_analytics
 
 
 class TeacherWindow:
@@ -163,7 +160,7 @@ class TeacherWindow:
         # 加载学期数据
         semester_values = ["全部"]
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_read_connection() as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT DISTINCT semester FROM courses WHERE teacher_id = ? ORDER BY semester DESC", (teacher_id,))
                 semester_values.extend([r[0] for r in cur.fetchall()])
@@ -204,7 +201,7 @@ class TeacherWindow:
             sel_semester = self.fail_semester_var.get().strip()
             
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     sql = "SELECT DISTINCT course_name FROM courses WHERE teacher_id = ?"
                     params = [teacher_id]
@@ -226,7 +223,7 @@ class TeacherWindow:
             sel_course = self.fail_course_var.get().strip()
             
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     sql = """
                         SELECT DISTINCT s.class_name 
@@ -295,12 +292,12 @@ class TeacherWindow:
             sel_class = self.fail_class_var.get().strip()
             
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     
                     sql = """
                         SELECT s.student_id, s.name, s.class_name, c.course_name, 
-                               TRUNCATE(g.final_score, 2), 
+                               g.final_score,
                                c.semester
                         FROM grades g
                         JOIN courses c ON g.course_id = c.course_id
@@ -429,7 +426,7 @@ class TeacherWindow:
         def update_rank_courses(event=None):
             sel_semester = self.rank_semester_var.get().strip()
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     sql = "SELECT DISTINCT course_name FROM courses WHERE teacher_id = ?"
                     params = [teacher_id]
@@ -451,7 +448,7 @@ class TeacherWindow:
             sel_course = self.rank_course_var.get().strip()
             
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     sql = """
                         SELECT DISTINCT s.class_name 
@@ -495,7 +492,7 @@ class TeacherWindow:
             sel_class = self.rank_class_var.get().strip()
             
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     
                     sql = """
@@ -597,7 +594,8 @@ class TeacherWindow:
         hist_chart_frame = tk.Frame(tab_hist, bg='white')
         hist_chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        self._hist_canvas = None
+        # 第一次生成直方图时创建，之后切换条件只更新柱高
+        self._hist_chart = None
         self._hist_course_id_map = {}
 
         def refresh_hist_course_options():
@@ -636,7 +634,7 @@ class TeacherWindow:
                 self.hist_class_var.set("全部")
                 return
             try:
-                with self.db.get_connection() as conn:
+                with self.db.get_read_connection() as conn:
                     cur = conn.cursor()
                     cur.execute(
                         """
@@ -658,6 +656,9 @@ class TeacherWindow:
         hist_course_combo.bind("<<ComboboxSelected>>", refresh_hist_class_options)
 
         def draw_histogram():
+            # matplotlib 在第一次绘图时才导入
+            from visualization.visual_utils import ChartController
+
             course_label = self.hist_course_var.get().strip()
             course_id = self._hist_course_id_map.get(course_label)
             metric_text = self.hist_metric_var.get().strip()
@@ -672,65 +673,42 @@ class TeacherWindow:
                 return
 
             try:
-                with self.db.get_connection() as conn:
-                    cur = conn.cursor()
-                    sql = f"""
-                        SELECT g.{metric_field}
-                        FROM grades g
-                        JOIN courses c ON g.course_id = c.course_id
-                        JOIN students s ON g.student_id = s.student_id
-                        WHERE c.teacher_id = ?
-                          AND c.course_id = ?
-                          AND g.{metric_field} IS NOT NULL
-                    """
-                    params = [teacher_id, course_id]
-                    if sel_class and sel_class != "全部":
-                        sql += " AND s.class_name = ?"
-                        params.append(sel_class)
-
-                    cur.execute(sql, params)
-                    scores = [float(r[0]) for r in cur.fetchall() if r[0] is not None]
+                distribution = get_analytics(self.db).distribution(
+                    field=metric_field,
+                    teacher_id=teacher_id,
+                    course_id=course_id,
+                    class_name=sel_class,
+                )
             except Exception as e:
                 messagebox.showerror("错误", f"加载成绩数据失败: {e}")
                 return
 
-            if not scores:
+            if not distribution:
                 messagebox.showinfo("提示", "该条件下暂无成绩数据。")
                 return
 
-            for widget in hist_chart_frame.winfo_children():
-                widget.destroy()
-
-            bins = np.arange(0, 101, 10)
-            counts, edges = np.histogram(scores, bins=bins)
+            counts = distribution[0]['counts']
+            edges = distribution[0]['bins']
             labels = [f"{int(edges[i])}-{int(edges[i+1]-1)}" for i in range(len(edges) - 2)] + ["90-100"]
 
-            fig, ax = plt.subplots(figsize=(9, 4.5))
-            x = np.arange(len(counts))
-            bars = ax.bar(x, counts, color="#2196F3", alpha=0.85)
+            chart = self._hist_chart
+            if chart is None:
+                chart = self._hist_chart = ChartController(hist_chart_frame, figsize=(9, 4.5))
+                chart.widget.pack(fill=tk.BOTH, expand=True)
 
-            ax.set_xticks(x)
-            ax.set_xticklabels(labels, rotation=0)
-            ax.set_ylabel("人数")
             title_parts = ["成绩分布直方图", metric_text, course_label]
             if sel_class and sel_class != "全部":
                 title_parts.append(f"班级:{sel_class}")
-            ax.set_title(" ".join(title_parts))
-
-            for rect, cnt in zip(bars, counts):
-                ax.text(
-                    rect.get_x() + rect.get_width() / 2,
-                    rect.get_height(),
-                    str(int(cnt)),
-                    ha='center',
-                    va='bottom',
-                    fontsize=9,
-                )
 
-            fig.tight_layout()
-            self._hist_canvas = FigureCanvasTkAgg(fig, master=hist_chart_frame)
-            self._hist_canvas.draw()
-            self._hist_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            chart.begin()
+            x = list(range(len(counts)))
+            chart.bars("counts", x, counts, color="#2196F3", alpha=0.85)
+            chart.finish(
+                title=" ".join(title_parts),
+                ylabel="人数",
+                xticks=x,
+                xticklabels=labels,
+            )
 
         tk.Button(
             hist_tool_frame,
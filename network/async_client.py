@@ -0,0 +1,125 @@
+"""
+异步客户端模块
+在后台I/O线程执行网络请求，结果通过回调交回Tk主循环，避免界面卡顿
+"""
+import itertools
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from network.protocol import WRITE_ACTIONS
+
+# 不合并的方法：写操作重复提交时每次都要执行（如选课、退课后再次选课）
+_NO_COALESCE = WRITE_ACTIONS | {'login', 'logout', 'send_request'}
+
+
+class AsyncClient:
+    """Client 的异步包装
+
+    用法：
+        self.async_client = AsyncClient(client, root)
+        self.async_client.call('get_all_students', callback=self.on_students)
+
+    - 请求在单个后台线程中按提交顺序执行（底层 Client 本身是串行的）
+    - 回调在 Tk 主线程中执行（通过 root.after 轮询结果队列）
+    - 相同方法和参数的读请求仍在进行中时，重复提交会合并为同一个请求（写操作不合并）
+    - 传入 owner 控件时，若结果返回前该控件已销毁（如已切换页面），则不再调用回调
+    """
+
+    def __init__(self, client, root, poll_interval=20):
+        self.client = client
+        self.root = root
+        self.poll_interval = poll_interval
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='client-io')
+        self._results = queue.Queue()
+        # 进行中的请求：key -> (future, [(callback, errback), ...])
+        self._inflight = {}
+        self._write_seq = itertools.count()
+        self._polling = False
+
+    def call(self, method, *args, callback=None, errback=None, owner=None, **kwargs):
+        """提交请求，返回 Future；callback(resp)/errback(exc) 在主线程中调用"""
+        if method in _NO_COALESCE:
+            key = (method, next(self._write_seq))
+        else:
+            key = (method, self._freeze(args), self._freeze(kwargs))
+
+        entry = self._inflight.get(key)
+        if entry is not None:
+            # 请求合并：例如用户连续双击“刷新”。
+            # 同一处代码注册的回调只保留最新一个，避免重复刷新界面
+            future, listeners = entry
+            listener_key = self._listener_key(callback)
+            listeners[:] = [
+                item for item in listeners
+                if listener_key is None or self._listener_key(item[0]) != listener_key
+            ]
+            listeners.append((callback, errback, owner))
+            return future
+
+        func = getattr(self.client, method)
+        future = self._executor.submit(func, *args, **kwargs)
+        self._inflight[key] = (future, [(callback, errback, owner)])
+        future.add_done_callback(lambda f: self._results.put((key, f)))
+        self._schedule_poll()
+        return future
+
+    def _listener_key(self, callback):
+        """回调的来源标识：绑定方法按 (实例, 函数)，闭包按代码对象"""
+        if callback is None:
+            return None
+        if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+            return (id(callback.__self__), callback.__func__)
+        return getattr(callback, '__code__', callback)
+
+    def _freeze(self, value):
+        """把参数转换为可哈希的形式，用作合并请求的键"""
+        if isinstance(value, dict):
+            return tuple(sorted((k, self._freeze(v)) for k, v in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(self._freeze(v) for v in value)
+        if isinstance(value, set):
+            return tuple(sorted(self._freeze(v) for v in value))
+        return value
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            try:
+                self.root.after(self.poll_interval, self._drain)
+            except Exception:
+                # 窗口已销毁
+                self._polling = False
+
+    def _drain(self):
+        """在主线程中分发已完成请求的回调"""
+        self._polling = False
+        while True:
+            try:
+                key, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            _, listeners = self._inflight.pop(key, (future, []))
+            error = future.exception()
+            for callback, errback, owner in listeners:
+                try:
+                    if owner is not None and not owner.winfo_exists():
+                        continue
+                    if error is None:
+                        if callback:
+                            callback(future.result())
+                    elif errback:
+                        errback(error)
+                    else:
+                        print(f"异步请求出错: {error}")
+                except Exception as e:
+                    # 回调对应的界面可能已被关闭
+                    print(f"处理请求结果时出错: {e}")
+
+        if self._inflight:
+            self._schedule_poll()
+
+    def shutdown(self):
+        """停止后台线程（不等待未完成的请求）"""
+        self._executor.shutdown(wait=False)
@@ -3,24 +3,72 @@
 连接服务器并发送请求
 """
 import socket
-import json
+import random
+import threading
+import time
+import uuid
+
+from network.protocol import WRITE_ACTIONS, encode_message, decode_message, enable_keepalive
 
 
 class Client:
     """客户端类"""
     
-    def __init__(self, host='127.0.0.1', port=8888):
+    def __init__(self, host='127.0.0.1', port=8888, timeout=10, connect_timeout=5,
+                 auto_reconnect=True, max_retries=5, backoff_base=0.5, backoff_max=8,
+                 max_retry_after=2):
         self.host = host
         self.port = port
         self.socket = None
+        self.reader = None
         self.connected = False
+        # 登录后服务器签发的会话令牌
+        self.token = None
+        
+        # 超时与重连配置（秒）
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.auto_reconnect = auto_reconnect
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # 被限流时愿意等待的最长时间，超过则直接把限流响应交给调用方
+        self.max_retry_after = max_retry_after
+        
+        # 会话令牌失效（如服务器重启）时用于自动重新登录，仅保存在内存中
+        self._credentials = None
+        # 调用过 connect() 且没有主动断开：重连失败后，之后的请求会再尝试连接
+        self._wants_connection = False
+        self._lock = threading.RLock()
+    
+    def _open_socket(self):
+        """建立底层连接"""
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        try:
+            enable_keepalive(sock)
+        except OSError:
+            pass
+        sock.settimeout(self.timeout)
+        self.socket = sock
+        self.reader = sock.makefile('rb')
+        self.connected = True
+    
+    def _close_socket(self):
+        """关闭底层连接（不清除会话）"""
+        for obj in (self.reader, self.socket):
+            if obj:
+                try:
+                    obj.close()
+                except Exception:
+                    pass
+        self.reader = None
+        self.socket = None
     
     def connect(self):
         """连接到服务器"""
+        self._wants_connection = True
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
-            self.connected = True
+            self._open_socket()
             print(f"连接服务器成功: {self.host}:{self.port}")
             return True
         except Exception as e:
@@ -30,52 +78,159 @@ class Client:
     
     def disconnect(self):
         """断开连接"""
-        if self.socket:
+        with self._lock:
+            if self.socket and self.token:
+                try:
+                    self._roundtrip({'action': 'logout', 'data': {}, 'token': self.token})
+                except Exception:
+                    pass
+            self._close_socket()
+            self.connected = False
+            self._wants_connection = False
+            self.token = None
+            self._credentials = None
+        print("已断开服务器连接")
+    
+    def _roundtrip(self, request):
+        """发送一条请求并读取一条响应"""
+        if self.socket is None:
+            raise ConnectionError('连接已断开')
+        self.socket.sendall(encode_message(request))
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError('服务器关闭了连接')
+        return decode_message(line)
+    
+    def _backoff_delay(self, attempt):
+        """指数退避等待时间（带随机抖动）"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+    
+    def _reconnect(self):
+        """断线后按指数退避重连，并恢复会话"""
+        self._close_socket()
+        for attempt in range(1, self.max_retries + 1):
+            time.sleep(self._backoff_delay(attempt))
             try:
-                self.socket.close()
-            except:
-                pass
+                self._open_socket()
+            except OSError as e:
+                print(f"重连失败（第{attempt}次）: {e}")
+                continue
+            print(f"已重新连接服务器: {self.host}:{self.port}")
+            self._resume_session()
+            return True
         self.connected = False
-        print("已断开服务器连接")
+        return False
+    
+    def _restore_connection(self):
+        """之前的重连已放弃时，在新请求开始前再尝试连接一次（不退避等待）"""
+        if not self.auto_reconnect or not self._wants_connection:
+            return False
+        try:
+            self._open_socket()
+            self._resume_session()
+        except OSError as e:
+            print(f"连接服务器失败: {e}")
+            self._close_socket()
+            self.connected = False
+            return False
+        print(f"已重新连接服务器: {self.host}:{self.port}")
+        return True
+    
+    def _resume_session(self):
+        """在新连接上恢复会话；令牌失效时用缓存的凭据重新登录"""
+        if self.token:
+            response = self._roundtrip({
+                'action': 'resume_session',
+                'data': {'token': self.token},
+            })
+            if response.get('success'):
+                return True
+            self.token = None
+        
+        if self._credentials:
+            response = self._roundtrip({
+                'action': 'login',
+                'data': dict(self._credentials),
+            })
+            if response.get('success'):
+                session = response.get('data', {}).get('session') or {}
+                self.token = session.get('token')
+                return True
+        return False
     
     def send_request(self, action, data=None):
-        """发送请求"""
-        if not self.connected:
-            return {
-                'success': False,
-                'message': '未连接到服务器'
-            }
+        """发送请求（连接中断时自动重连并重试一次；等待响应超时不重试）"""
+        # 构造请求
+        request = {
+            'action': action,
+            'data': data or {},
+        }
+        # 写操作附带幂等键，重试时服务器不会重复执行
+        if action in WRITE_ACTIONS:
+            request['request_id'] = uuid.uuid4().hex
         
-        try:
-            # 构造请求
-            request = {
-                'action': action,
-                'data': data or {}
-            }
-            
-            # 发送请求
-            self.socket.send(json.dumps(request).encode('utf-8'))
-            
-            # 接收响应
-            response_data = self.socket.recv(4096)
-            response = json.loads(response_data.decode('utf-8'))
+        with self._lock:
+            if not self.connected and not self._restore_connection():
+                return {
+                    'success': False,
+                    'message': '未连接到服务器'
+                }
+            try:
+                try:
+                    request['token'] = self.token
+                    response = self._roundtrip(request)
+                except socket.timeout:
+                    raise
+                except OSError:
+                    if not self.auto_reconnect or not self._reconnect():
+                        raise
+                    request['token'] = self.token
+                    response = self._roundtrip(request)
+                
+                # 服务器限流时按建议时间等待后重试一次
+                retry_after = response.get('retry_after')
+                if response.get('code') == 'rate_limited' and retry_after is not None \
+                        and retry_after <= self.max_retry_after:
+                    time.sleep(retry_after)
+                    response = self._roundtrip(request)
+                return response
             
-            return response
-        
-        except Exception as e:
-            return {
-                'success': False,
-                'message': f'请求失败: {str(e)}'
-            }
+            except socket.timeout:
+                # 服务器可能仍在处理该请求，重发会使写操作执行两次；
+                # 迟到的响应会与后续请求错位，因此断开连接，下次请求时重新连接
+                self._close_socket()
+                self.connected = False
+                return {
+                    'success': False,
+                    'message': '请求超时：服务器未在规定时间内响应'
+                }
+            except Exception as e:
+                return {
+                    'success': False,
+                    'message': f'请求失败: {str(e)}'
+                }
     
     # ==================== 用户操作 ====================
     
     def login(self, username, password):
-        """登录"""
-        return self.send_request('login', {
+        """登录（成功后保存会话令牌）"""
+        response = self.send_request('login', {
             'username': username,
             'password': password
         })
+        if response.get('success'):
+            session = response.get('data', {}).get('session') or {}
+            self.token = session.get('token')
+            self._credentials = {'username': username, 'password': password}
+        return response
+    
+    def logout(self):
+        """注销当前会话"""
+        response = self.send_request('logout')
+        self.token = None
+        self._credentials = None
+        return response
     
     # ==================== 学生操作 ====================
     
@@ -111,6 +266,12 @@ class Client:
             'student_id': student_id
         })
     
+    def get_student_semester_trend(self, student_id):
+        """学生、所在专业、所在班级的学期平均分曲线（student / major / class / student_meta）"""
+        return self.send_request('get_student_semester_trend', {
+            'student_id': student_id
+        })
+    
     # ==================== 教师操作 ====================
     
     def get_teacher_info(self, user_id):
@@ -165,9 +326,78 @@ class Client:
         """获取成绩分布"""
         return self.send_request('get_grade_distribution')
 
-    def get_logs(self, limit=100):
-        """获取系统日志"""
-        return self.send_request('get_logs', {'limit': limit})
+    def get_grade_analytics(self, report='group_stats', filters=None, **params):
+        """成绩分析（分组统计、排名、分位数、成绩分布、学期趋势）
+
+        例如 get_grade_analytics('group_stats', {'grade': '2022'}, by=['class_name'])
+        """
+        return self.send_request('get_grade_analytics',
+                                 {'report': report, 'filters': filters or {}, **params})
+
+    def get_student_rank(self, student_id):
+        """学生各学期及累计的加权平均分、绩点和专业/班级名次"""
+        return self.send_request('get_student_rank', {'student_id': student_id})
+
+    def get_top_students(self, grade, major, class_name=None, semester=None,
+                         metric='weighted_avg', limit=None):
+        """专业（或班级）成绩排名前 limit 名，metric 为 weighted_avg 或 gpa"""
+        return self.send_request('get_top_students', {
+            'grade': grade,
+            'major': major,
+            'class_name': class_name,
+            'semester': semester,
+            'metric': metric,
+            'limit': limit,
+        })
+
+    def get_risk_timeline(self):
+        """各学期学业预警、缺考、退学/休学人数"""
+        return self.send_request('get_risk_timeline')
+
+    def get_risk_list(self, semester=None, grade=None, major=None, class_name=None,
+                      min_level=1, limit=None):
+        """学业预警名单（默认最近一个学期），min_level 为 2 时只返回“预警”级别"""
+        return self.send_request('get_risk_list', {
+            'semester': semester,
+            'grade': grade,
+            'major': major,
+            'class_name': class_name,
+            'min_level': min_level,
+            'limit': limit,
+        })
+
+    def get_student_risks(self, student_id):
+        """学生各学期的学业预警记录"""
+        return self.send_request('get_student_risks', {'student_id': student_id})
+
+    def render_chart(self, chart, params=None, fmt='png', if_version=None):
+        """服务器渲染的图表：data 中 image 为 base64 编码的图片，version 为数据版本；
+        if_version 与当前版本相同时 not_modified 为 True、image 为 None"""
+        return self.send_request('render_chart', {
+            'chart': chart,
+            'params': params or {},
+            'format': fmt,
+            'if_version': if_version,
+        })
+
+    def get_server_metrics(self):
+        """获取服务器请求指标"""
+        return self.send_request('get_server_metrics')
+
+    def get_logs(self, limit=100, **filters):
+        """获取系统日志
+
+        filters: username, log_action, start, end, keyword, offset
+        """
+        return self.send_request('get_logs', {'limit': limit, **filters})
+
+    def get_log_archives(self):
+        """已归档日志的月份列表"""
+        return self.send_request('get_log_archives')
+
+    def get_archived_logs(self, month, limit=100):
+        """读取某月（YYYY-MM）的归档日志"""
+        return self.send_request('get_archived_logs', {'month': month, 'limit': limit})
 
     def clear_logs(self):
         """清空系统日志"""
@@ -268,11 +498,14 @@ class Client:
 
     def change_password(self, username, old_password, new_password):
         """修改密码（用户自助）"""
-        return self.send_request('change_password', {
+        response = self.send_request('change_password', {
             'username': username,
             'old_password': old_password,
             'new_password': new_password,
         })
+        if response.get('success') and self._credentials:
+            self._credentials['password'] = new_password
+        return response
 
 
 if __name__ == '__main__':
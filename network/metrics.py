@@ -0,0 +1,142 @@
+"""
+服务器指标模块
+按操作统计请求数、错误数、报文大小和耗时分布（p50/p95/p99），
+耗时拆分为数据库处理时间与序列化时间
+"""
+import bisect
+import os
+import threading
+import time
+
+
+# 直方图桶上界（毫秒）：0.1ms 起按 1.25 倍递增，覆盖到约 60 秒
+BUCKET_BOUNDS = []
+_bound = 0.1
+while _bound < 60000:
+    BUCKET_BOUNDS.append(round(_bound, 3))
+    _bound *= 1.25
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图，内存占用与请求数无关"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, ms)] += 1
+        self.total += 1
+        self.sum += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        """估算第 p 百分位（取所在桶的上界，不超过实际最大值）"""
+        if not self.total:
+            return 0.0
+        rank = max(1, int(round(self.total * p / 100.0)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if index < len(BUCKET_BOUNDS):
+                    return min(BUCKET_BOUNDS[index], self.max)
+                return self.max
+        return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+
+class ActionStats:
+    """单个操作的统计数据"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.db_time = 0.0         # 使用数据库连接的时间（DatabaseManager.db_time）
+        self.serialize_time = 0.0  # 请求解码与响应编码的时间
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def to_dict(self):
+        count = self.count or 1
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'p50_ms': round(self.latency.percentile(50), 2),
+            'p95_ms': round(self.latency.percentile(95), 2),
+            'p99_ms': round(self.latency.percentile(99), 2),
+            'max_ms': round(self.latency.max, 2),
+            'mean_ms': round(self.latency.mean(), 2),
+            'db_ms_avg': round(self.db_time / count, 2),
+            'serialize_ms_avg': round(self.serialize_time / count, 2),
+            'bytes_in_avg': self.bytes_in // count,
+            'bytes_out_avg': self.bytes_out // count,
+        }
+
+
+class ServerMetrics:
+    """服务器指标收集器（线程安全）"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._actions = {}
+        self._lock = threading.Lock()
+
+    def record(self, action, latency, db_time=0.0, serialize_time=0.0,
+               bytes_in=0, bytes_out=0, success=True):
+        """记录一次请求，耗时单位为秒"""
+        action = action or 'invalid'
+        with self._lock:
+            stats = self._actions.get(action)
+            if stats is None:
+                stats = self._actions[action] = ActionStats()
+            stats.count += 1
+            if not success:
+                stats.errors += 1
+            stats.latency.add(latency * 1000)
+            stats.db_time += db_time * 1000
+            stats.serialize_time += serialize_time * 1000
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+
+    def snapshot(self):
+        """返回各操作的统计数据，按请求数从多到少排列"""
+        with self._lock:
+            actions = {name: stats.to_dict() for name, stats in self._actions.items()}
+        ordered = sorted(actions.items(), key=lambda item: item[1]['count'], reverse=True)
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 1),
+            'total_requests': sum(item['count'] for item in actions.values()),
+            'total_errors': sum(item['errors'] for item in actions.values()),
+            'actions': dict(ordered),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._actions = {}
+            self.started_at = time.time()
+
+    def format_text(self):
+        """格式化为文本表格，用于定期输出"""
+        snap = self.snapshot()
+        lines = [
+            f"[指标] pid={snap['pid']} 运行 {snap['uptime']:.0f}s "
+            f"请求 {snap['total_requests']} 错误 {snap['total_errors']}",
+            f"{'操作':<28}{'次数':>8}{'错误':>6}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'DB':>9}{'序列化':>9}{'出字节':>9}",
+        ]
+        for name, item in snap['actions'].items():
+            lines.append(
+                f"{name:<30}{item['count']:>8}{item['errors']:>6}"
+                f"{item['p50_ms']:>9.2f}{item['p95_ms']:>9.2f}{item['p99_ms']:>9.2f}"
+                f"{item['db_ms_avg']:>9.2f}{item['serialize_ms_avg']:>9.2f}"
+                f"{item['bytes_out_avg']:>9}"
+            )
+        return '\n'.join(lines)
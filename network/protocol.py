@@ -0,0 +1,67 @@
+"""
+网络协议模块
+客户端与服务器共用的消息编解码与套接字设置
+
+每条消息为一行 UTF-8 编码的 JSON，以换行符结尾（json.dumps 不会输出裸换行），
+因此任意长度的响应都能被完整读取。
+列表类查询结果以 {"__columns__": [...], "__rows__": [[...], ...]} 发送（列名只出现一次），
+接收端解码时还原为字典列表。
+"""
+import json
+import socket
+
+
+# 写操作：客户端重试时附带幂等键，服务器据此去重
+WRITE_ACTIONS = {
+    'enroll_course', 'drop_course', 'add_or_update_grade',
+    'add_student', 'update_student', 'delete_student',
+    'add_teacher', 'update_teacher', 'delete_teacher',
+    'add_course', 'update_course', 'delete_course',
+    'clear_logs', 'change_password',
+}
+
+
+def _encode_default(obj):
+    """序列化 JSON 不支持的对象：查询结果（TableRows）按列名+元组行发送"""
+    to_wire = getattr(obj, 'to_wire', None)
+    if to_wire is not None:
+        return to_wire()
+    raise TypeError(f'无法序列化的类型: {type(obj).__name__}')
+
+
+def _decode_object(obj):
+    """接收端把列名+元组行还原为字典列表"""
+    if '__columns__' in obj and '__rows__' in obj:
+        columns = obj['__columns__']
+        return [dict(zip(columns, row)) for row in obj['__rows__']]
+    return obj
+
+
+def encode_message(message):
+    """将消息编码为一行JSON字节串"""
+    return json.dumps(message, default=_encode_default).encode('utf-8') + b'\n'
+
+
+def decode_message(line):
+    """将一行JSON字节串解码为消息"""
+    return json.loads(line.decode('utf-8'), object_hook=_decode_object)
+
+
+def enable_keepalive(sock, idle=30, interval=10, count=3):
+    """开启TCP keepalive，尽早发现已失效的连接"""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    # Linux
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+    # macOS
+    elif hasattr(socket, 'TCP_KEEPALIVE'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+    if hasattr(socket, 'TCP_KEEPCNT'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+
+    # Windows
+    if hasattr(sock, 'ioctl') and hasattr(socket, 'SIO_KEEPALIVE_VALS'):
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle * 1000, interval * 1000))
@@ -0,0 +1,112 @@
+"""
+准入控制模块
+按用户的令牌桶限流 + 全局并发上限（为写操作预留名额）
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """令牌桶：以 rate 个/秒 的速度补充，最多积累 capacity 个"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, amount=1):
+        """尝试取出令牌，成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0
+        return (amount - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """按键（用户名/客户端地址）分别限流，读写使用独立的令牌桶
+
+    未登录的请求（登录、恢复会话）不适用按用户的读写限额：同一机房、宿舍的客户端常共用一个
+    NAT 地址，选课周集中登录时会被当作同一个客户端。这类请求按客户端地址使用更大的令牌桶
+    （public_rate/public_burst，默认 200 个/秒、突发 400），登录另按“地址 + 用户名”
+    限制为 login_rate/login_burst（默认 1 个/秒、突发 10），防止对单个账号反复试密码
+    """
+
+    def __init__(self, read_rate=20, read_burst=40, write_rate=10, write_burst=20,
+                 public_rate=200, public_burst=400, login_rate=1, login_burst=10,
+                 idle_expire=600):
+        self.read_rate = read_rate
+        self.read_burst = read_burst
+        self.write_rate = write_rate
+        self.write_burst = write_burst
+        self.public_rate = public_rate
+        self.public_burst = public_burst
+        self.login_rate = login_rate
+        self.login_burst = login_burst
+        self.idle_expire = idle_expire
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = time.monotonic()
+
+    def check(self, key, is_write=False):
+        """检查是否放行，返回 0 表示放行，否则返回建议的重试等待秒数"""
+        if is_write:
+            return self._consume((key, True), self.write_rate, self.write_burst)
+        return self._consume((key, False), self.read_rate, self.read_burst)
+
+    def check_public(self, address, username=None):
+        """未登录请求的限流：按客户端地址，登录时再按地址 + 用户名"""
+        wait = self._consume((address, 'public'), self.public_rate, self.public_burst)
+        if not wait and username:
+            wait = self._consume((address, 'login', username), self.login_rate, self.login_burst)
+        return wait
+
+    def _consume(self, bucket_key, rate, capacity):
+        with self._lock:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = TokenBucket(rate, capacity)
+            wait = bucket.consume()
+            self._cleanup()
+            return wait
+
+    def _cleanup(self):
+        """定期清理长时间未使用的令牌桶（调用方已持有锁）"""
+        now = time.monotonic()
+        if now - self._last_cleanup < self.idle_expire:
+            return
+        self._last_cleanup = now
+        stale = [k for k, b in self._buckets.items() if now - b.updated > self.idle_expire]
+        for key in stale:
+            del self._buckets[key]
+
+
+class ConcurrencyLimiter:
+    """全局并发上限：读请求最多占用 max_concurrent - write_reserved 个名额，写请求可用全部名额"""
+
+    def __init__(self, max_concurrent=32, write_reserved=8):
+        self.max_concurrent = max_concurrent
+        self.write_reserved = min(write_reserved, max_concurrent - 1)
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, is_write=False, timeout=0.5):
+        """在 timeout 秒内获取名额，成功返回 True"""
+        limit = self.max_concurrent if is_write else self.max_concurrent - self.write_reserved
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.active >= limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
@@ -6,42 +6,145 @@ import socket
 import threading
 import json
 import sys
+import time
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_manager import DatabaseManager
+from network.session import SessionManager
+from network.protocol import WRITE_ACTIONS, encode_message, decode_message, enable_keepalive
+from network.ratelimit import RateLimiter, ConcurrencyLimiter
+from network.metrics import ServerMetrics
+
+
+# 无需登录即可调用的操作
+PUBLIC_ACTIONS = {'login', 'resume_session'}
+
+# 教师只能对自己任课的课程执行的操作（课程号取自 course_id 或 grade_data.course_id）
+TEACHER_COURSE_ACTIONS = {'get_course_students', 'get_course_grades', 'add_or_update_grade'}
+
+# 各操作允许的角色（未列出的操作仅需已登录）
+ACTION_ROLES = {
+    'get_student_info': {'student', 'admin'},
+    'get_student_courses': {'student', 'admin'},
+    'enroll_course': {'student', 'admin'},
+    'drop_course': {'student', 'admin'},
+    'get_student_grades': {'student', 'admin'},
+    'get_student_semester_trend': {'student', 'admin'},
+    'get_teacher_info': {'teacher', 'admin'},
+    'get_teacher_courses': {'teacher', 'admin'},
+    'get_course_students': {'teacher', 'admin'},
+    'get_course_grades': {'teacher', 'admin'},
+    'get_teacher_students': {'teacher', 'admin'},
+    'add_or_update_grade': {'teacher', 'admin'},
+    'get_statistics': {'admin'},
+    'get_grade_distribution': {'admin'},
+    'get_grade_analytics': {'admin'},
+    'get_student_rank': {'student', 'admin'},
+    'get_top_students': {'admin'},
+    'get_risk_timeline': {'admin'},
+    'get_risk_list': {'admin'},
+    'get_student_risks': {'student', 'admin'},
+    'render_chart': {'admin'},
+    'get_logs': {'admin'},
+    'clear_logs': {'admin'},
+    'get_log_archives': {'admin'},
+    'get_archived_logs': {'admin'},
+    'get_all_students': {'admin'},
+    'add_student': {'admin'},
+    'update_student': {'admin'},
+    'delete_student': {'admin'},
+    'search_students': {'admin'},
+    'get_all_teachers': {'admin'},
+    'add_teacher': {'admin'},
+    'update_teacher': {'admin'},
+    'delete_teacher': {'admin'},
+    'search_teachers': {'admin'},
+    'add_course': {'admin'},
+    'update_course': {'admin'},
+    'delete_course': {'admin'},
+    'search_courses': {'admin'},
+    'get_all_users': {'admin'},
+    'get_server_metrics': {'admin'},
+}
 
 
 class Server:
     """服务器类"""
     
-    def __init__(self, host='0.0.0.0', port=8888):
+    def __init__(self, host='0.0.0.0', port=8888, reuse_port=False, backlog=128,
+                 drain_timeout=5.0, metrics_interval=300, log_retention_days=0,
+                 columns_snapshot=0):
         self.host = host
         self.port = port
+        # reuse_port: 多进程模式下各工作进程共享同一监听端口（SO_REUSEPORT）
+        self.reuse_port = reuse_port
+        self.backlog = backlog
         self.server_socket = None
         self.running = False
-        self.clients = []
+        self.stopped = False
+        # 停止时等待处理中请求完成的最长时间（秒）
+        self.drain_timeout = drain_timeout
+        # 客户端连接集合及处理中的请求数，由各处理线程并发修改，需加锁
+        self.clients = set()
+        self.inflight = 0
+        self._state_lock = threading.Condition()
         self.db = DatabaseManager()
+        # 停止时、数据库检查点之前执行的清理函数（刷新缓冲的日志队列、删除只读快照文件等）
+        self._shutdown_hooks = [self.db.flush_logs, self.db.read_pool.close]
+        self.sessions = SessionManager()
+        # 准入控制：按用户限流 + 全局并发上限（写操作优先）
+        self.rate_limiter = RateLimiter()
+        self.concurrency = ConcurrencyLimiter()
+        # 请求指标；metrics_interval 秒输出一次汇总（0 表示不输出）
+        self.metrics = ServerMetrics()
+        self.metrics_interval = metrics_interval
+        self._metrics_stop = threading.Event()
+        # 日志保留天数：启动时及此后每天归档一次过期日志（0 表示不自动归档）
+        self.log_retention_days = log_retention_days
+        # 成绩分析使用列式快照，每隔多少秒检查并重建一次（0 表示直接从数据库加载）
+        self.columns_snapshot = columns_snapshot
     
     def start(self):
-        """启动服务器"""
+        """启动服务器（阻塞至停止）；监听端口失败等启动错误时返回 False"""
+        started = False
         try:
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
+            self.server_socket.listen(self.backlog)
             self.running = True
+            started = True
             
             print(f"服务器启动成功")
             print(f"监听地址: {self.host}:{self.port}")
             print("等待客户端连接...")
             print("-" * 60)
             
+            if self.metrics_interval:
+                threading.Thread(target=self.dump_metrics_loop, daemon=True).start()
+            if self.log_retention_days:
+                threading.Thread(target=self.log_retention_loop, daemon=True).start()
+            if self.columns_snapshot:
+                self.start_columns_snapshot()
+            
             while self.running:
                 try:
                     client_socket, address = self.server_socket.accept()
                     print(f"新客户端连接: {address}")
+                    try:
+                        enable_keepalive(client_socket)
+                    except OSError:
+                        pass
+                    
+                    with self._state_lock:
+                        if not self.running:
+                            client_socket.close()
+                            break
+                        self.clients.add(client_socket)
                     
                     # 为每个客户端创建一个线程
                     client_thread = threading.Thread(
@@ -50,8 +153,6 @@ class Server:
                     )
                     client_thread.daemon = True
                     client_thread.start()
-                    
-                    self.clients.append(client_socket)
                 
                 except Exception as e:
                     if self.running:
@@ -62,71 +163,360 @@ class Server:
         
         finally:
             self.stop()
+        return started
     
-    def stop(self):
-        """停止服务器"""
-        self.running = False
+    def add_shutdown_hook(self, func):
+        """注册停止时执行的清理函数（在请求处理完毕之后、数据库检查点之前调用）"""
+        self._shutdown_hooks.append(func)
+    
+    def stop(self, drain_timeout=None):
+        """停止服务器：停止接受连接 -> 等待处理中的请求完成 -> 落盘 -> 关闭连接"""
+        with self._state_lock:
+            if self.stopped:
+                return
+            self.stopped = True
+            self.running = False
+        self._metrics_stop.set()
+        if drain_timeout is None:
+            drain_timeout = self.drain_timeout
         
-        # 关闭所有客户端连接
-        for client in self.clients:
+        # 1. 停止接受新连接
+        if self.server_socket:
             try:
-                client.close()
+                self.server_socket.shutdown(socket.SHUT_RDWR)
             except:
                 pass
-        
-        # 关闭服务器socket
-        if self.server_socket:
             try:
                 self.server_socket.close()
             except:
                 pass
         
+        # 2. 关闭各连接的读方向：空闲连接立即结束，处理中的请求仍可写回响应
+        with self._state_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RD)
+            except:
+                pass
+        
+        # 3. 在期限内等待处理中的请求完成
+        deadline = time.monotonic() + drain_timeout
+        with self._state_lock:
+            while self.inflight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"等待超时，仍有 {self.inflight} 个请求未完成")
+                    break
+                self._state_lock.wait(remaining)
+        
+        # 4. 刷新缓冲的写队列，并将WAL内容写回主数据库文件
+        for hook in self._shutdown_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"执行关闭清理时出错: {e}")
+        try:
+            self.db.checkpoint()
+        except Exception as e:
+            print(f"数据库检查点失败: {e}")
+        
+        # 5. 关闭剩余的客户端连接
+        # （先 shutdown，makefile 读取端持有引用时仅 close 不会真正断开）
+        with self._state_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except:
+                pass
+            try:
+                client.close()
+            except:
+                pass
+        
+        if self.metrics.snapshot()['total_requests']:
+            print(self.metrics.format_text())
         print("服务器已停止")
     
     def handle_client(self, client_socket, address):
         """处理客户端请求"""
         print(f"开始处理客户端 {address} 的请求")
+        # 连接状态：客户端地址、登录后绑定的会话
+        conn_state = {'session': None, 'address': address}
+        
+        reader = client_socket.makefile('rb')
         
         try:
             while self.running:
-                # 接收请求
-                data = client_socket.recv(4096)
-                if not data:
+                # 接收请求（每行一条JSON消息）
+                line = reader.readline()
+                if not line:
                     break
                 
+                with self._state_lock:
+                    self.inflight += 1
+                
+                started = time.perf_counter()
+                conn_state['db_time'] = 0.0
+                
                 # 解析请求
                 try:
-                    request = json.loads(data.decode('utf-8'))
-                    print(f"收到请求: {request.get('action')} from {address}")
+                    request = decode_message(line)
+                    action = request.get('action')
+                    decoded = time.perf_counter()
                     
                     # 处理请求
-                    response = self.process_request(request)
+                    response = self.process_request(request, conn_state)
                     
                     # 发送响应
-                    client_socket.send(json.dumps(response).encode('utf-8'))
+                    encode_started = time.perf_counter()
+                    payload = encode_message(response)
+                    serialize_time = (decoded - started) + (time.perf_counter() - encode_started)
+                    client_socket.sendall(payload)
                 
-                except json.JSONDecodeError:
-                    error_response = {
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    action = None
+                    response = {
                         'success': False,
                         'message': '无效的请求格式'
                     }
-                    client_socket.send(json.dumps(error_response).encode('utf-8'))
+                    payload = encode_message(response)
+                    serialize_time = 0.0
+                    client_socket.sendall(payload)
+                
+                finally:
+                    with self._state_lock:
+                        self.inflight -= 1
+                        self._state_lock.notify_all()
+                
+                self.metrics.record(
+                    action,
+                    time.perf_counter() - started,
+                    db_time=conn_state['db_time'],
+                    serialize_time=serialize_time,
+                    bytes_in=len(line),
+                    bytes_out=len(payload),
+                    success=bool(response.get('success'))
+                )
         
         except Exception as e:
             print(f"处理客户端 {address} 时出错: {e}")
         
         finally:
+            # 会话保留至超时，客户端重连后可通过 resume_session 恢复
             print(f"客户端 {address} 断开连接")
+            with self._state_lock:
+                self.clients.discard(client_socket)
             try:
+                reader.close()
                 client_socket.close()
-                self.clients.remove(client_socket)
             except:
                 pass
     
-    def process_request(self, request):
-        """处理具体的请求"""
+    def authorize(self, action, data, conn_state, token):
+        """根据连接绑定的会话在内存中鉴权，失败时返回错误响应，通过返回None"""
+        if action in PUBLIC_ACTIONS:
+            return None
+        
+        session = conn_state.get('session')
+        if session is None or session.token != token or not self.sessions.get(token):
+            conn_state['session'] = None
+            return {
+                'success': False,
+                'message': '未登录或会话已过期，请重新登录',
+                'code': 'unauthorized'
+            }
+        
+        forbidden = {
+            'success': False,
+            'message': '权限不足',
+            'code': 'forbidden'
+        }
+        
+        allowed = ACTION_ROLES.get(action)
+        if allowed is not None and session.role not in allowed:
+            return forbidden
+        
+        # 学生/教师只能访问自己的数据
+        if session.role == 'student':
+            if 'student_id' in data and data['student_id'] != session.student_id:
+                return forbidden
+        elif session.role == 'teacher':
+            if 'teacher_id' in data and data['teacher_id'] != session.teacher_id:
+                return forbidden
+            if action in TEACHER_COURSE_ACTIONS:
+                if action == 'add_or_update_grade':
+                    course_id = (data.get('grade_data') or {}).get('course_id')
+                else:
+                    course_id = data.get('course_id')
+                course = self.db.get_course_by_id(course_id) if course_id else None
+                if course is None or course['teacher_id'] != session.teacher_id:
+                    return forbidden
+        if session.role != 'admin':
+            if 'user_id' in data and data['user_id'] != session.user_id:
+                return forbidden
+            if 'username' in data and data['username'] != session.username:
+                return forbidden
+        
+        return None
+    
+    def create_session(self, user, conn_state):
+        """登录成功后创建会话并绑定到连接"""
+        student_id = None
+        teacher_id = None
+        if user['role'] == 'student':
+            student = self.db.get_student_by_user_id(user['user_id'])
+            student_id = student['student_id'] if student else None
+        elif user['role'] == 'teacher':
+            teacher = self.db.get_teacher_by_user_id(user['user_id'])
+            teacher_id = teacher['teacher_id'] if teacher else None
+        
+        old_session = conn_state.get('session')
+        if old_session:
+            self.sessions.remove(old_session.token)
+        # 断开后未恢复的会话在此顺带清理
+        self.sessions.purge_expired()
+        
+        session = self.sessions.create(user, student_id, teacher_id)
+        conn_state['session'] = session
+        return session
+    
+    def process_request(self, request, conn_state=None):
+        """处理具体的请求：鉴权、幂等去重后分发"""
         action = request.get('action')
         data = request.get('data', {})
+        if conn_state is None:
+            conn_state = {'session': None}
+        
+        # 会话鉴权
+        denied = self.authorize(action, data, conn_state, request.get('token'))
+        if denied:
+            return denied
+        
+        # 重试的写请求直接返回首次执行的结果
+        session = conn_state.get('session')
+        request_id = request.get('request_id')
+        if session and request_id and action in WRITE_ACTIONS:
+            cached = session.recall_response(request_id)
+            if cached is not None:
+                return cached
+        
+        # 准入控制
+        is_write = action in WRITE_ACTIONS
+        if session:
+            retry_after = self.rate_limiter.check(session.username, is_write)
+        else:
+            # 登录、恢复会话：共用 NAT 地址的多个客户端不应被当作同一个用户限流
+            address = (conn_state.get('address') or ('', 0))[0]
+            username = data.get('username') if isinstance(data, dict) else None
+            retry_after = self.rate_limiter.check_public(address, username)
+        if retry_after:
+            return self.busy_response('请求过于频繁，请稍后重试', retry_after)
+        if not self.concurrency.acquire(is_write, timeout=2.0 if is_write else 0.5):
+            return self.busy_response('服务器繁忙，请稍后重试', 1.0)
+        # 只统计处理请求时使用数据库连接的时间（不含业务逻辑、图表渲染等）
+        self.db.db_time(reset=True)
+        try:
+            response = self.dispatch(action, data, conn_state)
+        finally:
+            conn_state['db_time'] = self.db.db_time(reset=True)
+            self.concurrency.release()
+        
+        if session and request_id and action in WRITE_ACTIONS:
+            session.remember_response(request_id, response)
+        return response
+    
+    def dump_metrics_loop(self):
+        """定期输出请求指标汇总"""
+        while not self._metrics_stop.wait(self.metrics_interval):
+            if self.metrics.snapshot()['total_requests']:
+                print(self.metrics.format_text())
+    
+    def log_retention_loop(self):
+        """归档超过保留期的日志，启动时执行一次，之后每天执行一次"""
+        while True:
+            try:
+                archived = self.db.archive_logs(self.log_retention_days)
+                if archived:
+                    print(f"已归档 {archived} 条超过 {self.log_retention_days} 天的日志")
+            except Exception as e:
+                print(f"归档日志失败: {e}")
+            if self._metrics_stop.wait(24 * 3600):
+                return
+    
+    def start_columns_snapshot(self):
+        """后台生成并定期重建成绩列式快照，分析请求改为读取快照"""
+        from analytics import get_analytics
+        from analytics.snapshot import SnapshotScheduler
+        
+        scheduler = SnapshotScheduler(self.db, interval=self.columns_snapshot)
+        get_analytics(self.db).use_snapshot(scheduler.directory)
+        self._shutdown_hooks.append(scheduler.stop)
+        threading.Thread(target=scheduler.start, daemon=True).start()
+    
+    def grade_analytics(self, data):
+        """成绩分析请求：report 为 group_stats / percentiles / distribution / ranking / semester_trend，
+        filters 为筛选条件，其余参数与 GradeAnalytics 对应方法相同
+        """
+        # 延迟导入：未安装 NumPy 时其他功能不受影响
+        from analytics import get_analytics
+        
+        report = data.get('report', 'group_stats')
+        filters = data.get('filters') or {}
+        engine = get_analytics(self.db)
+        field = data.get('field', 'final_score')
+        try:
+            if report == 'group_stats':
+                result = engine.group_stats(by=data.get('by', ()), field=field, **filters)
+            elif report == 'percentiles':
+                result = engine.percentiles(by=data.get('by', ()),
+                                            quantiles=data.get('quantiles', (0.25, 0.5, 0.75)),
+                                            field=field, **filters)
+            elif report == 'distribution':
+                result = engine.distribution(by=data.get('by', ()), bins=data.get('bins'),
+                                             field=field, **filters)
+            elif report == 'ranking':
+                result = engine.ranking(field=field, **filters)
+            elif report == 'semester_trend':
+                semesters, series = engine.semester_trend(
+                    data.get('metric', 'avg_score'),
+                    series_by=data.get('series_by'),
+                    field=field,
+                    **filters
+                )
+                result = {'semesters': semesters, 'series': series}
+            else:
+                return {'success': False, 'message': f'未知的分析类型: {report}'}
+        except (ValueError, KeyError, TypeError) as e:
+            return {'success': False, 'message': f'分析参数错误: {e}'}
+        return {
+            'success': True,
+            'data': {'report': report, 'result': result}
+        }
+    
+    def server_metrics(self):
+        """请求指标及服务器当前状态"""
+        metrics = self.metrics.snapshot()
+        with self._state_lock:
+            metrics['connections'] = len(self.clients)
+            metrics['inflight'] = self.inflight
+        metrics['sessions'] = len(self.sessions)
+        metrics['active_slots'] = self.concurrency.active
+        return metrics
+    
+    def busy_response(self, message, retry_after):
+        """限流/过载时的响应，retry_after 为建议等待秒数"""
+        return {
+            'success': False,
+            'message': message,
+            'code': 'rate_limited',
+            'retry_after': round(retry_after, 2)
+        }
+    
+    def dispatch(self, action, data, conn_state):
+        """按操作类型分发请求"""
+        session = conn_state.get('session')
         
         try:
             # 用户认证
@@ -136,9 +526,10 @@ class Server:
                     data.get('password')
                 )
                 if user:
+                    session = self.create_session(user, conn_state)
                     return {
                         'success': True,
-                        'data': {'user': user}
+                        'data': {'user': user, 'session': session.to_dict()}
                     }
                 else:
                     return {
@@ -146,6 +537,31 @@ class Server:
                         'message': '用户名或密码错误'
                     }
             
+            # 断线重连后恢复会话
+            elif action == 'resume_session':
+                session = self.sessions.get(data.get('token'))
+                if session:
+                    conn_state['session'] = session
+                    return {
+                        'success': True,
+                        'data': {'session': session.to_dict()}
+                    }
+                else:
+                    return {
+                        'success': False,
+                        'message': '会话已过期，请重新登录',
+                        'code': 'unauthorized'
+                    }
+            
+            # 注销
+            elif action == 'logout':
+                self.sessions.remove(session.token)
+                conn_state['session'] = None
+                return {
+                    'success': True,
+                    'message': '已注销'
+                }
+            
             # 获取学生信息
             elif action == 'get_student_info':
                 student = self.db.get_student_by_user_id(data.get('user_id'))
@@ -176,7 +592,7 @@ class Server:
             
             # 获取课程列表
             elif action == 'get_courses':
-                courses = self.db.get_all_courses()
+                courses = self.db.get_all_courses(shape='rows')
                 return {
                     'success': True,
                     'data': {'courses': courses}
@@ -184,7 +600,7 @@ class Server:
             
             # 获取学生选课
             elif action == 'get_student_courses':
-                courses = self.db.get_student_courses(data.get('student_id'))
+                courses = self.db.get_student_courses(data.get('student_id'), shape='rows')
                 return {
                     'success': True,
                     'data': {'courses': courses}
@@ -214,15 +630,23 @@ class Server:
             
             # 获取成绩
             elif action == 'get_student_grades':
-                grades = self.db.get_student_grades(data.get('student_id'))
+                grades = self.db.get_student_grades(data.get('student_id'), shape='rows')
                 return {
                     'success': True,
                     'data': {'grades': grades}
                 }
             
+            # 学生/专业/班级学期平均分曲线（一次返回三条，专业和班级曲线各学生共用缓存）
+            elif action == 'get_student_semester_trend':
+                trend = self.db.get_student_semester_trend(data.get('student_id'))
+                return {
+                    'success': True,
+                    'data': trend
+                }
+            
             # 获取教师课程
             elif action == 'get_teacher_courses':
-                courses = self.db.get_courses_by_teacher(data.get('teacher_id'))
+                courses = self.db.get_courses_by_teacher(data.get('teacher_id'), shape='rows')
                 return {
                     'success': True,
                     'data': {'courses': courses}
@@ -230,7 +654,7 @@ class Server:
             
             # 获取课程学生
             elif action == 'get_course_students':
-                students = self.db.get_course_students(data.get('course_id'))
+                students = self.db.get_course_students(data.get('course_id'), shape='rows')
                 return {
                     'success': True,
                     'data': {'students': students}
@@ -238,7 +662,7 @@ class Server:
             
             # 获取课程成绩
             elif action == 'get_course_grades':
-                grades = self.db.get_course_grades(data.get('course_id'))
+                grades = self.db.get_course_grades(data.get('course_id'), shape='rows')
                 return {
                     'success': True,
                     'data': {'grades': grades}
@@ -247,7 +671,7 @@ class Server:
             # 教师端：获取选了该教师课程的所有学生
             elif action == 'get_teacher_students':
                 teacher_id = data.get('teacher_id')
-                students = self.db.get_teacher_students(teacher_id)
+                students = self.db.get_teacher_students(teacher_id, shape='rows')
                 return {
                     'success': True,
                     'data': {'students': students}
@@ -273,16 +697,131 @@ class Server:
 
             # 成绩分布
             elif action == 'get_grade_distribution':
-                dist = self.db.get_grade_distribution()
+                dist = self.db.get_grade_distribution(shape='rows')
                 return {
                     'success': True,
                     'data': {'distribution': dist}
                 }
 
+            # 分组统计、排名、分位数等（见 analytics 包）
+            elif action == 'get_grade_analytics':
+                return self.grade_analytics(data)
+
+            # 学生各学期加权平均分、绩点及专业/班级名次
+            elif action == 'get_student_rank':
+                from analytics import get_ranking_service
+                summary = get_ranking_service(self.db).student_summary(data.get('student_id'))
+                return {
+                    'success': True,
+                    'data': {'summary': summary}
+                }
+
+            # 专业/班级前 N 名
+            elif action == 'get_top_students':
+                from analytics import get_ranking_service
+                try:
+                    ranking = get_ranking_service(self.db).top(
+                        data.get('grade'),
+                        data.get('major'),
+                        class_name=data.get('class_name'),
+                        semester=data.get('semester'),
+                        metric=data.get('metric', 'weighted_avg'),
+                        n=data.get('limit')
+                    )
+                except ValueError as e:
+                    return {'success': False, 'message': str(e)}
+                return {
+                    'success': True,
+                    'data': {'ranking': ranking}
+                }
+
+            # 学业预警：各学期预警人数（趋势图）、预警名单、单个学生的预警记录
+            elif action == 'get_risk_timeline':
+                from analytics import get_risk_engine
+                return {
+                    'success': True,
+                    'data': {'timeline': get_risk_engine(self.db).timeline()}
+                }
+
+            elif action == 'get_risk_list':
+                from analytics import get_risk_engine
+                risks = get_risk_engine(self.db).risk_list(
+                    semester=data.get('semester'),
+                    grade=data.get('grade'),
+                    major=data.get('major'),
+                    class_name=data.get('class_name'),
+                    min_level=data.get('min_level', 1),
+                    limit=data.get('limit')
+                )
+                return {
+                    'success': True,
+                    'data': {'risks': risks}
+                }
+
+            elif action == 'get_student_risks':
+                from analytics import get_risk_engine
+                risks = get_risk_engine(self.db).student_risks(data.get('student_id'))
+                return {
+                    'success': True,
+                    'data': {'risks': risks}
+                }
+
+            # 服务器端渲染的图表（PNG/SVG，base64），客户端不需要 matplotlib
+            elif action == 'render_chart':
+                import base64
+                from visualization.render_service import get_chart_renderer
+                try:
+                    result = get_chart_renderer(self.db).render(
+                        data.get('chart'),
+                        data.get('params'),
+                        fmt=data.get('format', 'png'),
+                        if_version=data.get('if_version')
+                    )
+                except ValueError as e:
+                    return {'success': False, 'message': str(e)}
+                if result['image'] is not None:
+                    result['image'] = base64.b64encode(result['image']).decode('ascii')
+                return {
+                    'success': True,
+                    'data': result
+                }
+
+            # 服务器指标（多进程模式下为处理该请求的工作进程的数据）
+            elif action == 'get_server_metrics':
+                return {
+                    'success': True,
+                    'data': {'metrics': self.server_metrics()}
+                }
+
             # 日志
             elif action == 'get_logs':
                 limit = data.get('limit', 100)
-                logs = self.db.get_logs(limit)
+                logs = self.db.get_logs(
+                    limit,
+                    shape='rows',
+                    username=data.get('username'),
+                    action=data.get('log_action'),
+                    start=data.get('start'),
+                    end=data.get('end'),
+                    keyword=data.get('keyword'),
+                    offset=data.get('offset', 0)
+                )
+                return {
+                    'success': True,
+                    'data': {'logs': logs}
+                }
+
+            elif action == 'get_log_archives':
+                return {
+                    'success': True,
+                    'data': {'months': self.db.get_log_archives()}
+                }
+
+            elif action == 'get_archived_logs':
+                try:
+                    logs = self.db.get_archived_logs(data.get('month'), data.get('limit', 100))
+                except ValueError as e:
+                    return {'success': False, 'message': str(e)}
                 return {
                     'success': True,
                     'data': {'logs': logs}
@@ -297,7 +836,7 @@ class Server:
 
             # 学生/教师/用户列表
             elif action == 'get_all_students':
-                students = self.db.get_all_students()
+                students = self.db.get_all_students(shape='rows')
                 return {
                     'success': True,
                     'data': {'students': students}
@@ -332,14 +871,14 @@ class Server:
 
             elif action == 'search_students':
                 keyword = data.get('keyword', '')
-                students = self.db.search_students(keyword)
+                students = self.db.search_students(keyword, shape='rows')
                 return {
                     'success': True,
                     'data': {'students': students}
                 }
 
             elif action == 'get_all_teachers':
-                teachers = self.db.get_all_teachers()
+                teachers = self.db.get_all_teachers(shape='rows')
                 return {
                     'success': True,
                     'data': {'teachers': teachers}
@@ -374,7 +913,7 @@ class Server:
 
             elif action == 'search_teachers':
                 keyword = data.get('keyword', '')
-                teachers = self.db.search_teachers(keyword)
+                teachers = self.db.search_teachers(keyword, shape='rows')
                 return {
                     'success': True,
                     'data': {'teachers': teachers}
@@ -407,14 +946,14 @@ class Server:
 
             elif action == 'search_courses':
                 keyword = data.get('keyword', '')
-                courses = self.db.search_courses(keyword)
+                courses = self.db.search_courses(keyword, shape='rows')
                 return {
                     'success': True,
                     'data': {'courses': courses}
                 }
 
             elif action == 'get_all_users':
-                users = self.db.get_all_users()
+                users = self.db.get_all_users(shape='rows')
                 return {
                     'success': True,
                     'data': {'users': users}
@@ -426,6 +965,9 @@ class Server:
                 old_password = data.get('old_password')
                 new_password = data.get('new_password')
                 success = self.db.change_password(username, old_password, new_password)
+                if success:
+                    # 旧密码登录的其他会话全部失效
+                    self.sessions.remove_user(username, keep_token=session.token)
                 return {
                     'success': success,
                     'message': '密码修改成功' if success else '旧密码错误或修改失败'
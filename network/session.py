@@ -0,0 +1,113 @@
+"""
+会话管理模块
+登录成功后签发令牌，缓存用户角色与学号/工号，后续请求在内存中完成鉴权
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class Session:
+    """单个登录会话"""
+
+    def __init__(self, token, user, student_id=None, teacher_id=None):
+        self.token = token
+        self.user_id = user.get('user_id')
+        self.username = user.get('username')
+        self.role = user.get('role')
+        self.student_id = student_id
+        self.teacher_id = teacher_id
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        # 最近写请求的响应（幂等键 -> 响应），用于重试去重
+        self._responses = OrderedDict()
+        self._responses_lock = threading.Lock()
+
+    def touch(self):
+        """刷新最近活动时间"""
+        self.last_active = time.time()
+
+    def recall_response(self, request_id):
+        """查找幂等键对应的已执行结果"""
+        with self._responses_lock:
+            return self._responses.get(request_id)
+
+    def remember_response(self, request_id, response, limit=64):
+        """记录写请求结果，只保留最近 limit 条"""
+        with self._responses_lock:
+            self._responses[request_id] = response
+            while len(self._responses) > limit:
+                self._responses.popitem(last=False)
+
+    def to_dict(self):
+        """转换为字典（返回给客户端）"""
+        return {
+            'token': self.token,
+            'user_id': self.user_id,
+            'username': self.username,
+            'role': self.role,
+            'student_id': self.student_id,
+            'teacher_id': self.teacher_id,
+        }
+
+
+class SessionManager:
+    """会话管理器（线程安全）"""
+
+    def __init__(self, ttl=7200):
+        # ttl: 会话空闲超时时间（秒）
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, user, student_id=None, teacher_id=None):
+        """创建会话并返回"""
+        token = secrets.token_hex(16)
+        session = Session(token, user, student_id, teacher_id)
+        with self._lock:
+            self._sessions[token] = session
+        return session
+
+    def get(self, token):
+        """根据令牌获取有效会话，过期则移除并返回None"""
+        if not token:
+            return None
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if time.time() - session.last_active > self.ttl:
+                del self._sessions[token]
+                return None
+            session.touch()
+            return session
+
+    def remove(self, token):
+        """注销会话"""
+        with self._lock:
+            return self._sessions.pop(token, None) is not None
+
+    def remove_user(self, username, keep_token=None):
+        """移除某用户的其他会话（如修改密码后），keep_token 对应的会话保留"""
+        with self._lock:
+            tokens = [
+                t for t, s in self._sessions.items()
+                if s.username == username and t != keep_token
+            ]
+            for token in tokens:
+                del self._sessions[token]
+            return len(tokens)
+
+    def purge_expired(self):
+        """清理过期会话，返回清理数量"""
+        now = time.time()
+        with self._lock:
+            expired = [t for t, s in self._sessions.items() if now - s.last_active > self.ttl]
+            for token in expired:
+                del self._sessions[token]
+            return len(expired)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
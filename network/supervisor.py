@@ -0,0 +1,201 @@
+"""
+多进程服务器模块
+启动多个工作进程共享同一监听端口（SO_REUSEPORT），由主进程监控并重启崩溃的进程
+"""
+import multiprocessing
+import signal
+import threading
+import socket
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.read_pool import remove_snapshot
+
+# 工作进程启动失败（如无法监听端口）时的退出码
+EXIT_START_FAILED = 3
+
+
+def _worker_snapshot_path(db_path, pid):
+    """工作进程的只读快照文件：各进程使用自己的快照文件，互不覆盖"""
+    return f'{db_path}.snapshot.{pid}'
+
+
+def _worker_main(host, port, db_path, metrics_interval=300, analytics_snapshot=0,
+                 columns_snapshot=0):
+    """工作进程入口：每个进程拥有独立的 DatabaseManager 连接"""
+    from network.server import Server
+
+    db = DatabaseManager(db_path)
+    if analytics_snapshot:
+        db.enable_read_snapshot(analytics_snapshot, _worker_snapshot_path(db_path, os.getpid()))
+    if columns_snapshot:
+        # 列式快照由主进程生成，各工作进程以内存映射方式共享
+        from analytics import get_analytics
+        get_analytics(db).use_snapshot()
+    server = Server(host=host, port=port, reuse_port=True,
+                    metrics_interval=metrics_interval)
+
+    def handle_term(signum, frame):
+        server.stop()
+
+    signal.signal(signal.SIGTERM, handle_term)
+    # Ctrl+C 由主进程统一处理
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if not server.start():
+        sys.exit(EXIT_START_FAILED)
+
+
+class Supervisor:
+    """工作进程管理器"""
+
+    def __init__(self, host='0.0.0.0', port=8888, workers=None,
+                 db_path='teaching_system.db', restart_delay=1.0, max_restart_delay=30.0,
+                 metrics_interval=300, analytics_snapshot=0, log_retention_days=0,
+                 columns_snapshot=0, startup_grace=5.0, max_fast_failures=5):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.db_path = db_path
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        # 启动后 startup_grace 秒内退出视为启动失败，连续 max_fast_failures 次后不再重启
+        self.startup_grace = startup_grace
+        self.max_fast_failures = max_fast_failures
+        self.metrics_interval = metrics_interval
+        self.analytics_snapshot = analytics_snapshot
+        # 日志归档只在主进程中执行，避免多个工作进程同时归档
+        self.log_retention_days = log_retention_days
+        self._retention_stop = threading.Event()
+        self.columns_snapshot = columns_snapshot
+        self._snapshot_scheduler = None
+
+        self.running = False
+        self.processes = {}   # 槽位 -> Process
+        self.failures = {}    # 槽位 -> 连续崩溃次数
+        self.fast_failures = {}  # 槽位 -> 连续启动失败次数
+        self.gave_up = False
+        self.started_at = {}  # 槽位 -> 最近启动时间
+        self.ctx = multiprocessing.get_context('spawn')
+
+    @staticmethod
+    def is_supported():
+        """当前平台是否支持多进程共享端口"""
+        return hasattr(socket, 'SO_REUSEPORT')
+
+    def _spawn(self, slot):
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(self.host, self.port, self.db_path, self.metrics_interval,
+                  self.analytics_snapshot, self.columns_snapshot),
+            name=f'server-worker-{slot}',
+            daemon=True,
+        )
+        process.start()
+        self.processes[slot] = process
+        self.started_at[slot] = time.time()
+        print(f"工作进程 {slot} 已启动 (pid={process.pid})")
+
+    def start(self):
+        """启动所有工作进程并持续监控（阻塞）；工作进程反复启动失败而放弃时返回 False"""
+        if not self.is_supported():
+            raise RuntimeError('当前平台不支持 SO_REUSEPORT，无法使用多进程模式')
+
+        # 多个进程同时写同一个数据库文件，使用 WAL 减少锁冲突
+        DatabaseManager(self.db_path).enable_wal()
+
+        self.running = True
+        if self.log_retention_days:
+            threading.Thread(target=self._log_retention_loop, daemon=True).start()
+        if self.columns_snapshot:
+            from analytics.snapshot import SnapshotScheduler
+            self._snapshot_scheduler = SnapshotScheduler(DatabaseManager(self.db_path),
+                                                         interval=self.columns_snapshot)
+            # 工作进程启动前先生成第一版快照
+            self._snapshot_scheduler.start()
+        print(f"多进程模式：{self.workers} 个工作进程，监听 {self.host}:{self.port}")
+        for slot in range(self.workers):
+            self.failures[slot] = 0
+            self.fast_failures[slot] = 0
+            self._spawn(slot)
+
+        try:
+            while self.running:
+                time.sleep(0.5)
+                self._check_workers()
+        finally:
+            self.stop()
+        return not self.gave_up
+
+    def _check_workers(self):
+        """重启意外退出的工作进程（连续崩溃时指数退避）"""
+        for slot, process in list(self.processes.items()):
+            if process.is_alive():
+                # 稳定运行一段时间后清零崩溃计数
+                if time.time() - self.started_at[slot] > 60:
+                    self.failures[slot] = 0
+                continue
+            if not self.running:
+                return
+
+            # 崩溃的进程来不及删除自己的快照文件
+            self._remove_snapshot(process)
+            if (process.exitcode == EXIT_START_FAILED
+                    or time.time() - self.started_at[slot] < self.startup_grace):
+                self.fast_failures[slot] += 1
+            else:
+                self.fast_failures[slot] = 0
+            if self.fast_failures[slot] >= self.max_fast_failures:
+                # 端口被占用等问题重启也无法解决
+                print(f"工作进程 {slot} 连续 {self.fast_failures[slot]} 次启动失败 "
+                      f"(exitcode={process.exitcode})，停止服务器")
+                self.gave_up = True
+                self.running = False
+                return
+            self.failures[slot] += 1
+            delay = min(self.max_restart_delay,
+                        self.restart_delay * (2 ** (self.failures[slot] - 1)))
+            print(f"工作进程 {slot} 已退出 (exitcode={process.exitcode})，{delay:.1f}秒后重启")
+            time.sleep(delay)
+            if self.running:
+                self._spawn(slot)
+
+    def _remove_snapshot(self, process):
+        if self.analytics_snapshot and process.pid:
+            remove_snapshot(_worker_snapshot_path(self.db_path, process.pid))
+
+    def _log_retention_loop(self):
+        """归档超过保留期的日志，启动时执行一次，之后每天执行一次"""
+        db = DatabaseManager(self.db_path)
+        while True:
+            try:
+                archived = db.archive_logs(self.log_retention_days)
+                if archived:
+                    print(f"已归档 {archived} 条超过 {self.log_retention_days} 天的日志")
+            except Exception as e:
+                print(f"归档日志失败: {e}")
+            if self._retention_stop.wait(24 * 3600):
+                return
+
+    def stop(self, timeout=10):
+        """停止所有工作进程"""
+        self._retention_stop.set()
+        if self._snapshot_scheduler is not None:
+            self._snapshot_scheduler.stop()
+        if not self.processes:
+            return
+        self.running = False
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join(timeout)
+            self._remove_snapshot(process)
+        self.processes.clear()
+        print("所有工作进程已停止")
@@ -5,11 +5,58 @@
 """
 import sys
 import os
+import argparse
+import signal
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from network.server import Server
+from network.supervisor import Supervisor
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='本科教学管理系统 - 服务器端')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址（默认 0.0.0.0）')
+    parser.add_argument('--port', type=int, default=8888, help='监听端口（默认 8888）')
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='工作进程数（默认 1 为单进程多线程模式；0 表示与CPU核数相同）'
+    )
+    parser.add_argument(
+        '--analytics-snapshot', type=int, default=0, metavar='SECONDS',
+        help='统计分析查询读取数据库快照，每隔多少秒刷新一次（默认 0 表示直接读取主数据库）'
+    )
+    parser.add_argument(
+        '--metrics-interval', type=int, default=300,
+        help='每隔多少秒输出一次请求指标汇总（默认 300；0 表示不输出）'
+    )
+    parser.add_argument(
+        '--log-retention-days', type=int, default=0, metavar='DAYS',
+        help='超过多少天的日志按月压缩归档到 logs/archive 并从数据库删除（默认 0 表示不归档）'
+    )
+    parser.add_argument(
+        '--columns-snapshot', type=int, default=0, metavar='SECONDS',
+        help='成绩分析读取内存映射的列式快照，每隔多少秒检查数据变化并重建（默认 0 表示直接读取数据库）'
+    )
+    return parser.parse_args()
+
+
+def run_prefork(host, port, workers, metrics_interval, analytics_snapshot, log_retention_days,
+                columns_snapshot):
+    """多进程模式：多个工作进程共享监听端口"""
+    supervisor = Supervisor(host=host, port=port, workers=workers or None,
+                            metrics_interval=metrics_interval,
+                            analytics_snapshot=analytics_snapshot,
+                            log_retention_days=log_retention_days,
+                            columns_snapshot=columns_snapshot)
+    try:
+        if not supervisor.start():
+            sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n收到中断信号，正在关闭服务器...")
+        supervisor.stop()
 
 
 def main():
@@ -18,12 +65,32 @@ def main():
     print("本科教学管理系统 - 服务器端")
     print("="*60)
     
+    args = parse_args()
+    
+    if args.workers != 1:
+        if Supervisor.is_supported():
+            run_prefork(args.host, args.port, args.workers, args.metrics_interval,
+                        args.analytics_snapshot, args.log_retention_days,
+                        args.columns_snapshot)
+            return
+        print("当前平台不支持多进程共享端口，改用单进程模式")
+    
     # 创建服务器
-    server = Server(host='0.0.0.0', port=8888)
+    server = Server(host=args.host, port=args.port,
+                    metrics_interval=args.metrics_interval,
+                    log_retention_days=args.log_retention_days,
+                    columns_snapshot=args.columns_snapshot)
+    if args.analytics_snapshot:
+        server.db.enable_read_snapshot(args.analytics_snapshot)
+    
+    # 收到 SIGTERM（如滚动重启）时同样优雅关闭
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
     
     try:
         # 启动服务器
-        server.start()
+        if not server.start():
+            sys.exit(1)
     
     except KeyboardInterrupt:
         print("\n收到中断信号，正在关闭服务器...")
@@ -5,7 +5,13 @@
 检查所有必需文件是否存在，以及基本功能是否正常
 """
 import os
+import shutil
+import sqlite3
+import subprocess
 import sys
+import tempfile
+import threading
+import time
 
 
 def check_file_exists(filepath):
@@ -132,6 +138,357 @@ def test_validators():
         return False
 
 
+def test_log_writer_flush():
+    """测试日志批量写入：flush 后日志全部可查，不等待之后加入的日志；关闭后同步写入"""
+    print("\n=== 测试日志批量写入 ===")
+    
+    from database.init_db import DatabaseInitializer
+    from database.log_writer import LogWriter
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, 'logs.db')
+        init = DatabaseInitializer(db_path)
+        init.create_tables()
+        init.conn.close()
+        
+        def count():
+            conn = sqlite3.connect(db_path)
+            try:
+                return conn.execute('SELECT COUNT(*) FROM logs').fetchone()[0]
+            finally:
+                conn.close()
+        
+        writer = LogWriter(db_path, batch_size=50, flush_interval=0.2)
+        for i in range(500):
+            writer.add('admin', 'login', f'登录 {i}')
+        writer.flush()
+        if count() != 500:
+            print(f"  [X] flush 后只写入了 {count()}/500 条日志")
+            return False
+        print("  [OK] flush 后日志全部写入")
+        
+        # 其他线程持续写日志时，flush 只等待调用前加入的日志
+        stop = threading.Event()
+        
+        def keep_adding():
+            while not stop.is_set():
+                writer.add('student', 'login', '登录')
+                time.sleep(0.001)
+        
+        producer = threading.Thread(target=keep_adding, daemon=True)
+        producer.start()
+        time.sleep(0.1)
+        flusher = threading.Thread(target=writer.flush, daemon=True)
+        start = time.perf_counter()
+        flusher.start()
+        flusher.join(timeout=5)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        producer.join()
+        if flusher.is_alive():
+            print("  [X] 持续写入时 flush 没有返回")
+            return False
+        print(f"  [OK] 持续写入时 flush 耗时 {elapsed * 1000:.0f} ms")
+        
+        writer.close()
+        total = count()
+        writer.add('admin', 'logout', '关闭后写入')
+        if count() != total + 1:
+            print("  [X] close 之后加入的日志丢失")
+            return False
+        print("  [OK] close 之后的日志同步写入")
+        return True
+    
+    except Exception as e:
+        print(f"  [X] 日志写入测试失败: {e}")
+        return False
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _sample_database(tmp_dir):
+    """在临时目录中创建带示例数据的数据库，返回路径"""
+    from database.init_db import DatabaseInitializer
+    
+    db_path = os.path.join(tmp_dir, 'sample.db')
+    init = DatabaseInitializer(db_path)
+    init.create_tables()
+    init.insert_sample_data()
+    init.conn.close()
+    return db_path
+
+
+def test_course_avg_triggers():
+    """测试课程-学期平均分表：成绩增删改后与按成绩表重新计算的结果一致"""
+    print("\n=== 测试课程平均分触发器 ===")
+    
+    import random
+    from database.migrations import apply_migrations
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        conn = sqlite3.connect(_sample_database(tmp_dir))
+        apply_migrations(conn)
+        rng = random.Random(0)
+        grade_ids = [row[0] for row in conn.execute('SELECT grade_id FROM grades')]
+        semesters = [row[0] for row in conn.execute('SELECT DISTINCT semester FROM grades')]
+        for grade_id in rng.sample(grade_ids, 300):
+            conn.execute('UPDATE grades SET final_score = ? WHERE grade_id = ?',
+                         (round(rng.uniform(0, 100), 2), grade_id))
+        for grade_id in rng.sample(grade_ids, 50):
+            conn.execute('UPDATE grades SET semester = ? WHERE grade_id = ?',
+                         (rng.choice(semesters), grade_id))
+        for grade_id in rng.sample(grade_ids, 50):
+            conn.execute('UPDATE grades SET final_score = NULL WHERE grade_id = ?', (grade_id,))
+        for grade_id in rng.sample(grade_ids, 100):
+            conn.execute('DELETE FROM grades WHERE grade_id = ?', (grade_id,))
+        conn.execute('''
+            INSERT INTO grades (student_id, course_id, final_score, semester)
+            SELECT student_id, 'TRIGGER_TEST', 77.77, semester FROM grades LIMIT 20
+        ''')
+        conn.commit()
+        
+        stored = conn.execute('''
+            SELECT course_id, semester, score_total, score_count
+            FROM course_semester_avg ORDER BY course_id, semester
+        ''').fetchall()
+        expected = conn.execute('''
+            SELECT course_id, semester, SUM(CAST(ROUND(final_score * 100) AS INTEGER)), COUNT(*)
+            FROM grades
+            WHERE final_score IS NOT NULL AND semester IS NOT NULL
+            GROUP BY course_id, semester ORDER BY course_id, semester
+        ''').fetchall()
+        conn.close()
+        if stored != expected:
+            print(f"  [X] 触发器维护的 {len(stored)} 行与重新计算的 {len(expected)} 行不一致")
+            return False
+        print(f"  [OK] 触发器维护的平均分与重新计算一致（{len(stored)} 个课程学期）")
+        return True
+    
+    except Exception as e:
+        print(f"  [X] 课程平均分测试失败: {e}")
+        return False
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _rounded(value):
+    """比较排名结果时忽略浮点求和顺序带来的误差"""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_rounded(v) for v in value]
+    return value
+
+
+def test_ranking_incremental():
+    """测试排名增量更新：录入成绩、修改课程学分后与整体重建的结果一致"""
+    print("\n=== 测试排名增量更新 ===")
+    
+    from analytics import get_analytics
+    from analytics.ranking import RankingService
+    from database.db_manager import DatabaseManager
+    
+    tmp_dir = tempfile.mkdtemp()
+    # DatabaseManager 是单例，测试期间换成临时数据库的实例
+    saved = DatabaseManager._instance
+    DatabaseManager._instance = None
+    db = None
+    try:
+        db = DatabaseManager(_sample_database(tmp_dir))
+        service = RankingService(db)
+        with db.get_connection() as conn:
+            student_id, grade, major, course_id, semester = conn.execute('''
+                SELECT g.student_id, s.grade, s.major, g.course_id, g.semester
+                FROM grades g JOIN students s ON g.student_id = s.student_id
+                ORDER BY g.grade_id LIMIT 1
+            ''').fetchone()
+        service.student_summary(student_id)
+        earlier = get_analytics(db).load_latest()
+        
+        def matches_rebuild():
+            summary = _rounded(service.student_summary(student_id))
+            top = _rounded(service.top(grade, major, n=20))
+            # 新的服务按重新加载的列式数据整体构建
+            get_analytics(db).invalidate()
+            rebuilt = RankingService(db)
+            return (
+                summary == _rounded(rebuilt.student_summary(student_id))
+                and top == _rounded(rebuilt.top(grade, major, n=20))
+            )
+        
+        db.add_or_update_grade({
+            'student_id': student_id, 'course_id': course_id, 'semester': semester,
+            'usual_score': 100, 'exam_score': 100,
+        })
+        if not matches_rebuild():
+            print("  [X] 录入成绩后增量更新的排名与整体重建不一致")
+            return False
+        print("  [OK] 录入成绩后增量更新的排名与整体重建一致")
+        
+        # 按录入之前读取的列式数据重建，不应丢掉之后的增量更新
+        service.rebuild(earlier)
+        if not matches_rebuild():
+            print("  [X] 按较旧数据重建后丢失了增量更新")
+            return False
+        print("  [OK] 按较旧数据重建后保留增量更新")
+        
+        course = dict(db.get_course_by_id(course_id))
+        course['credits'] = 20
+        db.update_course(course_id, course)
+        if not matches_rebuild():
+            print("  [X] 修改课程学分后排名仍使用旧学分")
+            return False
+        print("  [OK] 修改课程学分后排名按新学分重建")
+        return True
+    
+    except Exception as e:
+        print(f"  [X] 排名增量更新测试失败: {e}")
+        return False
+    finally:
+        if db is not None:
+            db.log_writer.close()
+            db.read_pool.close()
+            if getattr(db.local, 'conn', None):
+                db.local.conn.close()
+        DatabaseManager._instance = saved
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_server_authorization():
+    """测试服务器鉴权：教师不能访问他人任课的课程，学生不能访问其他学生的数据"""
+    print("\n=== 测试服务器鉴权 ===")
+    
+    from database.db_manager import DatabaseManager
+    from network.server import Server
+    
+    tmp_dir = tempfile.mkdtemp()
+    # DatabaseManager 是单例，测试期间换成临时数据库的实例
+    saved = DatabaseManager._instance
+    DatabaseManager._instance = None
+    db = None
+    try:
+        db = DatabaseManager(_sample_database(tmp_dir))
+        server = Server(port=0, metrics_interval=0)
+        with db.get_connection() as conn:
+            teacher_id, own_course = conn.execute(
+                'SELECT teacher_id, course_id FROM courses WHERE teacher_id IS NOT NULL LIMIT 1'
+            ).fetchone()
+            other_course, student_id = conn.execute('''
+                SELECT g.course_id, g.student_id FROM grades g
+                JOIN courses c ON g.course_id = c.course_id
+                WHERE c.teacher_id <> ? LIMIT 1
+            ''', (teacher_id,)).fetchone()
+            other_student = conn.execute(
+                'SELECT student_id FROM students WHERE student_id <> ? LIMIT 1', (student_id,)
+            ).fetchone()[0]
+        
+        def login(username, password):
+            state = {'session': None, 'address': ('127.0.0.1', 0)}
+            response = server.process_request(
+                {'action': 'login', 'data': {'username': username, 'password': password}}, state
+            )
+            return state, response['data']['session']['token']
+        
+        def call(state, token, action, data):
+            return server.process_request({'action': action, 'data': data, 'token': token}, state)
+        
+        teacher, teacher_token = login(teacher_id, 'teacher123')
+        if not call(teacher, teacher_token, 'get_course_students', {'course_id': own_course})['success']:
+            print("  [X] 教师无法查看自己任课课程的学生")
+            return False
+        grade_data = {'student_id': student_id, 'course_id': other_course,
+                      'usual_score': 100, 'exam_score': 100}
+        denied = [
+            call(teacher, teacher_token, 'get_course_students', {'course_id': other_course}),
+            call(teacher, teacher_token, 'get_course_grades', {'course_id': other_course}),
+            call(teacher, teacher_token, 'add_or_update_grade', {'grade_data': grade_data}),
+        ]
+        if any(response.get('code') != 'forbidden' for response in denied):
+            print("  [X] 教师可以访问他人任课的课程")
+            return False
+        print("  [OK] 教师访问他人任课的课程被拒绝")
+        
+        student, student_token = login(student_id, 'student123')
+        if not call(student, student_token, 'get_student_grades', {'student_id': student_id})['success']:
+            print("  [X] 学生无法查看自己的成绩")
+            return False
+        response = call(student, student_token, 'get_student_grades', {'student_id': other_student})
+        if response.get('code') != 'forbidden':
+            print("  [X] 学生可以查看其他学生的成绩")
+            return False
+        print("  [OK] 学生访问其他学生的数据被拒绝")
+        return True
+    
+    except Exception as e:
+        print(f"  [X] 服务器鉴权测试失败: {e}")
+        return False
+    finally:
+        if db is not None:
+            db.log_writer.close()
+            db.read_pool.close()
+            if getattr(db.local, 'conn', None):
+                db.local.conn.close()
+        DatabaseManager._instance = saved
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# 登录窗口启动时导入的模块，不应连带导入 matplotlib / numpy（绘图时才加载）
+STARTUP_MODULES = ['gui.login_window', 'visualization.visualization_core', 'utils.visualizer']
+HEAVY_MODULES = ['matplotlib', 'numpy']
+
+
+def test_startup_imports():
+    """测试界面启动的导入耗时（在新的解释器中用 -X importtime 测量）"""
+    print("\n=== 测试启动导入耗时 ===")
+    
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {', '.join(STARTUP_MODULES)}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(f'{elapsed * 1000:.1f}|' + ','.join(heavy))\n"
+    )
+    try:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except Exception as e:
+        print(f"  [X] 启动导入测试失败: {e}")
+        return False
+    
+    if result.returncode != 0:
+        print(f"  [X] 启动模块导入失败: {result.stderr.strip().splitlines()[-1:]}")
+        return False
+    
+    elapsed, heavy = result.stdout.strip().splitlines()[-1].split('|')
+    print(f"  [OK] 启动模块导入耗时: {elapsed} ms")
+    
+    # -X importtime 输出格式: "import time: 自身(us) | 累计(us) | 模块名"
+    timings = {}
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if line.startswith('import time:') and len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].strip()
+            timings[name] = max(timings.get(name, 0), int(parts[1]))
+    for cumulative, name in sorted(((t, n) for n, t in timings.items()), reverse=True)[:5]:
+        print(f"       {cumulative / 1000:8.1f} ms  {name}")
+    
+    if heavy:
+        print(f"  [X] 启动时导入了 {heavy}")
+        return False
+    print(f"  [OK] 启动时未导入 {', '.join(HEAVY_MODULES)}")
+    return True
+
+
 def main():
     """主函数"""
     print("=" * 60)
@@ -183,6 +540,21 @@ def main():
     # 测试验证器
     validator_ok = test_validators()
     
+    # 测试日志批量写入
+    log_writer_ok = test_log_writer_flush()
+    
+    # 测试课程平均分触发器
+    course_avg_ok = test_course_avg_triggers()
+    
+    # 测试排名增量更新
+    ranking_ok = test_ranking_incremental()
+    
+    # 测试服务器鉴权
+    auth_ok = test_server_authorization()
+    
+    # 测试启动导入耗时
+    startup_ok = test_startup_imports()
+    
     # 总结
     print("\n" + "=" * 60)
     print("测试结果总结")
@@ -191,8 +563,14 @@ def main():
     print(f"模块导入测试: {'[PASS]' if imports_ok else '[FAIL]'}")
     print(f"数据库功能测试: {'[PASS]' if database_ok else '[FAIL]'}")
     print(f"数据验证测试: {'[PASS]' if validator_ok else '[FAIL]'}")
+    print(f"日志写入测试: {'[PASS]' if log_writer_ok else '[FAIL]'}")
+    print(f"课程平均分测试: {'[PASS]' if course_avg_ok else '[FAIL]'}")
+    print(f"排名增量更新测试: {'[PASS]' if ranking_ok else '[FAIL]'}")
+    print(f"服务器鉴权测试: {'[PASS]' if auth_ok else '[FAIL]'}")
+    print(f"启动导入测试: {'[PASS]' if startup_ok else '[FAIL]'}")
     
-    if all([all_files_exist, imports_ok, database_ok, validator_ok]):
+    if all([all_files_exist, imports_ok, database_ok, validator_ok, log_writer_ok,
+            course_avg_ok, ranking_ok, auth_ok, startup_ok]):
         print("\n[SUCCESS] 所有测试通过！项目已完整且可以正常运行。")
         return 0
     else:
@@ -1,17 +1,27 @@
 """
 数据可视化工具模块
+matplotlib 在第一次绘图时才导入（导入本模块只检查是否已安装）
 """
-try:
-    import matplotlib.pyplot as plt
-    import matplotlib
-    matplotlib.use('TkAgg')  # 使用TkAgg后端
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
-    plt.rcParams['axes.unicode_minus'] = False
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+import importlib.util
+
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec('matplotlib') is not None
+if not MATPLOTLIB_AVAILABLE:
     print("警告: matplotlib未安装，数据可视化功能不可用")
 
+_plt = None
+
+
+def _pyplot():
+    """导入 pyplot 并设置后端与统一主题（只执行一次）"""
+    global _plt
+    if _plt is None:
+        from visualization.loader import load_matplotlib
+        matplotlib = load_matplotlib()
+        matplotlib.use('TkAgg')  # 使用TkAgg后端
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
 
 class Visualizer:
     """数据可视化类"""
@@ -29,6 +39,7 @@ class Visualizer:
             return False
         
         try:
+            plt = _pyplot()
             # 数据格式: [{'grade_level': '优秀', 'count': 10}, ...]
             labels = [item['grade_level'] for item in data]
             counts = [item['count'] for item in data]
@@ -76,6 +87,7 @@ class Visualizer:
             return False
         
         try:
+            plt = _pyplot()
             # 数据格式: [{'course_name': '课程名', 'score': 85}, ...]
             courses = [item['course_name'] for item in data]
             scores = [item['score'] for item in data]
@@ -122,6 +134,7 @@ class Visualizer:
             return False
         
         try:
+            plt = _pyplot()
             # 数据格式: [{'course_name': '课程名', 'enrolled': 45, 'capacity': 50}, ...]
             courses = [item['course_name'] for item in data]
             enrolled = [item['enrolled'] for item in data]
@@ -171,6 +184,7 @@ class Visualizer:
         
         try:
             import numpy as np
+            plt = _pyplot()
             
             # 数据格式: [{'course_name': '课程名', 'score': 85}, ...]
             if not data:
@@ -3,7 +3,6 @@
 from typing import Dict, Any, List
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from .visual_utils import create_figure, embed_figure_in_toplevel, validate_numeric_series
 
@@ -61,32 +60,65 @@ def show_statistics_overview(parent, stats: Dict[str, Any]):
     embed_figure_in_toplevel(parent, "基础统计柱状图", fig)
 
 
-def show_resource_heatmap(parent, courses: List[Dict[str, Any]]):
-    if not courses:
-        raise ValueError("暂无课程数据，无法生成资源利用率热力图。")
+def course_utilization(course: Dict[str, Any]) -> float:
+    """课程的教室利用率：已选人数 / 容量（最大为 1）"""
+    enrolled = course.get("enrolled_count") or 0
+    capacity = course.get("capacity") or 1
+    return min(float(enrolled) / float(capacity), 1.0)
 
-    classrooms = sorted({c.get("classroom") for c in courses if c.get("classroom")})
-    timeslots = sorted({c.get("class_time") for c in courses if c.get("class_time")})
 
-    if not classrooms or not timeslots:
-        raise ValueError("课程中缺少教室或时间信息，无法生成热力图。")
+def resource_matrix(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """把 {classroom, class_time, utilization} 列表汇总为热力图矩阵（同一格取最大利用率）
+
+    返回 {"rows": 教室列表, "columns": 时间段列表, "values": 二维列表}
+    """
+    classrooms = sorted({c.get("classroom") for c in items if c.get("classroom")})
+    timeslots = sorted({c.get("class_time") for c in items if c.get("class_time")})
 
     room_index = {room: i for i, room in enumerate(classrooms)}
     time_index = {t: j for j, t in enumerate(timeslots)}
 
     matrix = np.zeros((len(classrooms), len(timeslots)))
 
-    for c in courses:
+    for c in items:
         room = c.get("classroom")
         time = c.get("class_time")
         if not room or not time:
             continue
-        enrolled = c.get("enrolled_count") or 0
-        capacity = c.get("capacity") or 1
-        utilization = min(float(enrolled) / float(capacity), 1.0)
         i = room_index[room]
         j = time_index[time]
-        matrix[i, j] = max(matrix[i, j], utilization)
+        matrix[i, j] = max(matrix[i, j], float(c.get("utilization") or 0))
+
+    return {"rows": classrooms, "columns": timeslots, "values": matrix.tolist()}
+
+
+def show_resource_heatmap(parent, courses: List[Dict[str, Any]], matrix: Dict[str, Any] | None = None):
+    """教室 × 时间段的资源利用率热力图。
+
+    matrix: 已汇总的矩阵（见 resource_matrix，可由数据库按教室、时间段分组得到）；
+            未提供时由课程列表 courses 汇总。
+    """
+    if matrix is None:
+        if not courses:
+            raise ValueError("暂无课程数据，无法生成资源利用率热力图。")
+        matrix = resource_matrix(
+            [
+                {
+                    "classroom": c.get("classroom"),
+                    "class_time": c.get("class_time"),
+                    "utilization": course_utilization(c),
+                }
+                for c in courses
+            ]
+        )
+
+    classrooms = matrix.get("rows") or []
+    timeslots = matrix.get("columns") or []
+
+    if not classrooms or not timeslots:
+        raise ValueError("课程中缺少教室或时间信息，无法生成热力图。")
+
+    matrix = np.asarray(matrix["values"], dtype=float)
 
     fig = create_figure(figsize=(7, 5))
     ax = fig.add_subplot(111)
@@ -108,28 +140,64 @@ def show_resource_heatmap(parent, courses: List[Dict[str, Any]]):
     embed_figure_in_toplevel(parent, "资源利用率热力图", fig)
 
 
-def show_grouped_grade_boxplot(parent, grouped_scores: Dict[str, List[float]], title: str = "成绩分布箱线图"):
+BOX_KEYS = ("whislo", "q1", "med", "q3", "whishi")
+
+
+def box_summary(values: List[float], max_fliers: int = 50) -> Dict[str, Any] | None:
+    """一组成绩的箱线图摘要：四分位数、1.5 倍四分位距以内的最值及须线以外的离群值 fliers
+
+    与 GradeAnalytics.box_summary 一致：离群值去重，最多 max_fliers 个，超出时保留离须线最远的。
+    """
+    scores = np.asarray([v for v in values if isinstance(v, (int, float))], dtype=float)
+    if not len(scores):
+        return None
+    q1, med, q3 = np.percentile(scores, [25, 50, 75]).tolist()
+    iqr = q3 - q1
+    whislo = float(scores[scores >= q1 - 1.5 * iqr].min())
+    whishi = float(scores[scores <= q3 + 1.5 * iqr].max())
+    fliers = np.unique(scores[(scores < whislo) | (scores > whishi)])
+    distance = np.maximum(whislo - fliers, fliers - whishi)
+    fliers = np.sort(fliers[np.argsort(-distance, kind="stable")[:max_fliers]])
+    summary = dict(zip(BOX_KEYS, (whislo, q1, med, q3, whishi)))
+    summary["fliers"] = fliers.tolist()
+    return summary
+
+
+def show_grouped_grade_boxplot(
+    parent,
+    grouped_scores: Dict[str, List[float]],
+    title: str = "成绩分布箱线图",
+    summaries: Dict[str, Dict[str, float]] | None = None,
+):
     """按学院/专业分组的成绩箱线图。
 
     grouped_scores: 形如 {"计算机学院": [80, 90, 75, ...], "机械学院": [...]} 或
                     {"软件工程": [...], "网络工程": [...]}。
+    summaries: 已计算好的分位数摘要 {分组: {"whislo", "q1", "med", "q3", "whishi", "fliers"}}
+               （见 GradeAnalytics.box_summary），提供时不再使用 grouped_scores。
+    须线与离群点与 matplotlib 默认箱线图相同（离群点每组最多画 50 个），
+    绘图开销与成绩条数无关。
     """
-    if not grouped_scores:
+    if summaries is None:
+        if not grouped_scores:
+            raise ValueError("暂无分组成绩数据，无法生成箱线图。")
+        summaries = {label: box_summary(values) for label, values in grouped_scores.items()}
+        summaries = {label: item for label, item in summaries.items() if item}
+    if not summaries:
         raise ValueError("暂无分组成绩数据，无法生成箱线图。")
 
-    labels = list(grouped_scores.keys())
-    data = [grouped_scores[k] for k in labels]
-
-    # 确保每个分组都有至少一个数值
-    flat = []
-    for arr in data:
-        flat.extend(v for v in arr if isinstance(v, (int, float)))
-    validate_numeric_series(flat, "成绩")
+    labels = list(summaries.keys())
+    stats = [
+        dict({key: float(summaries[k][key]) for key in BOX_KEYS}, label=k,
+             fliers=list(summaries[k].get("fliers") or []))
+        for k in labels
+    ]
+    validate_numeric_series([item["med"] for item in stats], "成绩")
 
     fig = create_figure(figsize=(8, 5))
     ax = fig.add_subplot(111)
 
-    bp = ax.boxplot(data, labels=labels, patch_artist=True)
+    bp = ax.bxp(stats, patch_artist=True)
 
     colors = ["#4CAF50", "#2196F3", "#FF9800", "#9C27B0", "#009688"]
     for patch, color in zip(bp["boxes"], colors * (len(labels) // len(colors) + 1)):
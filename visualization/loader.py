@@ -0,0 +1,77 @@
+"""可视化延迟加载
+
+matplotlib / numpy 的导入耗时较长，登录窗口启动时不再导入，改为第一次绘图时
+通过 load_matplotlib() 导入并设置统一主题；登录后可调用 warm_up() 在后台线程中提前导入，
+用户打开图表时不必等待。设置环境变量 TEACHING_VISUAL_WARMUP=0 可关闭后台预热。
+"""
+
+import os
+import threading
+
+# 使用一致的中文/学校主题
+THEME = {
+    "font.sans-serif": ["SimHei", "Microsoft YaHei", "Arial"],
+    "axes.unicode_minus": False,
+    "figure.facecolor": "#FFFFFF",
+    "axes.facecolor": "#FFFFFF",
+    "axes.edgecolor": "#EEEEEE",
+    "axes.grid": True,
+    "grid.color": "#E0E0E0",
+}
+
+# 预热时导入的模块（按依赖顺序）
+WARM_UP_MODULES = (
+    "numpy",
+    "matplotlib.figure",
+    "matplotlib.pyplot",
+    "matplotlib.backends.backend_tkagg",
+    "visualization.admin_visuals",
+    "visualization.teacher_visuals",
+    "visualization.student_visuals",
+)
+
+_lock = threading.Lock()
+_matplotlib = None
+_warm_up_thread = None
+
+
+def load_matplotlib():
+    """导入 matplotlib 并设置主题（只执行一次），返回 matplotlib 模块"""
+    global _matplotlib
+    if _matplotlib is None:
+        with _lock:
+            if _matplotlib is None:
+                import matplotlib
+
+                matplotlib.rcParams.update(THEME)
+                _matplotlib = matplotlib
+    return _matplotlib
+
+
+def is_loaded():
+    """matplotlib 是否已经导入"""
+    return _matplotlib is not None
+
+
+def _warm_up():
+    import importlib
+
+    try:
+        load_matplotlib()
+        for name in WARM_UP_MODULES:
+            importlib.import_module(name)
+    except Exception as e:
+        print(f"可视化模块预热失败: {e}")
+
+
+def warm_up():
+    """在后台线程中导入绘图所需模块；已在预热、已关闭或 matplotlib 已导入时不重复执行"""
+    global _warm_up_thread
+    if os.environ.get("TEACHING_VISUAL_WARMUP", "1") == "0":
+        return None
+    with _lock:
+        if _warm_up_thread is not None or _matplotlib is not None:
+            return _warm_up_thread
+        _warm_up_thread = threading.Thread(target=_warm_up, name="visual-warmup", daemon=True)
+    _warm_up_thread.start()
+    return _warm_up_thread
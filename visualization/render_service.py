@@ -0,0 +1,251 @@
+"""无界面图表渲染服务
+
+在服务器（或单独的工作进程）中用 Agg 后端把 visualization 中的图表渲染为 PNG/SVG，
+图表数据直接从成绩分析层和数据库取得，客户端只负责显示图片，不需要安装 matplotlib。
+
+渲染结果按“格式 + 数据版本”缓存：数据版本是图表名称与图表数据的摘要，数据没有变化时
+重复查看同一图表直接返回缓存的图片；客户端带上已有的版本号（if_version）时只返回“未变化”。
+"""
+
+import hashlib
+import io
+import json
+import math
+import threading
+from collections import OrderedDict
+
+from .loader import load_matplotlib
+from .visualization_core import build_figure
+
+# 支持的输出格式 -> MIME 类型
+FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+# 成绩等级的显示顺序（与数据总览一致）
+GRADE_LEVELS = ("优秀", "良好", "中等", "及格", "不及格")
+
+
+def _required(params, name, label):
+    value = params.get(name)
+    if value is None or str(value).strip() == "":
+        raise ValueError(f"请指定{label}")
+    return str(value).strip()
+
+
+# ==================== 图表数据 ====================
+# 每个函数根据请求参数准备 show_visual 所需的数据（与客户端本地绘图时的数据相同）
+
+
+def _grade_distribution(db, params):
+    rows = db.get_grade_distribution(params.get("course_id"))
+    counts = {row["grade_level"]: row["count"] for row in rows if row["grade_level"]}
+    return {"distribution": {level: counts[level] for level in GRADE_LEVELS if level in counts}}
+
+
+def _statistics_overview(db, params):
+    return {"statistics": db.get_statistics()}
+
+
+def _resource_heatmap(db, params):
+    from .admin_visuals import resource_matrix
+
+    # 数据库按教室、时间段汇总后再组成矩阵，数据量与课程数无关
+    return {"matrix": resource_matrix(db.get_classroom_utilization())}
+
+
+def _student_risk_trend(db, params):
+    from analytics import get_risk_engine
+
+    return {"timeline": get_risk_engine(db).timeline()}
+
+
+def _grade_class_overview(db, params):
+    from analytics import get_analytics
+
+    grade = _required(params, "grade", "年级")
+    rows = get_analytics(db).group_stats(
+        by=("class_name", "major"), grade=grade, semester=params.get("semester")
+    )
+    rows.sort(key=lambda r: r["class_name"])
+    class_stats = []
+    for row in rows:
+        class_stats.append(
+            {
+                "class_name": row["class_name"],
+                "major": row["major"],
+                "student_count": row["student_count"],
+                # 保留两位小数向下取整
+                "avg_score": math.floor((row["avg_score"] or 0) * 100) / 100,
+                "fail_rate": row["fail_rate"] or 0,
+                "excellent_rate": row["excellent_rate"] or 0,
+                "good_rate": row["good_rate"] or 0,
+            }
+        )
+    return {"grade": grade, "class_stats": class_stats}
+
+
+def _major_rank_bar(db, params):
+    from analytics import get_ranking_service
+
+    grade = _required(params, "grade", "年级")
+    major = _required(params, "major", "专业")
+    top_n = int(params.get("top_n") or 50)
+    ranking = get_ranking_service(db).top(
+        grade, major,
+        class_name=params.get("class_name"),
+        semester=params.get("semester"),
+        n=top_n,
+    )
+    return {"grade": grade, "major": major, "ranking": ranking, "top_n": top_n}
+
+
+def _grouped_grade_boxplot(db, params):
+    from analytics import get_analytics
+
+    by = params.get("by") or "major"
+    if by not in ("major", "class_name"):
+        raise ValueError(f"不支持的分组: {by}")
+    filters = {name: params.get(name) for name in ("grade", "major", "semester", "course_id")}
+    rows = get_analytics(db).box_summary(by=(by,), field=params.get("field") or "final_score", **filters)
+    summaries = {str(row.pop(by)): row for row in sorted(rows, key=lambda r: str(r[by]))}
+    title = "成绩分布箱线图（按专业）" if by == "major" else "成绩分布箱线图（按班级）"
+    return {"summaries": summaries, "title": title}
+
+
+def _course_grade_histogram(db, params):
+    from analytics import get_analytics
+
+    course_id = _required(params, "course_id", "课程")
+    rows = get_analytics(db).distribution(
+        field=params.get("field") or "final_score",
+        course_id=course_id,
+        class_name=params.get("class_name"),
+    )
+    histogram = {"bins": rows[0]["bins"], "counts": rows[0]["counts"]} if rows else None
+    course = db.get_course_by_id(course_id)
+    course_name = (course["course_name"] if course else None) or course_id
+    return {"histogram": histogram, "course_name": course_name}
+
+
+# 图表名称 -> (show_visual 的角色, 数据函数)；图表类型与名称相同
+CHARTS = {
+    "grade_distribution": ("admin", _grade_distribution),
+    "statistics_overview": ("admin", _statistics_overview),
+    "resource_heatmap": ("admin", _resource_heatmap),
+    "student_risk_trend": ("admin", _student_risk_trend),
+    "grade_class_overview": ("admin", _grade_class_overview),
+    "major_rank_bar": ("admin", _major_rank_bar),
+    "grouped_grade_boxplot": ("admin", _grouped_grade_boxplot),
+    "course_grade_histogram": ("teacher", _course_grade_histogram),
+}
+
+
+def data_version(chart, data):
+    """图表数据的版本号（名称 + 数据的 SHA-1 摘要），数据相同则版本相同"""
+    payload = json.dumps([chart, data], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ChartRenderer:
+    """图表渲染服务（线程安全）
+
+    render() 返回 dict：chart, format, mime, version, image（bytes，未变化时为 None）,
+    cached（是否命中缓存）, not_modified（if_version 与当前版本相同）
+    """
+
+    def __init__(self, db, cache_size=64, dpi=100):
+        self.db = db
+        self.cache_size = cache_size
+        self.dpi = dpi
+        # (格式, 版本) -> 图片，按最近使用排序
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # matplotlib 的绘制不是线程安全的，同一时间只渲染一张图
+        self._render_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def chart_data(self, chart, params=None):
+        """图表对应的角色和数据"""
+        if chart not in CHARTS:
+            raise ValueError(f"不支持的图表: {chart}")
+        role, build = CHARTS[chart]
+        return role, build(self.db, params or {})
+
+    def render(self, chart, params=None, fmt="png", if_version=None):
+        """渲染图表；数据版本未变化时使用缓存"""
+        fmt = (fmt or "png").lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的图片格式: {fmt}")
+        role, data = self.chart_data(chart, params)
+        version = data_version(chart, data)
+        result = {
+            "chart": chart,
+            "format": fmt,
+            "mime": FORMATS[fmt],
+            "version": version,
+            "image": None,
+            "cached": False,
+            "not_modified": if_version == version,
+        }
+        if result["not_modified"]:
+            return result
+
+        key = (fmt, version)
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if image is None:
+            image = self._render(role, chart, data, fmt)
+            with self._lock:
+                self._cache[key] = image
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        else:
+            result["cached"] = True
+        result["image"] = image
+        return result
+
+    def _render(self, role, chart, data, fmt):
+        load_matplotlib()
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        buffer = io.BytesIO()
+        with self._render_lock:
+            figure = build_figure(role, chart, data)
+            FigureCanvasAgg(figure)
+            figure.savefig(buffer, format=fmt, dpi=self.dpi)
+        return buffer.getvalue()
+
+    def clear(self):
+        """清空图片缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def cache_info(self):
+        with self._lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# db_path -> ChartRenderer，同一数据库共用一份图片缓存
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def get_chart_renderer(db=None):
+    """取得数据库对应的图表渲染服务（默认使用 DatabaseManager 单例）"""
+    if db is None:
+        from database.db_manager import DatabaseManager
+        db = DatabaseManager()
+    with _renderers_lock:
+        renderer = _renderers.get(db.db_path)
+        if renderer is None:
+            renderer = ChartRenderer(db)
+            _renderers[db.db_path] = renderer
+        return renderer
@@ -3,26 +3,42 @@
 from typing import List, Dict, Any
 
 import math
-import matplotlib.pyplot as plt
 
 from .visual_utils import create_figure, embed_figure_in_toplevel, validate_numeric_series
 
 
-def show_course_grade_histogram(parent, grades: List[Dict[str, Any]], course_name: str = "课程"):
+def show_course_grade_histogram(
+    parent,
+    grades: List[Dict[str, Any]],
+    course_name: str = "课程",
+    histogram: Dict[str, List[float]] | None = None,
+):
     """对某门课程的总评成绩绘制直方图/柱状图。
 
     grades: 每个元素包含至少 {"final_score": float, "student_id": str, "name": str}
+    histogram: 已分段的人数 {"bins": 分段边界, "counts": 各段人数}（见 GradeAnalytics.distribution），
+               提供时不再使用 grades；否则把 grades 分为 10 段后绘制
     """
-    if not grades:
-        raise ValueError("该课程暂无成绩数据，无法生成图表。")
-
-    scores = [g.get("final_score") for g in grades if g.get("final_score") is not None]
-    validate_numeric_series(scores, "课程成绩")
+    import numpy as np
+
+    if histogram is None:
+        if not grades:
+            raise ValueError("该课程暂无成绩数据，无法生成图表。")
+        scores = [g.get("final_score") for g in grades if g.get("final_score") is not None]
+        validate_numeric_series(scores, "课程成绩")
+        counts, edges = np.histogram(scores, bins=10)
+    else:
+        counts = np.asarray(histogram.get("counts") or [])
+        edges = np.asarray(histogram.get("bins") or [], dtype=float)
+        if len(counts) == 0 or len(edges) != len(counts) + 1:
+            raise ValueError("该课程暂无成绩数据，无法生成图表。")
+        validate_numeric_series(counts.tolist(), "课程成绩")
 
     fig = create_figure(figsize=(6, 4))
     ax = fig.add_subplot(111)
 
-    ax.hist(scores, bins=10, color="#2196F3", edgecolor="white", alpha=0.85)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge",
+           color="#2196F3", edgecolor="white", alpha=0.85)
     ax.set_title(f"{course_name} 成绩分布")
     ax.set_xlabel("成绩")
     ax.set_ylabel("人数")
@@ -1,44 +1,60 @@
-"""可视化通用工具：Matplotlib 主题、Tkinter 嵌入、导出等"""
+"""可视化通用工具：Matplotlib 主题、Tkinter 嵌入、导出、界面内图表的原地更新等
 
-import tkinter as tk
-from tkinter import messagebox, filedialog
-from typing import Optional
+matplotlib 在第一次创建图表时才导入（见 loader.py），导入本模块不会拖慢界面启动；
+tkinter 也在显示窗口时才导入，服务器端渲染（见 render_service.py）不依赖 Tk
+"""
 
-import matplotlib
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
+from __future__ import annotations
 
+import math
+from typing import TYPE_CHECKING, Optional
 
-# 使用一致的中文/学校主题
-matplotlib.rcParams.update(
-    {
-        "font.sans-serif": ["SimHei", "Microsoft YaHei", "Arial"],
-        "axes.unicode_minus": False,
-        "figure.facecolor": "#FFFFFF",
-        "axes.facecolor": "#FFFFFF",
-        "axes.edgecolor": "#EEEEEE",
-        "axes.grid": True,
-        "grid.color": "#E0E0E0",
-    }
-)
+from .loader import load_matplotlib
+
+if TYPE_CHECKING:
+    import tkinter as tk
+
+    from matplotlib.figure import Figure
+
+
+class FigureCapture:
+    """代替 Tk 窗口传给各图表函数的 parent：只保存生成的 Figure，不创建窗口
+
+    用于无界面渲染，图表函数本身不需要区分显示还是渲染
+    """
+
+    def __init__(self):
+        self.figure = None
+        self.title = None
 
 
 def create_figure(figsize=(6, 4)) -> Figure:
     """创建统一风格的 Matplotlib Figure"""
+    load_matplotlib()
+    from matplotlib.figure import Figure
+
     fig = Figure(figsize=figsize, dpi=100)
     return fig
 
 
 def embed_figure_in_toplevel(
-    parent: tk.Tk | tk.Toplevel,
+    parent: tk.Tk | tk.Toplevel | FigureCapture,
     title: str,
     figure: Figure,
     modal: bool = False,
 ) -> tk.Toplevel:
     """在新的 Toplevel 窗口中嵌入一个 Figure 并返回窗口对象。
 
-    由调用方决定是否保存窗口引用/是否阻塞。
+    由调用方决定是否保存窗口引用/是否阻塞。parent 为 FigureCapture 时只记录图表，不创建窗口。
     """
+    if isinstance(parent, FigureCapture):
+        parent.figure = figure
+        parent.title = title
+        return parent
+
+    import tkinter as tk
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
     win = tk.Toplevel(parent)
     win.title(title)
     win.geometry("800x600")
@@ -64,6 +80,8 @@ def embed_figure_in_toplevel(
 
 def export_figure_as_image(figure: Figure, parent: Optional[tk.Tk | tk.Toplevel] = None):
     """导出当前图像为 PNG 文件"""
+    from tkinter import messagebox, filedialog
+
     file_path = filedialog.asksaveasfilename(
         parent=parent,
         defaultextension=".png",
@@ -86,3 +104,194 @@ def validate_numeric_series(values, field_name: str = "数值"):
     if not nums:
         raise ValueError(f"{field_name}数据为空或无有效数值，无法生成图表。")
     return nums
+
+
+def _nice_limits(low: float, high: float, ticks: int = 5):
+    """把坐标范围扩展到整齐的刻度（1/2/5 × 10^n），数据小幅变化时范围不变"""
+    if not (math.isfinite(low) and math.isfinite(high)) or high <= low:
+        return low, high
+    raw = (high - low) / ticks
+    base = 10 ** math.floor(math.log10(raw))
+    step = next(m * base for m in (1, 2, 5, 10) if raw <= m * base)
+    return math.floor(low / step) * step, math.ceil(high / step) * step
+
+
+class ChartController:
+    """嵌入界面的图表：每个视图只创建一次 Figure 和画布，切换筛选条件时原地更新
+
+    用法：
+        chart = ChartController(frame, figsize=(9, 4.5))
+        chart.widget.pack(fill=tk.BOTH, expand=True)
+        ...
+        chart.begin()
+        chart.line("平均", x, y, marker="o")      # 同一 key 复用折线，只更新数据
+        chart.bars("人数", x, counts)              # 柱数不变时只改高度
+        chart.finish(title=..., xticks=x, xticklabels=labels, legend=True)
+
+    折线、柱形、数值标注、标题和图例都是动画对象（animated），不画在背景里。
+    坐标轴（刻度、范围、轴标签）与上次相同时只恢复背景并重画这些对象（blit），
+    否则完整重绘一次并保存新的背景。master 为 None 时使用离屏的 Agg 画布。
+    """
+
+    def __init__(self, master=None, figsize=(8, 4.5), **subplot_kw):
+        self.figure = create_figure(figsize=figsize)
+        self.ax = self.figure.add_subplot(111, **subplot_kw)
+        if master is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+            self.canvas = FigureCanvasAgg(self.figure)
+            self.widget = None
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            self.widget = self.canvas.get_tk_widget()
+
+        self.ax.title.set_animated(True)
+        self._message = self.ax.text(
+            0.5, 0.5, "", ha="center", va="center", transform=self.ax.transAxes, animated=True
+        )
+        # key -> (类型 "line"/"bars", 折线或柱形, 数值标注列表)
+        self._artists = {}
+        self._touched = set()
+        self._legend = None
+        self._layout = None
+        self._background = None
+        # 完整重绘 / blit 的次数
+        self.full_draws = 0
+        self.blits = 0
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # ==================== 更新数据 ====================
+
+    def begin(self):
+        """开始一次更新；finish() 时删除本次没有再出现的系列"""
+        self._touched = set()
+
+    def line(self, key, x, y, **style):
+        """折线（y 中的 None 不画）"""
+        import numpy as np
+
+        x = np.asarray(x, dtype=float)
+        y = np.array([np.nan if v is None else v for v in y], dtype=float)
+        item = self._artists.get(key)
+        if item is None or item[0] != "line":
+            self._remove(key)
+            line, = self.ax.plot(x, y, animated=True, **style)
+            self._artists[key] = ("line", line, [])
+        else:
+            line = item[1]
+            line.set_data(x, y)
+            line.update(style)
+        self._touched.add(key)
+        return line
+
+    def bars(self, key, x, heights, value_format="{:.0f}", **style):
+        """柱形图，value_format 不为 None 时在柱顶标注数值"""
+        item = self._artists.get(key)
+        x = list(x)
+        heights = [float(h or 0) for h in heights]
+        same_shape = (
+            item is not None
+            and item[0] == "bars"
+            and [rect.get_x() + rect.get_width() / 2 for rect in item[1]] == x
+        )
+        if not same_shape:
+            self._remove(key)
+            container = self.ax.bar(x, heights, **style)
+            texts = []
+            for rect in container:
+                rect.set_animated(True)
+                if value_format is not None:
+                    texts.append(
+                        self.ax.text(0, 0, "", ha="center", va="bottom", fontsize=9, animated=True)
+                    )
+            self._artists[key] = ("bars", container, texts)
+        else:
+            _, container, texts = item
+            for rect, height in zip(container, heights):
+                rect.set_height(height)
+        for rect, text, height in zip(container, texts, heights):
+            text.set_position((rect.get_x() + rect.get_width() / 2, height))
+            text.set_text(value_format.format(height))
+        self._touched.add(key)
+        return container
+
+    def _remove(self, key):
+        item = self._artists.pop(key, None)
+        if item is None:
+            return
+        _, artist, texts = item
+        artist.remove()
+        for text in texts:
+            text.remove()
+
+    # ==================== 绘制 ====================
+
+    def finish(self, title="", xlabel="", ylabel="", xticks=None, xticklabels=None,
+               xtick_rotation=0, ylim=None, legend=False, message=None):
+        """完成更新并刷新画布
+
+        ylim 为空时按数据自动确定并取整到整齐的刻度；legend 为 True 或图例位置（如 "upper right"）
+        时显示图例；message 不为空时在图表中央显示提示文字（如“暂无数据”）
+        """
+        for key in [k for k in self._artists if k not in self._touched]:
+            self._remove(key)
+
+        ax = self.ax
+        ax.relim()
+        ax.autoscale(enable=True)
+        if ylim is None:
+            ylim = _nice_limits(*ax.get_ylim())
+        ax.set_ylim(*ylim)
+        ax.set_title(title)
+        self._message.set_text(message or "")
+
+        if self._legend is not None:
+            self._legend.remove()
+            self._legend = None
+        if legend and self._artists:
+            self._legend = ax.legend(loc="best" if legend is True else legend, fontsize=9)
+            self._legend.set_animated(True)
+
+        xticks = list(xticks) if xticks is not None else None
+        xticklabels = list(xticklabels) if xticklabels is not None else None
+        layout = (xlabel, ylabel, xticks, xticklabels, xtick_rotation,
+                  tuple(ax.get_xlim()), tuple(ylim))
+        if layout == self._layout and self._background is not None:
+            self.canvas.restore_region(self._background)
+            self._draw_animated()
+            self.canvas.blit(self.figure.bbox)
+            self.blits += 1
+            return
+
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        if xticks is not None:
+            ax.set_xticks(xticks)
+            ax.set_xticklabels(
+                xticklabels if xticklabels is not None else xticks,
+                rotation=xtick_rotation,
+                ha="right" if xtick_rotation else "center",
+            )
+        self.figure.tight_layout()
+        self._layout = layout
+        self.canvas.draw()
+        self.full_draws += 1
+
+    def _on_draw(self, event):
+        """完整重绘（包括窗口大小变化）后保存不含动画对象的背景，再画上动画对象"""
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        ax = self.ax
+        for kind, artist, texts in self._artists.values():
+            for item in (artist if kind == "bars" else [artist]):
+                ax.draw_artist(item)
+            for text in texts:
+                ax.draw_artist(text)
+        ax.draw_artist(ax.title)
+        ax.draw_artist(self._message)
+        if self._legend is not None:
+            ax.draw_artist(self._legend)
@@ -10,16 +10,20 @@
   - teacher: "course_grade_histogram" 等
   - student: "personal_score_trend" 等
 - data: 上层业务已经准备好的纯数据结构(dict/list)，不在此处做网络/数据库访问。
+
+build_figure 用同样的分发逻辑生成 Figure 而不打开窗口，供服务器端渲染使用（见 render_service.py）。
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict
+
+from .visual_utils import FigureCapture
 
-import tkinter as tk
-from tkinter import messagebox
+if TYPE_CHECKING:
+    import tkinter as tk
 
-from . import admin_visuals, teacher_visuals, student_visuals
+    from matplotlib.figure import Figure
 
 
 def show_visual(
@@ -37,30 +41,54 @@ def show_visual(
     - data: 上层准备好的数据字典，例如：
         admin + grade_distribution: {"distribution": {"优秀": 10, "良好": 20, ...}}
         teacher + course_grade_histogram: {"grades": [...], "course_name": "高等数学"}
+            或已分段的 {"histogram": {"bins": [...], "counts": [...]}, "course_name": ...}
+        admin + grouped_grade_boxplot: {"grouped_scores": {...}} 或分位数摘要 {"summaries": {...}}
+        admin + resource_heatmap: {"courses": [...]} 或已汇总的 {"matrix": {"rows", "columns", "values"}}
         student + personal_score_trend: {"grades": [...]} 等。
+    全校规模的数据应传入分段/摘要/矩阵（由分析层计算），图表开销与成绩条数无关。
     """
 
-    role = (role or "").lower()
-    chart_type = (chart_type or "").lower()
-    data = data or {}
+    from tkinter import messagebox
 
     try:
-        if role == "admin":
-            _dispatch_admin(parent, chart_type, data)
-        elif role == "teacher":
-            _dispatch_teacher(parent, chart_type, data)
-        elif role == "student":
-            _dispatch_student(parent, chart_type, data)
-        else:
-            raise ValueError(f"未知角色: {role}")
-
+        _dispatch(parent, role, chart_type, data)
     except ValueError as e:
         messagebox.showerror("可视化错误", str(e), parent=parent)
     except Exception as e:
         messagebox.showerror("可视化异常", f"生成图表失败: {e}", parent=parent)
 
 
+def build_figure(role: str, chart_type: str, data: Dict[str, Any] | None = None) -> Figure:
+    """生成与 show_visual 相同的图表并返回 Figure（不创建窗口，不弹出提示）。
+
+    数据不足等问题以 ValueError 抛出，由调用方处理。
+    """
+    capture = FigureCapture()
+    _dispatch(capture, role, chart_type, data)
+    if capture.figure is None:
+        raise ValueError(f"图表类型 {chart_type} 没有生成图像")
+    return capture.figure
+
+
+def _dispatch(parent, role: str, chart_type: str, data: Dict[str, Any] | None):
+    role = (role or "").lower()
+    chart_type = (chart_type or "").lower()
+    data = data or {}
+
+    if role == "admin":
+        _dispatch_admin(parent, chart_type, data)
+    elif role == "teacher":
+        _dispatch_teacher(parent, chart_type, data)
+    elif role == "student":
+        _dispatch_student(parent, chart_type, data)
+    else:
+        raise ValueError(f"未知角色: {role}")
+
+
 def _dispatch_admin(parent: tk.Tk | tk.Toplevel, chart_type: str, data: Dict[str, Any]):
+    # 各角色的图表模块依赖 matplotlib/numpy，第一次绘图时才导入
+    from . import admin_visuals
+
     if chart_type == "grade_distribution":
         distribution = data.get("distribution") or data
         admin_visuals.show_grade_distribution_bar(parent, distribution)
@@ -69,11 +97,11 @@ def _dispatch_admin(parent: tk.Tk | tk.Toplevel, chart_type: str, data: Dict[str
         admin_visuals.show_statistics_overview(parent, stats)
     elif chart_type == "resource_heatmap":
         courses = data.get("courses") or []
-        admin_visuals.show_resource_heatmap(parent, courses)
+        admin_visuals.show_resource_heatmap(parent, courses, data.get("matrix"))
     elif chart_type == "grouped_grade_boxplot":
         grouped_scores = data.get("grouped_scores") or {}
         title = data.get("title", "成绩分布箱线图")
-        admin_visuals.show_grouped_grade_boxplot(parent, grouped_scores, title)
+        admin_visuals.show_grouped_grade_boxplot(parent, grouped_scores, title, data.get("summaries"))
     elif chart_type == "student_risk_trend":
         timeline = data.get("timeline") or []
         admin_visuals.show_student_risk_trend(parent, timeline)
@@ -98,10 +126,12 @@ def _dispatch_admin(parent: tk.Tk | tk.Toplevel, chart_type: str, data: Dict[str
 
 
 def _dispatch_teacher(parent: tk.Tk | tk.Toplevel, chart_type: str, data: Dict[str, Any]):
+    from . import teacher_visuals
+
     if chart_type == "course_grade_histogram":
         grades = data.get("grades") or []
         course_name = data.get("course_name", "课程")
-        teacher_visuals.show_course_grade_histogram(parent, grades, course_name)
+        teacher_visuals.show_course_grade_histogram(parent, grades, course_name, data.get("histogram"))
     elif chart_type == "attendance_scatter":
         records = data.get("records") or []
         course_name = data.get("course_name", "课程")
@@ -115,6 +145,8 @@ def _dispatch_teacher(parent: tk.Tk | tk.Toplevel, chart_type: str, data: Dict[s
 
 
 def _dispatch_student(parent: tk.Tk | tk.Toplevel, chart_type: str, data: Dict[str, Any]):
+    from . import student_visuals
+
     if chart_type == "personal_score_trend":
         grades = data.get("grades") or []
         target_score = data.get("target_score")